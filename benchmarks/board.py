@@ -0,0 +1,65 @@
+"""Player lookup and turn rotation on large tables.
+
+Run with `python -m benchmarks.board`.
+"""
+import timeit
+from uuid import uuid4
+
+from yahtzee.game import Game
+from yahtzee.game import events as evt
+from yahtzee.game.board import GameOver, Round
+
+TABLE_SIZES = (2, 10, 100, 1000)
+
+
+def _table(seats: int) -> list[evt.Event]:
+    game = uuid4()
+    events: list[evt.Event] = [evt.GameCreated(game)]
+    events += [evt.PlayerAdded(game, f"player-{seat}") for seat in range(seats)]
+    events.append(evt.GameStarted(game))
+    return events
+
+
+def _full_round(seats: int) -> list[evt.Event]:
+    events = _table(seats)
+    game = events[0].game
+    for seat in range(seats):
+        player = f"player-{seat}"
+        events.append(evt.PointsScored(game, player, "Chance", 20))
+        next_player = f"player-{(seat + 1) % seats}"
+        events.append(evt.TurnChanged(game, next_player, 1 + (seat + 1) // seats))
+    return events
+
+
+def _rotate(round: Round | GameOver, seats: int) -> None:
+    for _ in range(seats):
+        round = round.next_round()
+
+
+def main() -> None:
+    print(f"{'seats':>6} {'get_player':>12} {'rotation/turn':>14} {'replay/event':>13}")
+    for seats in TABLE_SIZES:
+        board = Game.from_events(uuid4(), _table(seats)).board
+        last_player = f"player-{seats - 1}"
+        number = max(1, 100_000 // seats)
+        get_player = timeit.timeit(lambda: board.get_player(last_player), number=number)
+
+        round = board.round
+        rotation = timeit.timeit(
+            lambda: _rotate(round, seats), number=max(1, number // seats)
+        )
+
+        events = _full_round(seats)
+        replay = timeit.timeit(
+            lambda: Game.from_events(events[0].game, events), number=10
+        )
+
+        print(
+            f"{seats:>6} {get_player / number * 1e9:>10.0f}ns"
+            f" {rotation / (max(1, number // seats) * seats) * 1e9:>12.0f}ns"
+            f" {replay / (10 * len(events)) * 1e9:>11.0f}ns"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Cold start budget of the yahtzee package.
+
+Import a module in fresh interpreters with `python -X importtime` and fail
+when the median cumulative import time is over budget, or when a module that
+should load lazily was imported.
+
+Run with `python -m benchmarks.importtime [--module yahtzee.app] [--budget-ms 100]`.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULE = "yahtzee.app"
+DEFAULT_BUDGET_MS = 100.0
+DEFAULT_RUNS = 9
+
+# Only needed on error paths, by views or by optional stores and services
+LAZY_MODULES = (
+    "asyncio",
+    "logging",
+    "yahtzee.archive",
+    "yahtzee.columnar",
+    "yahtzee.replication",
+    "yahtzee.server",
+    "yahtzee.statistics",
+    "yahtzee.subscriptions",
+    "yahtzee.views",
+)
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """Self and cumulative import times in µs, by imported module"""
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():
+            continue  # header
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    total_ms = statistics.median(run[args.module][1] for run in runs) / 1000
+    own_ms = (
+        statistics.median(
+            sum(
+                self_us
+                for name, (self_us, _) in run.items()
+                if name.startswith("yahtzee")
+            )
+            for run in runs
+        )
+        / 1000
+    )
+
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)
+    print(f"slowest imports of `{args.module}` (self time):")
+    for name, (self_us, _) in slowest[:10]:
+        print(f"  {self_us / 1000:>6.2f}ms  {name}")
+    print(f"yahtzee modules: {own_ms:.2f}ms")
+    print(f"total: {total_ms:.2f}ms (budget {args.budget_ms:.2f}ms)")
+
+    failed = False
+    if loaded := [name for name in LAZY_MODULES if name in runs[-1]]:
+        print(f"Eagerly imported: {', '.join(loaded)}", file=sys.stderr)
+        failed = True
+    if total_ms > args.budget_ms:
+        print("Import time is over budget", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Micro-benchmarks of the hot primitives, compared to stored baselines.
+
+Each benchmark reports the best time of an operation over a few repeats, the
+benchmarks taking turns.
+Results are compared to `benchmarks/baselines/micro.json`: a benchmark
+slower than its baseline by more than the threshold is a regression, and
+makes the run fail.
+
+The replays use the recorded games of `benchmarks/corpus/games.ytzc`, full
+length games in the columnar export format.
+
+Run with `python -m benchmarks.micro [--filter board.apply] [--threshold 0.2]`,
+update the baselines with `--save`, record the corpus again with `--record`.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from itertools import combinations_with_replacement
+from pathlib import Path
+from uuid import UUID
+
+from yahtzee import app, columnar, diagnostics
+from yahtzee.game import Game
+from yahtzee.game.board import Board
+from yahtzee.game.dices import (
+    Combination,
+    Dice,
+    DiceNumber,
+    DicePosition,
+    Dices,
+    DiceValue,
+)
+from yahtzee.game.events import Event
+from yahtzee.game.score import Category, Scorecard
+from yahtzee.packing import PackedEventsStore
+from yahtzee.repository import InMemoryEventsStore
+from yahtzee.views import GameViews
+
+HERE = Path(__file__).resolve().parent
+CORPUS = HERE / "corpus" / "games.ytzc"
+BASELINES = HERE / "baselines" / "micro.json"
+
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_REPEATS = 5
+CORPUS_GAMES = 24
+CORPUS_PLAYERS = 4
+CORPUS_SEED = 46
+
+Benchmark = Callable[[], object]
+
+
+def load_corpus(path: Path = CORPUS) -> dict[UUID, list[Event]]:
+    store = InMemoryEventsStore()
+    with path.open("rb") as corpus:
+        columnar.import_events(store, [corpus])
+    return {uuid: store.get_game_events(uuid) for uuid in store.games()}
+
+
+def record_corpus(path: Path = CORPUS) -> int:
+    """Play complete games with seeded random choices, export them"""
+    random.seed(CORPUS_SEED)
+    app.bootstrap()
+    diagnostics.play_games(CORPUS_GAMES, CORPUS_PLAYERS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as corpus:
+        return columnar.export_events(app.events(), corpus)
+
+
+def _hands() -> list[list[DiceValue]]:
+    return [
+        [DiceValue(value) for value in hand]
+        for hand in combinations_with_replacement(range(1, 7), 5)
+    ]
+
+
+def _benchmarks(games: dict[UUID, list[Event]]) -> Iterator[tuple[str, Benchmark]]:
+    """Name and operation of each benchmark"""
+    hands = _hands()
+    combinations = list(Combination)
+
+    def score_all_hands() -> None:
+        for hand in hands:
+            for combination in combinations:
+                combination.score(hand)
+
+    yield "combination.score/252 hands x 13", score_all_hands
+
+    cup = Dices.new_cup()
+    yield "dices.roll", cup.roll
+    rolled = cup.roll()
+    aside = Dice(DiceNumber.THREE, DiceValue.FOUR, DicePosition.ASIDE)
+    yield "dices.update", lambda: rolled.update(aside)
+
+    categories = [category for category in Category if not category.is_bonus]
+
+    def fill_scorecard() -> None:
+        scorecard = Scorecard()
+        for category in categories:
+            scorecard[category] = 10
+
+    yield "scorecard.setitem/13 lines", fill_scorecard
+    full = Scorecard()
+    for category in categories:
+        full[category] = 10
+    yield "scorecard.score", lambda: full.score
+
+    def replay_games() -> None:
+        for uuid, events in games.items():
+            Game.from_events(uuid, events)
+
+    yield f"game.from_events/{len(games)} games", replay_games
+
+    store = InMemoryEventsStore()
+    store.add_many(games)
+
+    def build_views() -> None:
+        for uuid in games:
+            GameViews(uuid, store)
+
+    yield f"views.construction/{len(games)} games", build_views
+
+    def replay_stored_games() -> None:
+        for uuid in games:
+            Game.from_events(uuid, store.get_game_events(uuid))
+
+    yield f"store.replay/{len(games)} games", replay_stored_games
+
+    # the games read last are kept decoded, as the games being played
+    packed = PackedEventsStore()
+    packed.add_many(games)
+
+    def replay_packed_games() -> None:
+        for uuid in games:
+            Game.from_events(uuid, packed.get_game_events(uuid))
+
+    yield f"packed.replay/{len(games)} games", replay_packed_games
+
+    cold = PackedEventsStore(hot_games=0)
+    cold.add_many(games)
+
+    def replay_cold_games() -> None:
+        for uuid in games:
+            Game.from_events(uuid, cold.get_game_events(uuid))
+
+    yield f"packed.replay.cold/{len(games)} games", replay_cold_games
+
+
+def measure_applies(
+    games: dict[UUID, list[Event]], repeats: int = DEFAULT_REPEATS
+) -> dict[str, float]:
+    """Best seconds per `Board.apply` of each event type, replaying the games"""
+    best: dict[str, float] = {}
+    for _ in range(repeats):
+        elapsed: dict[type[Event], int] = defaultdict(int)
+        counts: dict[type[Event], int] = defaultdict(int)
+        for events in games.values():
+            board = Board.new()
+            for event in events:
+                start = time.perf_counter_ns()
+                board.apply(event)
+                elapsed[type(event)] += time.perf_counter_ns() - start
+                counts[type(event)] += 1
+        for event_type, nanoseconds in elapsed.items():
+            name = f"board.apply.{event_type.__name__}"
+            seconds = nanoseconds / counts[event_type] / 1e9
+            best[name] = min(best.get(name, seconds), seconds)
+    return dict(sorted(best.items()))
+
+
+def measure(
+    benchmarks: Iterable[tuple[str, Benchmark]], repeats: int = DEFAULT_REPEATS
+) -> dict[str, float]:
+    """Best seconds per operation of each benchmark.
+    The benchmarks take turns, a repeat of each before the next repeat, so
+    that a slower period of the machine does not favour one over another.
+    """
+    timers = {}
+    for name, benchmark in benchmarks:
+        timer = timeit.Timer(benchmark)
+        number, _ = timer.autorange()
+        timers[name] = timer, number
+    best: dict[str, float] = {}
+    for _ in range(repeats):
+        for name, (timer, number) in timers.items():
+            seconds = timer.timeit(number) / number
+            best[name] = min(best.get(name, seconds), seconds)
+    return best
+
+
+def run(names: str = "", repeats: int = DEFAULT_REPEATS) -> dict[str, float]:
+    games = load_corpus()
+    benchmarks = [(name, b) for name, b in _benchmarks(games) if names in name]
+    results = measure(benchmarks, repeats)
+    applies = measure_applies(games, repeats)
+    results.update((name, t) for name, t in applies.items() if names in name)
+    return results
+
+
+def regressions(
+    results: dict[str, float], baselines: dict[str, float], threshold: float
+) -> dict[str, float]:
+    """Slowdown of the benchmarks slower than their baseline by the threshold"""
+    slowdowns = {}
+    for name, seconds in results.items():
+        baseline = baselines.get(name)
+        if baseline and seconds / baseline - 1 > threshold:
+            slowdowns[name] = seconds / baseline - 1
+    return slowdowns
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "recorded": time.strftime("%Y-%m-%d"),
+    }
+
+
+def load_baselines(path: Path = BASELINES) -> tuple[dict, dict[str, float]]:
+    if not path.exists():
+        return {}, {}
+    data = json.loads(path.read_text())
+    return data["environment"], data["results"]
+
+
+def save_baselines(results: dict[str, float], path: Path = BASELINES) -> None:
+    _, baselines = load_baselines(path)
+    data = {"environment": _environment(), "results": {**baselines, **results}}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the micro-benchmarks")
+    parser.add_argument("--filter", default="", help="run the matching benchmarks")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--save", action="store_true", help="update the baselines")
+    parser.add_argument("--record", action="store_true", help="record the corpus")
+    args = parser.parse_args()
+
+    if args.record:
+        print(f"recorded {record_corpus()} events in {CORPUS}")
+        return 0
+
+    environment, baselines = load_baselines()
+    if environment and environment["python"] != platform.python_version():
+        print(f"baselines recorded with Python {environment['python']}")
+    results = run(args.filter, args.repeats)
+    slowdowns = regressions(results, baselines, args.threshold)
+    for name, seconds in results.items():
+        line = f"{name:<40} {seconds * 1e6:>10.2f}us"
+        if name in baselines:
+            change = seconds / baselines[name] - 1
+            line += f" {baselines[name] * 1e6:>10.2f}us {change:>+7.1%}"
+        if name in slowdowns:
+            line += "  REGRESSION"
+        print(line)
+    if args.save:
+        save_baselines(results)
+        print(f"saved {len(results)} baselines in {BASELINES}")
+        return 0
+    return 1 if slowdowns else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Commit throughput of a syncing store, direct and behind a write-behind buffer.
+
+Run with `python -m benchmarks.write_behind [--commits 2000]`.
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from yahtzee.game import events as evt
+from yahtzee.game.events import Event
+from yahtzee.repository import EventsStore, InMemoryEventsStore
+from yahtzee.writebehind import WriteBehindEventsStore
+
+
+class SyncingEventsStore(InMemoryEventsStore):
+    """In memory store paying an fsync of its log on every write"""
+
+    def __init__(self, log: Path) -> None:
+        super().__init__()
+        self._log = log.open("ab")
+
+    def add_events(self, uuid: UUID, events: Sequence[Event]) -> None:
+        self.add_many({uuid: events})
+
+    def add_many(self, events_by_game: Mapping[UUID, Sequence[Event]]) -> None:
+        self._log.write(pickle.dumps(dict(events_by_game)))
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        super().add_many(events_by_game)
+
+
+def _commits(count: int, games: int) -> list[tuple[UUID, list[Event]]]:
+    """Commits of a roll: the roll and the 5 dices"""
+    uuids = [uuid4() for _ in range(games)]
+    commits = []
+    for i in range(count):
+        game = uuids[i % games]
+        events: list[Event] = [evt.RollPerformed(game, 1)]
+        events += [
+            evt.DicePositionChanged(game, n, "on_the_track", 6) for n in (1, 2, 3, 4, 5)
+        ]
+        commits.append((game, events))
+    return commits
+
+
+def _commit_all(store: EventsStore, commits: list[tuple[UUID, list[Event]]]) -> None:
+    for game, events in commits:
+        store.add_events(game, events)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commits", type=int, default=2000)
+    parser.add_argument("--games", type=int, default=100)
+    args = parser.parse_args()
+    commits = _commits(args.commits, args.games)
+    with tempfile.TemporaryDirectory(dir=".") as directory:
+        store = SyncingEventsStore(Path(directory) / "direct.log")
+        start = time.perf_counter()
+        _commit_all(store, commits)
+        elapsed = time.perf_counter() - start
+        print(f"direct:       {len(commits) / elapsed:>8.0f} commits/s")
+
+        synced = SyncingEventsStore(Path(directory) / "behind.log")
+        buffered = WriteBehindEventsStore(synced, journal=Path(directory) / "journal")
+        start = time.perf_counter()
+        _commit_all(buffered, commits)
+        acknowledged = time.perf_counter() - start
+        buffered.close()
+        elapsed = time.perf_counter() - start
+        assert synced.head() == store.head()
+        metrics = buffered.metrics.asdict()
+        print(
+            f"write-behind: {len(commits) / elapsed:>8.0f} commits/s "
+            f"({len(commits) / acknowledged:.0f}/s acknowledged), "
+            f"{metrics['flushes']} group commits of "
+            f"{metrics['batch_size']['mean']:.0f} events, "
+            f"{metrics['flush_latency']['mean'] * 1e3:.2f}ms mean flush"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+Feature: persistent boards
+	Background: Game started with 2 players
+		Given some players named
+			| name  |
+			| Bob   |
+			| Alice |
+		And the game is started
+
+	Scenario: The persistent board follows the events like the board
+		When the last round is played
+		Then the persistent board is the board after each event
+
+	Scenario: A branch leaves the board it started from unchanged
+		When Bob rolls the dices
+		And Bob scores the Chance line in a branch of the persistent board
+		Then Bob scored nothing on the persistent board
+		And Bob scored the Chance line in the branch
+		And the branch shares Alice and the dices with the persistent board
+
+	Scenario: A snapshot does not follow the board it was taken from
+		When Bob rolls the dices
+		And a snapshot of the board is taken
+		And Bob scores the Chance line on the board
+		Then Bob scored nothing on the snapshot
@@ -84,3 +84,23 @@ Feature: Combinations
 			| combination     | dices     | score |
 			| Chance          | 1 2 3 4 5 | 15    |
 			| Chance          | 6 6 6 6 6 | 30    |
+
+	Scenario Outline: Expected scores with the rolls left
+		Given the dices rolled <dices>
+		Then with <rolls> rolls left the <combination> expected score is <expected>
+
+		Examples:
+			| combination     | dices     | rolls | expected |
+			| Yahtzee         | 6 6 6 6 6 | 0     | 50.0     |
+			| Yahtzee         | 6 6 6 6 1 | 0     | 0.0      |
+			| Yahtzee         | 6 6 6 6 1 | 1     | 8.33     |
+			| Chance          | 1 1 1 1 1 | 1     | 17.5     |
+			| Large Straight  | 1 2 3 4 5 | 2     | 40.0     |
+
+	Scenario: The hints of a hand are computed once whatever the order of its dices
+		Given a new table of the hints
+		And the dices rolled 6 6 6 6 1
+		Then with 1 rolls left the dices to keep are 1, 2, 3 and 4
+		Given the dices rolled 1 6 6 6 6
+		Then with 1 rolls left the dices to keep are 2, 3, 4 and 5
+		And the hints were computed once
@@ -0,0 +1,28 @@
+Feature: memory diagnostics
+	Scenario: The report counts the stored games and their events
+		Given 3 finished games of 2 players
+		When the memory report is made
+		Then the report counts the 3 games and the game created
+		And the report counts the stored events of each type
+
+	Scenario: The dices shared by all the games are not charged to a hand
+		Given the dices rolled 1 2 3 4 5
+		Then the hand costs less than the hand and its dices
+
+	Scenario: Reporting the caches does not create the table of the hints
+		Given no table of the hints
+		When the caches are reported
+		Then the caches report has no positions of the hints
+		And there is still no table of the hints
+
+	Scenario: Reporting the caches counts the table of the hints in use
+		Given a new table of the hints
+		And the dices rolled 6 6 6 6 1
+		Then with 1 rolls left the dices to keep are 1, 2, 3 and 4
+		When the caches are reported
+		Then the caches report counts the positions of the hints with 1 miss
+
+	Scenario: The hot spots are lines of the package
+		When the hot spots of playing 1 game of 2 players are traced
+		Then there are hot spots
+		And every hot spot is a line of the package
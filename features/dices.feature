@@ -0,0 +1,20 @@
+Feature: shared dices and hands
+	Scenario: The same dice is a single instance
+		Given the dices rolled 1 2 3 4 5
+		Then the dice 3 valued 3 on the track is the rolled one
+		And the dice 3 valued 3 on the track is the same once unpickled
+
+	Scenario: An invalid dice is refused
+		Then the dice 6 valued 3 on the track is invalid
+		And the dice 1 valued 7 on the track is invalid
+
+	Scenario: The same hand is a single instance
+		Given the dices rolled 1 2 3 4 5
+		Then the hand 1 2 3 4 5 is the rolled one
+		And the rolled hand is the same once unpickled
+		And the rolled hand is the same once rolled again, all dices aside
+
+	Scenario: The hands kept are bounded
+		When 5000 distinct hands are built
+		Then at most 4096 hands are kept
+		And the hand 6 6 6 6 6 is equal to a hand built before
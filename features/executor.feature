@@ -0,0 +1,11 @@
+Feature: command executor
+	Scenario: The commands of a game run in their submission order
+		Given an executor of 4 workers running commands slowly
+		When 50 commands of each of 3 games are submitted
+		Then the commands of each game ran in their submission order
+		And no game ran two commands at once
+
+	Scenario: A shut down executor takes no more commands
+		Given an executor of 4 workers running commands slowly
+		When the executor is shut down
+		Then a command of a new game is refused
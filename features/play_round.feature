@@ -10,6 +10,20 @@ Feature: play a round
 		When Alice rolls the dices
 		Then an error said "Alice, it's not your turn to play"
 
+	Scenario: Zed can't play because they are not in the game
+		When Zed rolls the dices
+		And Zed keeps the dices 1
+		And Zed scores the Chance line
+		Then an error said "Zed, you are not in the game"
+		And it's Bob's turn to play
+
+	Scenario: The turn comes back to Bob once Alice played
+		When Bob rolls the dices
+		And Bob scores the Chance line
+		And Alice rolls the dices
+		And Alice scores the Chance line
+		Then it's Bob's turn to play
+
 	Scenario: Bob can play because it is his turn
 		When Bob rolls the dices
 		And Bob scores the Chance line
@@ -33,6 +47,55 @@ Feature: play a round
 		Then dices 1, 2 and 3 have the same value as before
 		And dices 4 and 5 are on the track
 
+	Scenario: Bob gets the expected scores of his roll
+		When Bob rolls the dices
+		Then Bob has a hint for 13 categories with 2 rolls left
+
+	Scenario: The views are only sent again once the game changed
+		Given the dices were polled
+		Then the dices are unchanged since the last poll
+		When Bob rolls the dices
+		Then the dices changed since the last poll
+
+	Scenario: Bob's retried roll does not roll the dices again
+		When Bob rolls the dices for the request r1
+		And Bob rolls the dices for the request r1
+		Then Bob rolled the dices once
+
+	Scenario: Bob's roll retried while it runs does not roll the dices again
+		When Bob rolls the dices 4 times at once for the request r1
+		Then Bob rolled the dices once
+
+	Scenario: Bob's roll retried while it runs gets its result once evicted
+		Given the results of the commands kept for 1 game
+		When a game is created for the request r2 while Bob's roll for the request r1 runs and is retried
+		Then the retried roll got the result of the roll
+		And Bob rolled the dices once
+
+	Scenario: Bob's roll needs a request id made of text
+		Then Bob can not roll the dices for the request ["r1"]
+
+	Scenario: Bob floods the game with commands
+		Given a player may send 2 commands in a row
+		When Bob rolls the dices
+		And Bob keeps the dices 1, 2 and 3
+		Then dices 2 and 3 are on the track
+
+	Scenario: Bob's retried roll is not limited
+		Given a player may send 1 command in a row
+		When Bob rolls the dices for the request r1
+		And Bob rolls the dices for the request r1
+		Then the last request succeeded
+		And Bob rolled the dices once
+
+	Scenario: Bob's roll retried once limited is run
+		Given a player may send 1 command in a row
+		When Bob rolls the dices
+		And Bob rolls the dices for the request r1
+		And the commands are no longer limited
+		And Bob rolls the dices for the request r1
+		Then the last request succeeded
+
 	Scenario: Bob can roll dices 3 times
 		When Bob rolls the dices
 		And Bob rerolls the dices
@@ -49,3 +112,9 @@ Feature: play a round
 	Scenario: Alice played the last round and the game is over
 		When the last round is played
 		Then the game is over
+
+	Scenario: The board of a finished game can be looked at after any round
+		When the last round is played
+		Then after round 1 each player scored 1 line
+		And after round 12 each player scored 12 lines
+		And after round 13 the game is over
@@ -0,0 +1,37 @@
+Feature: scoring rules
+	Background: Game with the official rules started with 2 players
+		Given a game with the official rules
+		And some players named
+			| name  |
+			| Bob   |
+			| Alice |
+		And the game is started
+		And Bob scored 50 for Yahtzee
+
+	Scenario: Bob rolls a second Yahtzee and gets the Yahtzee bonus
+		Given Bob rolled 5, 5, 5, 5 and 5
+		When Bob scores the Fives line
+		Then Bob score is equal to 175
+
+	Scenario: Bob must score his joker in its upper section
+		Given Bob rolled 4, 4, 4, 4 and 4
+		When Bob scores the Full House line
+		Then An error said "Bob, you must score your Yahtzee in Fours"
+
+	Scenario: Bob scores his joker as a full house
+		Given Bob scored 16 for Fours
+		And Bob rolled 4, 4, 4, 4 and 4
+		When Bob scores the Full House line
+		Then Bob score is equal to 191
+
+	Scenario: Bob can't play a game with unknown rules
+		Then a game with the russian rules can not be created
+
+	Scenario: Bob can't score the Yahtzee bonus line himself
+		Given Bob rolled 5, 5, 5, 5 and 5
+		When Bob scores the Fives line
+		And Alice rolls the dices
+		And Alice scores the Aces line
+		And Bob rolls the dices
+		And Bob scores the Yahtzee Bonus line
+		Then An error said "Bob, Yahtzee Bonus is not a combination"
@@ -0,0 +1,40 @@
+Feature: game server
+	Scenario: The commands are decoded as they were encoded
+		Then every command is decoded from its encoding
+
+	Scenario: The results are decoded as they were encoded
+		Then the results are decoded from their encoding
+
+	Scenario Outline: A malformed request is refused, and the next ones answered
+		Given a game server
+		When the request <request> is sent
+		Then the request is refused as invalid
+		And the connection answers the next requests
+
+		Examples:
+			| request                                                                                  |
+			| {"command": {"type": "AddPlayer", "game": 123, "name": "Bob"}}                           |
+			| {"command": {"type": "AddPlayer", "game": "{game}", "name": "Bob", "request_id": ["r"]}} |
+			| {"command": {"type": "AddPlayer", "game": "{game}", "name": 5}}                          |
+			| {"command": {"type": "AddPlayer", "game": "{game}", "name": "Bob", "age": 7}}            |
+			| {"command": {"type": "KeepDice", "game": "{game}", "player": "Bob", "dice": 6}}          |
+			| {"command": {"type": "Unknown"}}                                                         |
+			| {"command": ["AddPlayer"]}                                                               |
+			| {"view": "players", "game": 123}                                                         |
+			| {"view": ["players"], "game": "{game}"}                                                  |
+			| {"view": "players"}                                                                      |
+
+	Scenario: A slow command does not hold the requests of the other games
+		Given a game server
+		And the commands of the game run slowly
+		Then a view of another game is answered while a command of the game runs
+
+	Scenario: A slow command does not hold the next requests of its connection
+		Given a game server
+		And the commands of the game run slowly
+		Then a view of another game pipelined after a command of the game is answered first
+
+	Scenario: A client leaving without reading the responses is let go
+		Given a game server reading 1 request ahead
+		When a client sends 1000 requests and leaves without reading the responses
+		Then the server has no connection left
@@ -0,0 +1,92 @@
+from behave import then, when
+
+from yahtzee.app import events
+from yahtzee.game import events as evt
+from yahtzee.game.board import Board
+from yahtzee.game.dices import Combination
+from yahtzee.game.persistent import PersistentBoard
+from yahtzee.game.score import Category
+
+
+def summary(board: Board | PersistentBoard) -> tuple:
+    """What the board shows, whether mutable or persistent"""
+    return (
+        board.game_id,
+        board.status,
+        board.version,
+        board.rules,
+        dict(board.seats),
+        [(player.name, dict(player.scorecard.lines)) for player in board.players],
+        board.playing_player.name,
+        board.round.player_turn.attempted_rolls,
+        board.dices,
+    )
+
+
+def game_board(context) -> Board:
+    board = Board.new()
+    for event in events().get_game_events(context.game_uuid):
+        board.apply(event)
+    return board
+
+
+def chance(context, player_name: str) -> evt.PointsScored:
+    points = game_board(context).dices.score(Combination.CHANCE)
+    return evt.PointsScored(context.game_uuid, player_name, "Chance", points)
+
+
+@then("the persistent board is the board after each event")
+def follows_board(context):
+    board = Board.new()
+    persistent = PersistentBoard.from_board(board)
+    for offset, event in enumerate(events().get_game_events(context.game_uuid)):
+        board.apply(event)
+        persistent = persistent.apply(event)
+        assert summary(persistent) == summary(board), f"Boards differ at {offset}"
+
+
+@when("{player_name} scores the Chance line in a branch of the persistent board")
+def branch(context, player_name: str):
+    context.persistent = PersistentBoard.from_board(game_board(context))
+    context.branch = context.persistent.apply(chance(context, player_name))
+
+
+@when("a snapshot of the board is taken")
+def snapshot(context):
+    context.board = game_board(context)
+    context.snapshot = PersistentBoard.from_board(context.board)
+
+
+@when("{player_name} scores the Chance line on the board")
+def score_on_board(context, player_name: str):
+    context.board.apply(chance(context, player_name))
+    assert context.board.get_player(player_name).scorecard[Category.CHANCE]
+
+
+def scored_nothing(board: PersistentBoard, player_name: str):
+    scorecard = board.get_player(player_name).scorecard
+    scored = [line.category for line in scorecard if line.is_scored]
+    assert not scored, scored
+
+
+@then("{player_name} scored nothing on the persistent board")
+def nothing_on_persistent(context, player_name: str):
+    scored_nothing(context.persistent, player_name)
+
+
+@then("{player_name} scored nothing on the snapshot")
+def nothing_on_snapshot(context, player_name: str):
+    scored_nothing(context.snapshot, player_name)
+
+
+@then("{player_name} scored the Chance line in the branch")
+def scored_in_branch(context, player_name: str):
+    scorecard = context.branch.get_player(player_name).scorecard
+    assert scorecard.is_scored(Category.CHANCE)
+
+
+@then("the branch shares {player_name} and the dices with the persistent board")
+def shared(context, player_name: str):
+    persistent, branch = context.persistent, context.branch
+    assert branch.get_player(player_name) is persistent.get_player(player_name)
+    assert branch.dices is persistent.dices
@@ -1,6 +1,9 @@
 from behave import given, then
 
+from yahtzee.game import hints
 from yahtzee.game.dices import Combination, Dice, Dices
+from yahtzee.game.score import Scorecard
+from yahtzee.game.transposition import TranspositionTable
 
 
 @given("the dices rolled {d1:d} {d2:d} {d3:d} {d4:d} {d5:d}")
@@ -20,3 +23,32 @@ def combination_score(context, combination: str, expected_score: int):
     assert (
         expected_score == actual_score
     ), f"Expected score {expected_score}, found {actual_score}"
+
+
+@then("with {rolls:d} rolls left the {combination} expected score is {expected:g}")
+def expected_score(context, rolls: int, combination: str, expected: float):
+    hint = hints.hint(context.dices, Scorecard(), rolls)
+    actual = next(
+        line.expected for line in hint.categories if line.category.value == combination
+    )
+    assert round(actual, 2) == expected, f"Expected {expected}, found {actual}"
+
+
+@given("a new table of the hints")
+def new_hints_table(context):
+    context.hints_table = TranspositionTable(slots=64)
+    hints.set_transposition_table(context.hints_table)
+
+
+@then("with {rolls:d} rolls left the dices to keep are {numbers}")
+def best_keep(context, rolls: int, numbers: str):
+    expected = [int(number) for number in numbers.replace(" and ", ", ").split(", ")]
+    best = hints.hint(context.dices, Scorecard(), rolls).keeps[0]
+    actual = [number.value for number in best.dices]
+    assert actual == expected, f"Expected to keep {expected}, found {actual}"
+
+
+@then("the hints were computed once")
+def hints_computed_once(context):
+    table = context.hints_table
+    assert table.misses == 1, f"Computed {table.misses} times"
@@ -0,0 +1,86 @@
+from collections import Counter
+
+from behave import given, then, when
+
+from yahtzee import diagnostics
+from yahtzee.app import events
+from yahtzee.game import hints
+
+
+@when("the memory report is made")
+def memory_report(context):
+    context.report = diagnostics.report(events())
+
+
+@then("the report counts the {games:d} games and the game created")
+def games_counted(context, games: int):
+    assert context.report["store"]["games"] == games + 1, context.report["store"]
+
+
+@then("the report counts the stored events of each type")
+def events_counted(context):
+    store = events()
+    stored = Counter(
+        type(event).__name__
+        for uuid in store.games()
+        for event in store.get_game_events(uuid)
+    )
+    by_type = context.report["store"]["by_event_type"]
+    counted = {name: footprint["count"] for name, footprint in by_type.items()}
+    assert counted == dict(stored), counted
+    assert context.report["store"]["events"] == sum(stored.values())
+
+
+@then("the hand costs less than the hand and its dices")
+def hand_size(context):
+    shared = diagnostics.deep_size(context.dices)
+    owned = diagnostics.deep_size(context.dices, set())
+    assert shared < owned, (shared, owned)
+
+
+@given("no table of the hints")
+def no_hints_table(context):
+    hints.set_transposition_table(None)
+
+
+@when("the caches are reported")
+def caches_reported(context):
+    context.caches = diagnostics.caches_report()
+
+
+@then("the caches report has no positions of the hints")
+def no_positions(context):
+    assert "hints.positions" not in context.caches, context.caches
+
+
+@then("there is still no table of the hints")
+def still_no_hints_table(context):
+    assert hints._positions is None
+
+
+@then("the caches report counts the positions of the hints with {misses:d} miss")
+def positions_counted(context, misses: int):
+    positions = context.caches["hints.positions"]
+    assert positions["entries"] == len(context.hints_table), positions
+    assert positions["bytes"] == context.hints_table.nbytes, positions
+    assert positions["misses"] == misses, positions
+
+
+@when("the hot spots of playing {games:d} game of {players:d} players are traced")
+def trace_hot_spots(context, games: int, players: int):
+    context.hot_spots = diagnostics.hot_spots(
+        lambda: diagnostics.play_games(games, players)
+    )
+
+
+@then("there are hot spots")
+def some_hot_spots(context):
+    assert context.hot_spots, "No hot spot"
+
+
+@then("every hot spot is a line of the package")
+def package_hot_spots(context):
+    package = str(diagnostics.PACKAGE_DIR)
+    for spot in context.hot_spots:
+        assert spot.location.startswith(package), spot.location
+        assert spot.bytes > 0 and spot.blocks, spot
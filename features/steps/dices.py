@@ -0,0 +1,75 @@
+import pickle
+from itertools import islice, product
+
+from behave import then, when
+
+from yahtzee.game import dices as _dices
+from yahtzee.game.dices import Dice, DicePosition, Dices
+
+
+def on_the_track(*values: int) -> Dices:
+    return Dices(
+        *(
+            Dice.from_literal(number, value, "on_the_track")
+            for number, value in enumerate(values, start=1)
+        )
+    )
+
+
+@then("the dice {number:d} valued {value:d} on the track is the rolled one")
+def same_dice(context, number: int, value: int):
+    dice = Dice.from_literal(number, value, "on_the_track")
+    rolled = list(context.dices.all)[number - 1]
+    assert dice is rolled, (dice, rolled)
+
+
+@then("the dice {number:d} valued {value:d} on the track is the same once unpickled")
+def unpickled_dice(context, number: int, value: int):
+    dice = Dice.from_literal(number, value, "on_the_track")
+    assert pickle.loads(pickle.dumps(dice)) is dice
+
+
+@then("the dice {number:d} valued {value:d} on the track is invalid")
+def invalid_dice(context, number: int, value: int):
+    try:
+        Dice.from_literal(number, value, "on_the_track")
+    except ValueError:
+        return
+    raise AssertionError(f"Dice {number} valued {value} was built")
+
+
+@then("the hand {d1:d} {d2:d} {d3:d} {d4:d} {d5:d} is the rolled one")
+def same_hand(context, d1: int, d2: int, d3: int, d4: int, d5: int):
+    assert on_the_track(d1, d2, d3, d4, d5) is context.dices
+
+
+@then("the rolled hand is the same once unpickled")
+def unpickled_hand(context):
+    assert pickle.loads(pickle.dumps(context.dices)) is context.dices
+
+
+@then("the rolled hand is the same once rolled again, all dices aside")
+def hand_aside(context):
+    hand = context.dices
+    for dice in list(hand.all):
+        hand = hand.update(Dice(dice.number, dice.value, DicePosition.ASIDE))
+    assert hand.roll() is hand
+
+
+@when("{count:d} distinct hands are built")
+def build_hands(context, count: int):
+    context.first_hand = on_the_track(6, 6, 6, 6, 6)
+    for values in islice(product(range(1, 7), repeat=5), count):
+        on_the_track(*values)
+
+
+@then("at most {count:d} hands are kept")
+def hands_kept(context, count: int):
+    assert len(_dices._HANDS) <= count, len(_dices._HANDS)
+
+
+@then("the hand {d1:d} {d2:d} {d3:d} {d4:d} {d5:d} is equal to a hand built before")
+def equal_hand(context, d1: int, d2: int, d3: int, d4: int, d5: int):
+    hand = on_the_track(d1, d2, d3, d4, d5)
+    assert hand == context.first_hand
+    assert hash(hand) == hash(context.first_hand)
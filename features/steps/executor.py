@@ -0,0 +1,73 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from uuid import uuid4
+
+from behave import given, then, when
+
+from yahtzee.commands import AddPlayer
+from yahtzee.executor import CommandExecutor
+from yahtzee.result import Ok
+
+
+@given("an executor of {workers:d} workers running commands slowly")
+def create_executor(context, workers: int):
+    context.ran = defaultdict(list)
+    context.running = set()
+    context.overlaps = []
+    lock = threading.Lock()
+
+    def execute(command):
+        with lock:
+            if command.game in context.running:
+                context.overlaps.append(command)
+            context.running.add(command.game)
+        time.sleep(random.random() / 1000)
+        with lock:
+            context.running.discard(command.game)
+            context.ran[command.game].append(command.name)
+        return Ok(None)
+
+    context.executor = CommandExecutor(workers, execute, burst=4)
+    context.add_cleanup(context.executor.shutdown)
+
+
+@when("{count:d} commands of each of {games:d} games are submitted")
+def submit_commands(context, count: int, games: int):
+    context.submitted = {
+        uuid4(): [f"player-{i}" for i in range(count)] for _ in range(games)
+    }
+    futures = [
+        context.executor.submit(AddPlayer(game, name))
+        for names in zip(*context.submitted.values())
+        for game, name in zip(context.submitted, names)
+    ]
+    for future in futures:
+        future.result()
+
+
+@then("the commands of each game ran in their submission order")
+def check_order(context):
+    assert dict(context.ran) == context.submitted, context.ran
+
+
+@then("no game ran two commands at once")
+def check_overlaps(context):
+    assert not context.overlaps, context.overlaps
+
+
+@when("the executor is shut down")
+def shutdown_executor(context):
+    context.executor.shutdown()
+
+
+@then("a command of a new game is refused")
+def check_refused(context):
+    try:
+        context.executor.submit(AddPlayer(uuid4(), "player"))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("command accepted after shutdown")
+    assert not context.executor._queues
@@ -1,8 +1,17 @@
-from behave import then, when
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from behave import given, then, when
 
 import yahtzee.commands as cmds
-from yahtzee.app import execute, views
+from yahtzee import app
+from yahtzee.admission import Admission, Limit
+from yahtzee.app import execute, history, set_admission, view_json, views
 from yahtzee.events import ErrorRaised
+from yahtzee.game.board import GameStatus
+from yahtzee.idempotency import RecentResults
 
 
 @when("{player_name} rolls the dices")
@@ -11,6 +20,98 @@ def roll_dices(context, player_name: str):
     execute(cmd)
 
 
+@when("{player_name} rolls the dices for the request {request_id}")
+def roll_dices_request(context, player_name: str, request_id: str):
+    cmd = cmds.RollDices(context.game_uuid, player_name, request_id=request_id)
+    context.result = execute(cmd)
+
+
+@when(
+    "{player_name} rolls the dices {copies:d} times at once for the request {request_id}"
+)
+def roll_dices_at_once(context, player_name: str, copies: int, request_id: str):
+    # the game is read slowly, so that every copy is sent while the first runs
+    started = threading.Barrier(copies)
+    get_game = app.get_game
+
+    def slow_get_game(uuid):
+        time.sleep(0.05)
+        return get_game(uuid)
+
+    def roll():
+        started.wait()
+        cmd = cmds.RollDices(context.game_uuid, player_name, request_id=request_id)
+        return execute(cmd)
+
+    context.add_cleanup(setattr, app, "get_game", get_game)
+    app.get_game = slow_get_game
+    with ThreadPoolExecutor(copies) as pool:
+        results = [pool.submit(roll) for _ in range(copies)]
+    assert all(result.result().is_ok() for result in results)
+
+
+@given("the results of the commands kept for {games:d} game")
+def results_kept(context, games: int):
+    context.add_cleanup(setattr, app, "_results", app._results)
+    app._results = RecentResults(max_games=games)
+
+
+@when(
+    "a game is created for the request {other_request_id}"
+    " while {player_name}'s roll for the request {request_id} runs and is retried"
+)
+def roll_dices_evicted(
+    context, player_name: str, request_id: str, other_request_id: str
+):
+    # the first roll reads the game until the game creation evicted it
+    reading, evicted = threading.Event(), threading.Event()
+    get_game = app.get_game
+
+    def blocked_get_game(uuid):
+        reading.set()
+        evicted.wait(5)
+        return get_game(uuid)
+
+    results: dict[str, object] = {}
+
+    def roll(name: str):
+        cmd = cmds.RollDices(context.game_uuid, player_name, request_id=request_id)
+        results[name] = execute(cmd)
+
+    context.add_cleanup(setattr, app, "get_game", get_game)
+    app.get_game = blocked_get_game
+    first = threading.Thread(target=roll, args=("first",), daemon=True)
+    first.start()
+    assert reading.wait(5), "The roll did not run"
+    # a copy blocked forever would hang the run: it is a daemon thread
+    retried = threading.Thread(target=roll, args=("retried",), daemon=True)
+    retried.start()
+    time.sleep(0.05)
+    execute(cmds.CreateGame(request_id=other_request_id))
+    evicted.set()
+    first.join(5)
+    retried.join(5)
+    context.results = results
+
+
+@then("the retried roll got the result of the roll")
+def retried_result(context):
+    results = context.results
+    assert "retried" in results, "The retried roll is still waiting"
+    assert results["retried"] is results["first"], results
+
+
+@then("{player_name} can not roll the dices for the request {request_id}")
+def roll_dices_bad_request(context, player_name: str, request_id: str):
+    try:
+        cmds.RollDices(
+            context.game_uuid, player_name, request_id=json.loads(request_id)
+        )
+    except TypeError:
+        return
+    raise AssertionError(f"Request id {request_id} accepted")
+
+
 @when("{player_name} rerolls the dices")
 def reroll_dices(context, player_name: str):
     context.old_dices = views(context.game_uuid).dices
@@ -64,6 +165,7 @@ def check_turn(context, player_name: str):
 
 
 @then('An error said "{error_msg}"')
+@then('an error said "{error_msg}"')
 def error_raised(context, error_msg: str):
     logs = views(context.game_uuid).logs
     # We just search the error has been raised in the 10 last events
@@ -113,3 +215,72 @@ def dices_may_have_different_value(context, dices: str):
 def game_is_over(context):
     game_state = views(context.game_uuid).state
     assert game_state == "over", f"The game is not over but {game_state}"
+
+
+@then(
+    "{player_name} has a hint for {categories:d} categories with {rolls:d} rolls left"
+)
+def check_hint(context, player_name: str, categories: int, rolls: int):
+    assert views(context.game_uuid).current_player["name"] == player_name
+    hint = views(context.game_uuid).hint
+    assert len(hint["categories"]) == categories, hint["categories"]
+    assert hint["rolls_left"] == rolls, hint["rolls_left"]
+    assert hint["keeps"], "No dices to keep"
+
+
+@then("after round {round_number:d} each player scored {lines:d} line")
+@then("after round {round_number:d} each player scored {lines:d} lines")
+def scored_after_round(context, round_number: int, lines: int):
+    board = history(context.game_uuid).after_round(round_number)
+    for player in board.players:
+        scored = sum(line.is_scored for line in player.scorecard if not line.is_bonus)
+        assert scored == lines, f"{player.name} scored {scored} lines"
+
+
+@then("after round {round_number:d} the game is over")
+def over_after_round(context, round_number: int):
+    board = history(context.game_uuid).after_round(round_number)
+    assert board.status == GameStatus.OVER, f"The game is {board.status}"
+
+
+@given("the dices were polled")
+def poll_dices(context):
+    context.polled_version, _ = view_json(context.game_uuid, "dices")
+
+
+@then("the dices are unchanged since the last poll")
+def dices_unchanged(context):
+    version, dices = view_json(context.game_uuid, "dices", since=context.polled_version)
+    assert dices is None, f"Dices sent again at version {version}"
+
+
+@then("the dices changed since the last poll")
+def dices_changed(context):
+    version, dices = view_json(context.game_uuid, "dices", since=context.polled_version)
+    assert version > context.polled_version, f"Still at version {version}"
+    assert json.loads(dices) == views(context.game_uuid).dices
+
+
+@then("{player_name} rolled the dices once")
+def rolled_once(context, player_name: str):
+    turn = history(context.game_uuid).board.round.player_turn
+    assert turn.player.name == player_name, f"{turn.player.name} is playing"
+    assert (
+        turn.attempted_rolls == 1
+    ), f"{player_name} rolled {turn.attempted_rolls} times"
+
+
+@when("the commands are no longer limited")
+def no_limit(context):
+    set_admission(None)
+
+
+@then("the last request succeeded")
+def last_request_succeeded(context):
+    assert context.result.is_ok(), context.result.err()
+
+
+@given("a player may send {burst:d} command in a row")
+@given("a player may send {burst:d} commands in a row")
+def limit_players(context, burst: int):
+    set_admission(Admission(player_limit=Limit(rate=0.1, burst=burst)))
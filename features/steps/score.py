@@ -24,6 +24,19 @@ def player_scored(context, player_name: str, points: int, category: str):
     commit(game)
 
 
+@given(
+    "{player_name} rolled {first:d}, {second:d}, {third:d}, {fourth:d} and {fifth:d}"
+)
+def player_rolled(context, player_name: str, *_, **values: int):
+    game = get_game(context.game_uuid)
+    game.append(events.RollPerformed(game.uuid, 1))
+    for number, value in enumerate(values.values(), start=1):
+        game.append(
+            events.DicePositionChanged(game.uuid, number, "on_the_track", value)
+        )
+    commit(game)
+
+
 @then("{player_name} score is equal to {score:d}")
 def assert_score(context, player_name: str, score: int):
     game = get_game(context.game_uuid)
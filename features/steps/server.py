@@ -0,0 +1,197 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from behave import given, then, when
+
+from yahtzee import app
+from yahtzee import commands as cmds
+from yahtzee import protocol as proto
+from yahtzee.app import events, execute
+from yahtzee.client import ClientPool
+from yahtzee.result import Err, Ok
+from yahtzee.server import DEFAULT_MAX_IN_FLIGHT, GameServer
+
+
+def run(context, coroutine, timeout: float = 5):
+    """Run a coroutine on the loop of the game server"""
+    return asyncio.run_coroutine_threadsafe(coroutine, context.loop).result(timeout)
+
+
+@given("a game server")
+@given("a game server reading {max_in_flight:d} request ahead")
+def game_server(context, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+    context.loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=context.loop.run_forever, daemon=True)
+    thread.start()
+    context.add_cleanup(thread.join)
+    context.add_cleanup(context.loop.call_soon_threadsafe, context.loop.stop)
+
+    directory = tempfile.TemporaryDirectory()
+    context.add_cleanup(directory.cleanup)
+    path = context.path = str(Path(directory.name) / "yahtzee.sock")
+    context.server = GameServer(max_in_flight)
+    run(context, context.server.start_unix(path))
+    context.add_cleanup(run, context, context.server.shutdown())
+
+    async def open_client() -> ClientPool:
+        client = ClientPool(path=path, size=2)
+        await client.open()
+        return client
+
+    context.client = run(context, open_client())
+    context.add_cleanup(run, context, context.client.close())
+
+
+@given("a subscriber of the game on the game server")
+def subscribe_on_server(context):
+    context.deltas = run(context, context.client.subscribe(context.game_uuid))
+
+
+@then("the subscriber on the game server is pushed a roll of the dices")
+def pushed_roll_on_server(context):
+    deltas = run(context, context.deltas.get())
+    assert [delta["kind"] for delta in deltas] == ["roll", "dices"], deltas
+    assert len(deltas[1]["data"]) == 5, deltas[1]
+
+
+@when("the subscriber on the game server unsubscribes")
+def unsubscribe_on_server(context):
+    run(context, context.deltas.close())
+
+
+@then("the game server has no subscriber")
+def no_subscriber(context):
+    # the subscriber of the game in the background is left
+    assert len(app._subscriptions) == 1, f"{len(app._subscriptions)} subscribers"
+
+
+@then("every command is decoded from its encoding")
+def commands_decoded(context):
+    game = uuid4()
+    commands = [
+        cmds.CreateGame(rules="standard", request_id="r1"),
+        cmds.AddPlayer(game, "Bob"),
+        cmds.StartGame(game, request_id="r2"),
+        cmds.EndGame(game),
+        cmds.RollDices(game, "Bob", request_id="r3"),
+        cmds.Score(game, "Bob", "Chance"),
+        cmds.KeepDice(game, "Bob", 5),
+    ]
+    assert {type(command) for command in commands} == set(proto.COMMANDS.values())
+    for command in commands:
+        data = json.loads(proto.to_json(proto.command_to_dict(command)))
+        decoded = proto.command_from_dict(data)
+        assert decoded == command, decoded
+        assert decoded.request_id == command.request_id, decoded
+
+
+@then("the results are decoded from their encoding")
+def results_decoded(context):
+    for result in (Ok({"uuid": "..."}), Ok(), Err("Bob, you already scored Aces")):
+        data = json.loads(proto.to_json(proto.result_to_dict(result)))
+        decoded = proto.result_from_dict(data)
+        assert type(decoded) is type(result), decoded
+        if result.is_ok():
+            assert decoded.unwrap() == result.unwrap(), decoded.unwrap()
+        else:
+            assert decoded.err() == result.err(), decoded.err()
+
+
+@when("the request {request} is sent")
+def send_request(context, request: str):
+    context.length = events().length(context.game_uuid)
+    message = json.loads(request.replace("{game}", str(context.game_uuid)))
+    context.response = run(context, context.client.request(message))
+
+
+@then("the request is refused as invalid")
+def request_refused(context):
+    response = context.response
+    assert not response["ok"], response
+    assert response["error"].startswith("Invalid request: "), response
+    assert events().length(context.game_uuid) == context.length
+
+
+@then("the connection answers the next requests")
+def connection_answers(context):
+    players = run(context, context.client.view(context.game_uuid, "players"))
+    assert players == [], players
+
+
+@given("the commands of the game run slowly")
+def slow_commands(context):
+    get_game = app.get_game
+    slow_game = context.game_uuid
+
+    def slow_get_game(uuid):
+        if uuid == slow_game:
+            time.sleep(0.2)
+        return get_game(uuid)
+
+    context.add_cleanup(setattr, app, "get_game", get_game)
+    app.get_game = slow_get_game
+    context.other_game = execute(cmds.CreateGame()).unwrap()["uuid"]
+
+
+@then("a view of another game is answered while a command of the game runs")
+def view_answered_first(context):
+    async def command_then_view():
+        command = cmds.AddPlayer(context.game_uuid, "Bob")
+        running = asyncio.create_task(context.client.execute(command))
+        await asyncio.sleep(0.01)
+        await context.client.view(context.other_game, "players")
+        assert not running.done(), "The view waited for the command"
+        assert (await running).is_ok()
+
+    run(context, command_then_view())
+
+
+@then("a view of another game pipelined after a command of the game is answered first")
+def pipelined_view_answered_first(context):
+    async def command_then_view() -> list:
+        reader, writer = await asyncio.open_unix_connection(context.path)
+        command = cmds.AddPlayer(context.game_uuid, "Bob")
+        requests = [
+            {"id": 1, "command": proto.command_to_dict(command)},
+            {"id": 2, "view": "players", "game": str(context.other_game)},
+        ]
+        writer.write(b"".join(map(proto.encode, requests)))
+        await writer.drain()
+        responses = [await proto.read_message(reader) for _ in requests]
+        writer.close()
+        return responses
+
+    responses = run(context, command_then_view())
+    assert [response["id"] for response in responses] == [2, 1], responses
+    assert all(response["ok"] for response in responses), responses
+
+
+@when("a client sends {count:d} requests and leaves without reading the responses")
+def client_leaves(context, count: int):
+    async def send_and_leave():
+        reader, writer = await asyncio.open_unix_connection(context.path)
+        request = {"view": "players", "game": str(context.game_uuid)}
+        writer.write(b"".join(proto.encode(request) for _ in range(count)))
+        await writer.drain()
+        writer.transport.abort()
+
+    run(context, send_and_leave())
+
+
+@then("the server has no connection left")
+def no_connection_left(context):
+    async def connections() -> int:
+        for _ in range(100):
+            # the connection of the client pool is left
+            if len(context.server._connections) <= 2:
+                break
+            await asyncio.sleep(0.01)
+        return len(context.server._connections)
+
+    left = run(context, connections())
+    assert left <= 2, f"{left} connections left"
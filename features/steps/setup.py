@@ -1,7 +1,18 @@
 from behave import given, then, when
 
 from yahtzee.app import execute, views
-from yahtzee.commands import AddPlayer, StartGame
+from yahtzee.commands import AddPlayer, CreateGame, StartGame
+
+
+@given("a game with the {rules} rules")
+def create_game_with_rules(context, rules: str):
+    context.game_uuid = execute(CreateGame(rules=rules)).unwrap()["uuid"]
+
+
+@then("a game with the {rules} rules can not be created")
+def game_cannot_be_created(context, rules: str):
+    result = execute(CreateGame(rules=rules))
+    assert result.is_err(), f"A game was created with the {rules} rules"
 
 
 @given("a player named {name}")
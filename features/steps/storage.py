@@ -0,0 +1,548 @@
+import io
+import pickle
+import struct
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from uuid import uuid4
+
+from behave import given, then, when
+
+from yahtzee import app, statistics
+from yahtzee.app import events
+from yahtzee.archive import ArchivingEventsStore, ColdStorage
+from yahtzee.columnar import FormatError, export_events, import_events
+from yahtzee.commands import AddPlayer, RollDices, Score, StartGame
+from yahtzee.diagnostics import deep_size, play_games
+from yahtzee.game import events as evt
+from yahtzee.game.events import GameEnded, PointsScored, event_bus
+from yahtzee.game.score import Category
+from yahtzee.packing import PackedEventsStore
+from yahtzee.replication import FeedServer, Replica
+from yahtzee.repository import InMemoryEventsStore
+from yahtzee.statistics import Statistics
+from yahtzee.writebehind import WriteBehindEventsStore, journal_segments
+
+
+def _directory(context) -> Path:
+    if "directory" not in context:
+        directory = tempfile.TemporaryDirectory()
+        context.add_cleanup(directory.cleanup)
+        context.directory = Path(directory.name)
+    return context.directory
+
+
+@given("{games:d} finished games of {players:d} players")
+@when("{games:d} more game of {players:d} players is finished")
+def finished_games(context, games: int, players: int):
+    play_games(games, players)
+
+
+@given("a replica caught up with the change feed")
+def caught_up_replica(context):
+    feed = FeedServer(events(), str(_directory(context) / "feed.sock"))
+    feed.start()
+    context.add_cleanup(feed.close)
+    context.feed = feed
+    start_replica(context)
+    context.replica.catch_up()
+
+
+def start_replica(context):
+    checkpoint = _directory(context) / "replica.checkpoint"
+    context.replica = Replica(context.feed.address, checkpoint)
+    context.add_cleanup(context.replica.close)
+
+
+@when("the replica is restarted")
+def restart_replica(context):
+    position = context.replica.position
+    context.replica.close()
+    start_replica(context)
+    restarted = context.replica.position
+    assert restarted == position, f"Restarted at {restarted} instead of {position}"
+
+
+@when("the replica catches up with the change feed")
+def replica_catches_up(context):
+    context.replica.catch_up()
+
+
+@then("the replica has the events of every game")
+def replica_has_every_game(context):
+    store = events()
+    replicated = context.replica.store
+    assert sorted(replicated.games()) == sorted(store.games())
+    for uuid in store.games():
+        assert replicated.get_game_events(uuid) == store.get_game_events(uuid), uuid
+    assert context.replica.position == store.head()
+
+
+@when("the finished games are archived")
+def archive_finished_games(context):
+    hot = events()
+    context.hot_bytes = deep_size(hot)
+    context.archived = {
+        uuid: hot.get_game_events(uuid)
+        for uuid in hot.games()
+        if any(isinstance(event, GameEnded) for event in hot.get_game_events(uuid))
+    }
+    context.archive = ArchivingEventsStore(hot, ColdStorage(_directory(context)))
+    for uuid in context.archived:
+        context.archive.archive(uuid)
+
+
+@when("the finished games are archived by a new archiving store")
+def archive_finished_games_on_start(context):
+    hot = events()
+    context.hot_bytes = deep_size(hot)
+    context.archived = {
+        uuid: hot.get_game_events(uuid)
+        for uuid in hot.games()
+        if any(isinstance(event, GameEnded) for event in hot.get_game_events(uuid))
+    }
+    context.archive = ArchivingEventsStore(hot, ColdStorage(_directory(context)))
+    archived = context.archive.archive_finished()
+    assert archived == len(context.archived), f"{archived} games archived"
+
+
+@when("the statistics are backfilled from the archiving store in batches of {size:d}")
+def backfill_statistics_from_archive(context, size: int):
+    context.add_cleanup(
+        setattr, statistics, "BACKFILL_BATCH_SIZE", statistics.BACKFILL_BATCH_SIZE
+    )
+    statistics.BACKFILL_BATCH_SIZE = size
+    context.statistics = Statistics()
+    context.statistics.backfill(context.archive)
+
+
+@then("the hot store is less than a tenth of its size")
+def hot_store_shrunk(context):
+    size = deep_size(events())
+    assert size * 10 < context.hot_bytes, f"{context.hot_bytes} -> {size} bytes"
+
+
+@then("the archived games can be read again")
+def archived_games_read(context):
+    assert context.archived, "No game archived"
+    for uuid, game_events in context.archived.items():
+        assert context.archive.get_game_events(uuid) == game_events, uuid
+        assert context.archive.length(uuid) == len(game_events), uuid
+
+
+@when("a pickled game is archived")
+def archive_pickled_game(context):
+    payload = pickle.dumps(([], []))
+    context.pickled = uuid4()
+    segment = sorted(_directory(context).glob("segment-*.seg"))[-1]
+    with segment.open("ab") as f:
+        f.write(struct.pack(">16sIIQQ", context.pickled.bytes, 0, len(payload), 0, 0))
+        f.write(payload)
+
+
+@then("the pickled game can not be read")
+def pickled_game_not_read(context):
+    storage = ColdStorage(_directory(context))
+    try:
+        storage.read(context.pickled)
+    except FormatError:
+        pass
+    else:
+        raise AssertionError("The pickled game was loaded")
+
+
+@given("the statistics backfilled from the change feed")
+def backfilled_statistics(context):
+    context.statistics = Statistics()
+    context.statistics.backfill(events())
+
+
+@given("the statistics attached to the bus")
+def attached_statistics(context):
+    handlers = {
+        kind: list(event_bus._handlers[kind]) for kind in (PointsScored, GameEnded)
+    }
+    context.add_cleanup(event_bus._handlers.update, handlers)
+    context.statistics = Statistics()
+    context.statistics.attach(event_bus)
+
+
+@when("the statistics are restarted from their checkpoint")
+def restart_statistics(context):
+    checkpoint = _directory(context) / "statistics.checkpoint"
+    context.statistics.save(checkpoint)
+    context.statistics = Statistics.load(checkpoint)
+
+
+@when("the statistics are backfilled from the change feed")
+def backfill_statistics(context):
+    context.statistics.backfill(events())
+
+
+@then("each player played {games:d} games")
+def games_per_player(context, games: int):
+    for player, stats in context.statistics.players.items():
+        assert stats.count == games, f"{player} played {stats.count} games"
+
+
+@when("{threads:d} threads each finish {games:d} games of {players:d} players")
+def finish_games_in_threads(context, threads: int, games: int, players: int):
+    # switch threads often, for them to update the statistics at the same time
+    context.add_cleanup(sys.setswitchinterval, sys.getswitchinterval())
+    sys.setswitchinterval(1e-6)
+    with ThreadPoolExecutor(threads) as pool:
+        for future in [pool.submit(play_games, games, players) for _ in range(threads)]:
+            future.result()
+
+
+@then("the statistics counted {scores:d} scores")
+def scores_counted(context, scores: int):
+    histograms = context.statistics.categories.values()
+    counted = sum(sum(histogram.counts) for histogram in histograms)
+    assert counted == scores, f"{counted} scores counted"
+
+
+@when("Bob's score could not be stored")
+def score_not_stored(context):
+    uuid = context.game_uuid
+    for command in (AddPlayer(uuid, "Bob"), StartGame(uuid), RollDices(uuid, "Bob")):
+        app.execute(command).unwrap()
+    store = events()
+
+    def failing_write(uuid, events):
+        raise OSError("Disk full")
+
+    store.add_events = failing_write
+    context.add_cleanup(delattr, store, "add_events")
+    try:
+        app.execute(Score(uuid, "Bob", "Chance"))
+    except OSError:
+        return
+    raise AssertionError("The score was stored")
+
+
+@when("Bob scores {bonuses:d} Yahtzee bonuses")
+def yahtzee_bonuses(context, bonuses: int):
+    for bonus in range(1, bonuses + 1):
+        context.statistics.apply(
+            evt.PointsScored(context.game_uuid, "Bob", "Yahtzee Bonus", 100 * bonus)
+        )
+
+
+@then("the statistics counted {count:d} Yahtzee bonuses of {points:d} points")
+def bonuses_counted(context, count: int, points: int):
+    histogram = context.statistics.categories[Category.YAHTZEE_BONUS]
+    counted = dict(histogram.bins)
+    bin_start = min(points // histogram.width, len(histogram.counts) - 1)
+    assert counted[bin_start * histogram.width] == count, histogram.counts
+    assert sum(histogram.counts) == count, histogram.counts
+
+
+@given("statistics keeping the scorecards of {games:d} games")
+def statistics_keeping_games(context, games: int):
+    context.statistics = Statistics(max_live_games=games)
+
+
+@when("Bob scores in {games:d} games which are not over")
+def scores_in_games(context, games: int):
+    context.games = [uuid4() for _ in range(games)]
+    for uuid in context.games:
+        context.statistics.apply(evt.PointsScored(uuid, "Bob", "Chance", 20))
+
+
+@then("the statistics keep the scorecards of the last {games:d} games")
+def live_games_kept(context, games: int):
+    live = list(context.statistics._live)
+    assert live == context.games[-games:], live
+
+
+@then("the statistics can not be backfilled")
+def statistics_not_backfilled(context):
+    try:
+        context.statistics.backfill(events())
+    except RuntimeError:
+        return
+    raise AssertionError("Statistics attached to the bus were backfilled")
+
+
+@when("the games are exported")
+def export_games(context):
+    context.export = io.BytesIO()
+    context.exported = export_events(events(), context.export)
+
+
+@then("the export can be imported in a new store")
+def import_export(context):
+    context.imported = InMemoryEventsStore()
+    context.export.seek(0)
+    assert import_events(context.imported, [context.export]) == context.exported
+    store = events()
+    assert sorted(context.imported.games()) == sorted(store.games())
+    for uuid in store.games():
+        assert context.imported.get_game_events(uuid) == store.get_game_events(uuid)
+
+
+@then("the export can not be imported twice")
+def import_export_twice(context):
+    context.export.seek(0)
+    try:
+        import_events(context.imported, [context.export])
+    except FormatError:
+        pass
+    else:
+        raise AssertionError("The export was imported twice")
+    head = context.imported.head()
+    assert head == context.exported, f"{head} events imported"
+
+
+def start_write_behind(context):
+    context.behind = WriteBehindEventsStore(
+        context.wrapped, _directory(context) / "journal", max_delay=3600
+    )
+    context.add_cleanup(context.behind.close)
+
+
+@given("a journaled write-behind store")
+def journaled_write_behind(context):
+    context.wrapped = InMemoryEventsStore()
+    context.written = {}
+    start_write_behind(context)
+
+
+@given("a wrapped store failing its next write")
+def failing_wrapped_store(context):
+    add_many = context.wrapped.add_many
+
+    def fail_once(events_by_game):
+        context.wrapped.add_many = add_many
+        raise OSError("Store unavailable")
+
+    context.wrapped.add_many = fail_once
+
+
+@given("a wrapped store failing its next write before its last game")
+def failing_wrapped_store_before_last(context):
+    add_many = context.wrapped.add_many
+
+    def fail_before_last(events_by_game):
+        context.wrapped.add_many = add_many
+        games = list(events_by_game)
+        add_many({uuid: events_by_game[uuid] for uuid in games[:-1]})
+        raise OSError("Store unavailable")
+
+    context.wrapped.add_many = fail_before_last
+
+
+@when("the {half} half of the games is written behind")
+def write_behind(context, half: str):
+    store = events()
+    for uuid in store.games():
+        game_events = store.get_game_events(uuid)
+        middle = len(game_events) // 2
+        part = game_events[:middle] if half == "first" else game_events[middle:]
+        context.behind.add_events(uuid, part)
+        context.written.setdefault(uuid, []).extend(part)
+
+
+@when("the write-behind store crashes after a group commit")
+def crash_after_group_commit(context):
+    journal = context.behind._journal
+    truncate = journal.truncate
+    journal.truncate = lambda until: None
+    context.behind.flush()
+    journal.truncate = truncate
+
+
+@when("the write-behind store crashes")
+def crash(context):
+    behind = context.behind
+    with behind._lock:
+        behind._closed = True
+        behind._lock.notify_all()
+    behind._flusher.join()
+    behind._journal.close()
+
+
+@when("the write-behind store is restarted")
+def restart_write_behind(context):
+    start_write_behind(context)
+
+
+@when("a pickled record is journaled")
+def journal_pickled_record(context):
+    payload = pickle.dumps((uuid4(), 0, []))
+    segment = journal_segments(_directory(context) / "journal")[-1]
+    with segment.open("ab") as f:
+        f.write(struct.pack(">I", len(payload)) + payload)
+
+
+@then("the write-behind store can not be restarted")
+def write_behind_not_restarted(context):
+    try:
+        start_write_behind(context)
+    except FormatError:
+        pass
+    else:
+        raise AssertionError("The pickled record was loaded")
+
+
+@then("a group commit fails")
+def group_commit_fails(context):
+    try:
+        context.behind.flush()
+    except OSError:
+        pass
+    else:
+        raise AssertionError("The group commit did not fail")
+    assert context.behind.metrics.failed_flushes == 1
+
+
+@when("a group commit is written")
+def group_commit(context):
+    context.behind.flush()
+
+
+@then("the write-behind store reads the written events")
+def write_behind_reads(context):
+    for uuid, game_events in context.written.items():
+        assert context.behind.get_game_events(uuid) == game_events, uuid
+        assert context.behind.length(uuid) == len(game_events), uuid
+
+
+@then("the wrapped store has the events of every game")
+def wrapped_store_has_every_game(context):
+    store = events()
+    assert sorted(context.wrapped.games()) == sorted(store.games())
+    for uuid in store.games():
+        stored = context.wrapped.get_game_events(uuid)
+        assert stored == store.get_game_events(uuid), uuid
+    head = context.wrapped.head()
+    assert head == store.head(), f"{head} events written, {store.head()} played"
+
+
+@then("the journal only has its current segment")
+def journal_truncated(context):
+    segments = journal_segments(_directory(context) / "journal")
+    assert len(segments) == 1, segments
+
+
+@given("board histories kept for {count:d} game")
+def histories_kept(context, count: int):
+    context.add_cleanup(setattr, app, "MAX_HISTORIES", app.MAX_HISTORIES)
+    app.MAX_HISTORIES = count
+
+
+@when("the history of every game is read")
+def read_histories(context):
+    context.read = list(events().games())
+    for uuid in context.read:
+        app.history(uuid)
+
+
+@when("the history of every game is read by {threads:d} threads at once")
+def read_histories_at_once(context, threads: int):
+    started = threading.Barrier(threads)
+
+    def read(uuid):
+        started.wait()
+        return app.history(uuid)
+
+    # switch threads often, for them to catch up at the same time
+    context.add_cleanup(sys.setswitchinterval, sys.getswitchinterval())
+    sys.setswitchinterval(1e-6)
+    with ThreadPoolExecutor(threads) as pool:
+        for uuid in events().games():
+            list(pool.map(read, [uuid] * threads))
+
+
+@then("the board history of every game has the events of the game")
+def histories_have_every_event(context):
+    for uuid in events().games():
+        history = app._histories[uuid]
+        assert list(history.events) == events().get_game_events(uuid), uuid
+
+
+@then("the board history of the last game read is kept alone")
+def last_history_kept(context):
+    assert list(app._histories) == context.read[-1:], list(app._histories)
+
+
+@given("the games are packed")
+@when("the games are packed")
+def pack_games(context):
+    context.packed = PackedEventsStore()
+    for change in events().changes():
+        context.packed.add_events(change.game, [change.event])
+
+
+@then("the packed store has the events of every game")
+def packed_store_has_every_game(context):
+    store = events()
+    assert sorted(context.packed.games()) == sorted(store.games())
+    for uuid in store.games():
+        packed = context.packed.get_game_events(uuid)
+        assert len(packed) == context.packed.length(uuid) == store.length(uuid)
+        assert list(packed) == store.get_game_events(uuid), uuid
+    assert list(context.packed.changes()) == list(store.changes())
+
+
+@when("a game of {players:d} players is packed")
+def pack_game_of_many_players(context, players: int):
+    game = uuid4()
+    names = [f"player-{i}" for i in range(players)]
+    last = names[-1]
+    context.game_events = [
+        evt.GameCreated(game),
+        *(evt.PlayerAdded(game, name) for name in names),
+        evt.GameStarted(game),
+        evt.TurnChanged(game, last, 1),
+        evt.PointsScored(game, last, "Yahtzee", 50),
+        # the cumulated Yahtzee bonus
+        evt.PointsScored(game, last, "Yahtzee Bonus", 300),
+        evt.PointsScored(game, names[0], "Chance", 30),
+        # a player not added is inlined by name
+        evt.PointsScored(game, "stranger", "Aces", 5),
+        evt.TurnChanged(game, "stranger", 300),
+        evt.GameEnded(game),
+    ]
+    # decoded from its bytes, not from the events kept hot
+    context.packed = PackedEventsStore(hot_games=0)
+    context.packed.add_events(game, context.game_events[:2])
+    context.packed.add_events(game, context.game_events[2:])
+    context.game = game
+
+
+@then("the packed store has the events of the game of many players")
+def packed_store_has_game(context):
+    packed = context.packed.get_game_events(context.game)
+    assert list(packed) == context.game_events
+    changes = [change.event for change in context.packed.changes()]
+    assert changes == context.game_events
+
+
+@when("the first finished game is deleted from the packed store")
+def delete_packed_game(context):
+    context.deleted = next(
+        change.game
+        for change in events().changes()
+        if isinstance(change.event, GameEnded)
+    )
+    context.packed.delete_events(context.deleted)
+
+
+@then(
+    "the packed change feed read by batches of {limit:d} has the events of the other games"
+)
+def packed_feed_skips_deleted(context, limit: int):
+    changes = []
+    position = 0
+    while batch := context.packed.changes(position, limit):
+        assert len(batch) <= limit, f"{len(batch)} changes read"
+        changes.extend(batch)
+        position = batch[-1].position
+    expected = [
+        change for change in events().changes() if change.game != context.deleted
+    ]
+    assert changes == expected, f"{len(changes)} changes of {len(expected)} read"
@@ -0,0 +1,43 @@
+from behave import given, then, when
+
+from yahtzee import app
+from yahtzee.app import events, execute
+from yahtzee.commands import RollDices
+
+
+@given("a subscriber of the game")
+def subscribe(context):
+    context.subscription = app.subscribe(context.game_uuid)
+    context.subscription.drain()
+
+
+@when("{player_name}'s roll of the dices fails to be stored")
+def roll_not_stored(context, player_name: str):
+    store = events()
+    add_events = store.add_events
+
+    def fail(uuid, game_events):
+        raise OSError("Store unavailable")
+
+    store.add_events = fail
+    try:
+        execute(RollDices(context.game_uuid, player_name))
+    except OSError:
+        pass
+    else:
+        raise AssertionError("The roll was stored")
+    finally:
+        store.add_events = add_events
+
+
+@then("the subscriber is pushed a roll of the dices")
+def pushed_roll(context):
+    deltas = context.subscription.wait(timeout=1)
+    assert [delta.kind for delta in deltas] == ["roll", "dices"], deltas
+    assert len(deltas[1].data) == 5, deltas[1]
+
+
+@then("the subscriber is pushed nothing")
+def pushed_nothing(context):
+    deltas = context.subscription.drain()
+    assert not deltas, [str(delta) for delta in deltas]
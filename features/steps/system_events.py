@@ -0,0 +1,107 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from behave import given, then, when
+
+from yahtzee.app import execute
+from yahtzee.commands import RollDices
+from yahtzee.events import ErrorRaised
+from yahtzee.repository import (
+    SystemEventsCounters,
+    SystemEventsLog,
+    set_system_events_log,
+    system_events,
+)
+
+
+@given("a system events log keeping {retention:d} events per game")
+def log_with_retention(context, retention: int):
+    set_system_events_log(SystemEventsLog(retention=retention))
+
+
+@given("a system events log keeping 1 event every {sample_every:d}")
+def sampled_log(context, sample_every: int):
+    set_system_events_log(SystemEventsLog(sample_every=sample_every))
+
+
+@given("a system events log keeping the events of {games:d} games")
+def log_with_games(context, games: int):
+    set_system_events_log(SystemEventsLog(max_games=games))
+
+
+@when("1 error is raised in {games:d} other games")
+def raise_in_games(context, games: int):
+    context.games = [uuid4() for _ in range(games)]
+    for uuid in context.games:
+        system_events().add(uuid, 0, ErrorRaised(f"error in {uuid}"))
+
+
+@then("the system events of the last {games:d} games are kept")
+def last_games_kept(context, games: int):
+    log = system_events()
+    assert len(log) == games, len(log)
+    for uuid in context.games[-games:]:
+        assert list(log.get(uuid)) == [(0, ErrorRaised(f"error in {uuid}"))]
+        assert log.counters(uuid).raised == 1
+
+
+@then("the first of the games has no system event")
+def first_game_dropped(context):
+    log, uuid = system_events(), context.games[0]
+    assert not log.get(uuid), log.get(uuid)
+    assert log.counters(uuid) == SystemEventsCounters(), log.counters(uuid)
+
+
+@when("{count:d} errors are raised in the game")
+def raise_errors(context, count: int):
+    for number in range(1, count + 1):
+        system_events().add(context.game_uuid, 1, ErrorRaised(f"error {number}"))
+
+
+@when("{threads:d} threads each raise {count:d} errors in the game")
+def raise_errors_by_threads(context, threads: int, count: int):
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(threads) as pool:
+            raised = [pool.submit(raise_errors, context, count) for _ in range(threads)]
+        for result in raised:
+            result.result()
+    finally:
+        sys.setswitchinterval(interval)
+
+
+@when("Bob rolls the dices of the game not started")
+def roll_not_started(context):
+    context.result = execute(RollDices(context.game_uuid, "Bob"))
+    assert context.result.is_err()
+
+
+@then("the errors {numbers} are logged")
+def errors_logged(context, numbers: str):
+    expected = [f"error {number.strip()}" for number in numbers.split(",")]
+    logged = [event.msg for _, event in system_events().get(context.game_uuid)]
+    assert logged == expected, logged
+
+
+@then("{count:d} errors are logged")
+def errors_count(context, count: int):
+    logged = system_events().get(context.game_uuid)
+    assert len(logged) == count, len(logged)
+
+
+@then("the rejection of the roll is logged after {offset:d} event")
+def rejection_logged(context, offset: int):
+    logged = list(system_events().get(context.game_uuid))
+    assert logged == [(offset, ErrorRaised(context.result.err()))], logged
+
+
+@then(
+    "the log counted {raised:d} raised, {sampled_out:d} sampled out"
+    " and {evicted:d} evicted"
+)
+def counted(context, raised: int, sampled_out: int, evicted: int):
+    counters = system_events().counters(context.game_uuid)
+    expected = SystemEventsCounters(raised, sampled_out, evicted)
+    assert counters == expected, counters
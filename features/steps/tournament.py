@@ -0,0 +1,55 @@
+from behave import given, then, when
+
+from yahtzee.app import execute, views
+from yahtzee.commands import RollDices, Score
+from yahtzee.game.events import event_bus
+from yahtzee.game.score import Category
+from yahtzee.tournament import Tournaments
+
+MAX_ROUNDS = 10
+
+
+@given(
+    "a tournament of {players:d} players at tables of {table_size:d}, "
+    "{qualified:d} qualifying at each table"
+)
+def create_tournament(context, players: int, table_size: int, qualified: int):
+    context.tournaments = Tournaments()
+    context.tournaments.attach(event_bus)
+    context.add_cleanup(context.tournaments.detach, event_bus)
+    names = [f"player-{i}" for i in range(players)]
+    context.tournament = context.tournaments.create(names, table_size, qualified)
+
+
+def _play(game):
+    categories = [category for category in Category if not category.is_bonus]
+    players = [player["name"] for player in views(game).players]
+    for category in categories:
+        for player in players:
+            execute(RollDices(game, player))
+            execute(Score(game, player, category.value))
+
+
+@when("the rounds of the tournament are played")
+def play_rounds(context):
+    tournament = context.tournaments[context.tournament]
+    while not tournament.is_over and len(tournament.rounds) <= MAX_ROUNDS:
+        for table in tournament.rounds[-1]:
+            _play(table.game)
+        context.tournaments.advance_due()
+
+
+@then("the tournament has a champion after {rounds:d} rounds")
+def champion(context, rounds: int):
+    tournament = context.tournaments[context.tournament]
+    assert tournament.is_over, f"No champion after {len(tournament.rounds)} rounds"
+    assert len(tournament.rounds) == rounds, f"{len(tournament.rounds)} rounds"
+
+
+@then("a tournament without players can not be created")
+def no_players(context):
+    try:
+        Tournaments().create([])
+    except ValueError:
+        return
+    raise AssertionError("A tournament without players was created")
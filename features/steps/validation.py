@@ -0,0 +1,107 @@
+from behave import given, then, when
+
+from yahtzee import app
+from yahtzee.app import events, execute, get_game, views
+from yahtzee.command_handlers import handle
+from yahtzee.commands import (
+    AddPlayer,
+    CreateGame,
+    KeepDice,
+    RollDices,
+    Score,
+    StartGame,
+)
+from yahtzee.game import events as evt
+from yahtzee.game.score import Category
+from yahtzee.validation import Validations
+
+COMBINATIONS = [category.value for category in Category if not category.is_bonus]
+
+
+def check_commands(context):
+    """Compare the rejection of the commands of every player to the handlers"""
+    uuid = context.game_uuid
+    length = events().length(uuid)
+    for player in ("Bob", "Alice", "Zed"):
+        commands = [
+            RollDices(uuid, player),
+            KeepDice(uuid, player, 1),
+            *(Score(uuid, player, combination) for combination in COMBINATIONS),
+        ]
+        for command in commands:
+            rejection = app._validations.reject(command, length)
+            if rejection is None:
+                continue
+            context.rejected += 1
+            result = handle(get_game(uuid), command)
+            if not result.is_err() or result.err() != rejection.err():
+                context.disagreements.append((command, rejection.err(), result))
+
+
+@when(
+    "the game is played to its end, the commands of every player checked at each step"
+)
+def play_checking_commands(context):
+    context.rejected = 0
+    context.disagreements = []
+    uuid = context.game_uuid
+    for turn in range(2 * len(COMBINATIONS)):
+        player = views(uuid).current_player["name"]
+        check_commands(context)
+        execute(RollDices(uuid, player))
+        check_commands(context)
+        if turn % 2:
+            execute(KeepDice(uuid, player, 1))
+            execute(RollDices(uuid, player))
+            execute(RollDices(uuid, player))
+            check_commands(context)
+        execute(Score(uuid, player, COMBINATIONS[turn // 2]))
+    check_commands(context)
+    assert views(uuid).state == "over", views(uuid).state
+
+
+@then("the commands rejected without loading the game were rejected by the handlers")
+def no_disagreement(context):
+    assert context.rejected, "No command rejected without loading the game"
+    assert not context.disagreements, context.disagreements
+
+
+@then("the game has no validation state")
+def no_validation_state(context):
+    assert context.game_uuid not in app._validations
+
+
+@given("validation states kept for {count:d} games")
+def validation_states_kept(context, count: int):
+    context.add_cleanup(setattr, app, "_validations", app._validations)
+    app._validations = Validations(max_games=count)
+
+
+@when("{player_name} rolls the dices in {count:d} new games")
+def roll_in_new_games(context, player_name: str, count: int):
+    context.games = []
+    for _ in range(count):
+        uuid = execute(CreateGame()).unwrap()["uuid"]
+        execute(AddPlayer(uuid, player_name))
+        execute(StartGame(uuid))
+        execute(RollDices(uuid, player_name))
+        context.games.append(uuid)
+
+
+@then("the validation states of the last {count:d} games are kept")
+def last_validation_states_kept(context, count: int):
+    kept = [uuid for uuid in context.games if uuid in app._validations]
+    assert kept == context.games[-count:], kept
+    assert len(app._validations) == count, len(app._validations)
+
+
+@when("the turn is given to {player_name} straight in the store")
+def turn_given_in_store(context, player_name: str):
+    uuid = context.game_uuid
+    events().add_events(uuid, [evt.TurnChanged(uuid, player_name, 1)])
+
+
+@then("{player_name} can roll the dices")
+def can_roll(context, player_name: str):
+    result = execute(RollDices(context.game_uuid, player_name))
+    assert result.is_ok(), result.err()
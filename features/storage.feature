@@ -0,0 +1,128 @@
+Feature: events storage
+	Background: Finished games
+		Given 2 finished games of 2 players
+
+	Scenario: A restarted replica resumes from its checkpoint
+		Given a replica caught up with the change feed
+		When 1 more game of 2 players is finished
+		And the replica is restarted
+		And the replica catches up with the change feed
+		Then the replica has the events of every game
+
+	Scenario: Archiving the finished games shrinks the hot store
+		When the finished games are archived
+		Then the hot store is less than a tenth of its size
+		And the archived games can be read again
+
+	Scenario: An archived game which is not in the columnar format is not loaded
+		When the finished games are archived
+		And a pickled game is archived
+		Then the pickled game can not be read
+		And the archived games can be read again
+
+	Scenario: The games which ended before a restart are archived
+		When the finished games are archived by a new archiving store
+		Then the hot store is less than a tenth of its size
+		And the archived games can be read again
+
+	Scenario: The statistics backfilled from an archiving store count the archived games
+		When the finished games are archived
+		And 1 more game of 2 players is finished
+		And the statistics are backfilled from the archiving store in batches of 7
+		Then each player played 3 games
+
+	Scenario: Restarted statistics do not count the games twice
+		Given the statistics backfilled from the change feed
+		When the statistics are restarted from their checkpoint
+		And 1 more game of 2 players is finished
+		And the statistics are backfilled from the change feed
+		Then each player played 3 games
+
+	Scenario: The statistics fed by the bus from many threads are checkpointed
+		Given the statistics attached to the bus
+		When 4 threads each finish 5 games of 2 players
+		And the statistics are restarted from their checkpoint
+		Then each player played 20 games
+		And the statistics counted 520 scores
+		And the statistics can not be backfilled
+
+	Scenario: Exported games are imported once
+		When the games are exported
+		Then the export can be imported in a new store
+		And the export can not be imported twice
+
+	Scenario: A crash after a group commit does not write its events twice
+		Given a journaled write-behind store
+		When the first half of the games is written behind
+		And the write-behind store crashes after a group commit
+		And the second half of the games is written behind
+		And the write-behind store crashes
+		And the write-behind store is restarted
+		Then the wrapped store has the events of every game
+		And the journal only has its current segment
+
+	Scenario: A journal record which is not in the columnar format is not loaded
+		Given a journaled write-behind store
+		When the first half of the games is written behind
+		And the write-behind store crashes
+		And a pickled record is journaled
+		Then the write-behind store can not be restarted
+
+	Scenario: A failed group commit is written again
+		Given a journaled write-behind store
+		And a wrapped store failing its next write
+		When the first half of the games is written behind
+		Then a group commit fails
+		And the write-behind store reads the written events
+		When the second half of the games is written behind
+		And a group commit is written
+		Then the wrapped store has the events of every game
+		And the journal only has its current segment
+
+	Scenario: A group commit failed before its last game is not written twice
+		Given a journaled write-behind store
+		And a wrapped store failing its next write before its last game
+		When the first half of the games is written behind
+		Then a group commit fails
+		And the write-behind store reads the written events
+		When the second half of the games is written behind
+		And a group commit is written
+		Then the wrapped store has the events of every game
+		And the journal only has its current segment
+
+	Scenario: The board histories of the games last read are kept
+		Given board histories kept for 1 game
+		When the history of every game is read
+		Then the board history of the last game read is kept alone
+
+	Scenario: A board history read by many threads at once indexes each event once
+		When the history of every game is read by 8 threads at once
+		Then the board history of every game has the events of the game
+
+	Scenario: A packed store reads back the events of the games
+		When the games are packed
+		Then the packed store has the events of every game
+
+	Scenario: A packed store reads back the events of a game of many players
+		When a game of 200 players is packed
+		Then the packed store has the events of the game of many players
+
+	Scenario: The change feed of a packed store skips the deleted games
+		Given the games are packed
+		When the first finished game is deleted from the packed store
+		Then the packed change feed read by batches of 5 has the events of the other games
+
+	Scenario: The statistics attached to the bus do not count a command which could not be stored
+		Given the statistics attached to the bus
+		When Bob's score could not be stored
+		Then the statistics counted 0 scores
+
+	Scenario: The statistics count each Yahtzee bonus once
+		Given the statistics backfilled from the change feed
+		When Bob scores 2 Yahtzee bonuses
+		Then the statistics counted 2 Yahtzee bonuses of 100 points
+
+	Scenario: The statistics keep the scorecards of the games last scored in
+		Given statistics keeping the scorecards of 2 games
+		When Bob scores in 3 games which are not over
+		Then the statistics keep the scorecards of the last 2 games
@@ -0,0 +1,29 @@
+Feature: game subscriptions
+	Background: Game started with 2 players and a subscriber
+		Given some players named
+			| name  |
+			| Bob   |
+			| Alice |
+		And the game is started
+		And a subscriber of the game
+
+	Scenario: A subscriber is pushed the deltas of the committed commands
+		When Bob rolls the dices
+		Then the subscriber is pushed a roll of the dices
+
+	Scenario: A subscriber is not pushed the rejected commands
+		When Alice rolls the dices
+		Then the subscriber is pushed nothing
+
+	Scenario: A subscriber is not pushed the events failing to be stored
+		When Bob's roll of the dices fails to be stored
+		Then the subscriber is pushed nothing
+
+	Scenario: A subscriber of the game server is pushed the committed commands
+		Given a game server
+		And a subscriber of the game on the game server
+		When Bob rolls the dices
+		Then the subscriber on the game server is pushed a roll of the dices
+		When the subscriber on the game server unsubscribes
+		And Bob scores the Chance line
+		Then the game server has no subscriber
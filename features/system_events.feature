@@ -0,0 +1,29 @@
+Feature: system events log
+	Scenario: Only the last system events of a game are kept
+		Given a system events log keeping 3 events per game
+		When 5 errors are raised in the game
+		Then the errors 3, 4, 5 are logged
+		And the log counted 5 raised, 0 sampled out and 2 evicted
+
+	Scenario: One system event every few is kept
+		Given a system events log keeping 1 event every 2
+		When 5 errors are raised in the game
+		Then the errors 1, 3, 5 are logged
+		And the log counted 5 raised, 2 sampled out and 0 evicted
+
+	Scenario: The errors raised by rejected commands are logged with the game length
+		When Bob rolls the dices of the game not started
+		Then the rejection of the roll is logged after 1 event
+		And the log counted 1 raised, 0 sampled out and 0 evicted
+
+	Scenario: The errors raised from many threads are all counted
+		Given a system events log keeping 10 events per game
+		When 4 threads each raise 25000 errors in the game
+		Then 10 errors are logged
+		And the log counted 100000 raised, 0 sampled out and 99990 evicted
+
+	Scenario: Only the system events of the games which last raised some are kept
+		Given a system events log keeping the events of 2 games
+		When 1 error is raised in 3 other games
+		Then the system events of the last 2 games are kept
+		And the first of the games has no system event
@@ -0,0 +1,8 @@
+Feature: tournaments
+	Scenario: Each round of a tournament has fewer players until its champion
+		Given a tournament of 5 players at tables of 4, 3 qualifying at each table
+		When the rounds of the tournament are played
+		Then the tournament has a champion after 2 rounds
+
+	Scenario: A tournament needs players
+		Then a tournament without players can not be created
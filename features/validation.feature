@@ -0,0 +1,25 @@
+Feature: fast validation of the commands
+	Background: Game started with 2 players
+		Given some players named
+			| name  |
+			| Bob   |
+			| Alice |
+		And the game is started
+
+	Scenario: The commands rejected without loading the game are rejected by the handlers
+		When the game is played to its end, the commands of every player checked at each step
+		Then the commands rejected without loading the game were rejected by the handlers
+
+	Scenario: The validation state of a game is dropped once the game is over
+		When the last round is played
+		Then the game has no validation state
+
+	Scenario: The validation states of the games last played are kept
+		Given validation states kept for 2 games
+		When Bob rolls the dices in 3 new games
+		Then the validation states of the last 2 games are kept
+
+	Scenario: A game written to the store by another path is not judged on a stale state
+		When Bob rolls the dices
+		And the turn is given to Alice straight in the store
+		Then Alice can roll the dices
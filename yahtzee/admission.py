@@ -0,0 +1,122 @@
+"""Admission control of the game commands.
+
+A token bucket per game, and one per player of a game, refilled at `rate`
+tokens per second up to `burst` tokens. A command takes a token from the
+bucket of its game and of its player; it is rejected when one of them is
+empty. The rejection is made before the game is loaded and is not logged in
+the game, so flooding a game costs a dictionary lookup per command.
+
+    app.set_admission(Admission(game_limit=Limit(rate=50, burst=100)))
+"""
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from uuid import UUID
+
+from .commands import GameCommand, PlayerCommand
+from .result import Err
+
+# buckets of the idle games are dropped past that many buckets
+DEFAULT_MAX_BUCKETS = 100_000
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float  # tokens per second
+    burst: float  # bucket capacity
+
+
+DEFAULT_GAME_LIMIT = Limit(rate=50, burst=100)
+DEFAULT_PLAYER_LIMIT = Limit(rate=20, burst=40)
+
+
+class Throttled(Err[str]):
+    """Rejection of a command over the limits: the same command may be
+    admitted later, so its rejection is not kept as its result
+    """
+
+
+@dataclass
+class AdmissionMetrics:
+    admitted: int = 0
+    rejected_games: int = 0
+    rejected_players: int = 0
+
+    def asdict(self) -> dict:
+        return asdict(self)
+
+
+class Admission:
+    def __init__(
+        self,
+        game_limit: Limit | None = DEFAULT_GAME_LIMIT,
+        player_limit: Limit | None = DEFAULT_PLAYER_LIMIT,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """A None limit does not limit"""
+        self.game_limit = game_limit
+        self.player_limit = player_limit
+        self.metrics = AdmissionMetrics()
+        self._max_buckets = max_buckets
+        self._clock = clock
+        # game or (game, player) -> [tokens, last refill time]
+        self._buckets: dict[UUID | tuple[UUID, str], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self.metrics = AdmissionMetrics()
+
+    def reject(self, command: GameCommand) -> Throttled | None:
+        """Take the tokens of the command, or return its rejection"""
+        now = self._clock()
+        with self._lock:
+            game = player = None
+            if self.game_limit is not None:
+                game = self._refill(command.game, self.game_limit, now)
+                if game[0] < 1:
+                    self.metrics.rejected_games += 1
+                    return Throttled("Too many commands in the game, retry later")
+            if self.player_limit is not None and isinstance(command, PlayerCommand):
+                key = (command.game, command.player)
+                player = self._refill(key, self.player_limit, now)
+                if player[0] < 1:
+                    self.metrics.rejected_players += 1
+                    return Throttled(
+                        f"{command.player}, too many commands, retry later"
+                    )
+            for bucket in (game, player):
+                if bucket is not None:
+                    bucket[0] -= 1
+            self.metrics.admitted += 1
+        return None
+
+    def _refill(
+        self, key: UUID | tuple[UUID, str], limit: Limit, now: float
+    ) -> list[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self._max_buckets:
+                self._drop_idle(now)
+            bucket = self._buckets[key] = [limit.burst, now]
+        else:
+            tokens, last = bucket
+            bucket[0] = min(limit.burst, tokens + (now - last) * limit.rate)
+            bucket[1] = now
+        return bucket
+
+    def _drop_idle(self, now: float) -> None:
+        """Drop the buckets full again: a new bucket is the same"""
+        limits = {True: self.player_limit, False: self.game_limit}
+        for key, (tokens, last) in list(self._buckets.items()):
+            limit = limits[isinstance(key, tuple)]
+            if limit is None or tokens + (now - last) * limit.rate >= limit.burst:
+                del self._buckets[key]
+        if len(self._buckets) >= self._max_buckets:
+            self._buckets.clear()
@@ -1,47 +1,191 @@
-from functools import singledispatch
-from logging import getLogger
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
+from functools import singledispatch, wraps
+from typing import TYPE_CHECKING, TypeVar
 from uuid import UUID
 
+from .admission import Admission, Throttled
 from .command_handlers import handle
-from .commands import Command, CreateGame, GameCommand
+from .commands import AddPlayer, Command, CreateGame, GameCommand, StartGame
 from .events import ErrorRaised
 from .game import Game
-from .repository import InMemoryEventsStore, events, set_events_store
+from .game.events import event_bus
+from .game.history import BoardHistory
+from .idempotency import RecentResults, Reservation
+from .lazy import getLogger
+from .repository import (
+    InMemoryEventsStore,
+    SystemEventsLog,
+    events,
+    set_events_store,
+    set_system_events_log,
+    system_events,
+)
 from .result import Err, Ok, Result
-from .views import GameViews
+from .validation import Validations
+from .viewcache import ViewCache
+
+if TYPE_CHECKING:
+    from .subscriptions import Subscription, Subscriptions
+    from .views import GameViews
 
 logger = getLogger(__name__)
 
+# board histories kept, of the games last read
+MAX_HISTORIES = 1_000
+
+C = TypeVar("C", bound=Command)
+G = TypeVar("G", bound=GameCommand)
+
+_validations = Validations()
+_histories: OrderedDict[UUID, BoardHistory] = OrderedDict()
+_histories_lock = threading.Lock()
+_results = RecentResults()
+_admission: Admission | None = None
+# created by the first subscriber
+_subscriptions: "Subscriptions | None" = None
+_subscriptions_lock = threading.Lock()
+
 
 def bootstrap() -> None:
+    global _subscriptions
     set_events_store(InMemoryEventsStore())
+    set_system_events_log(SystemEventsLog())
+    _validations.clear()
+    with _histories_lock:
+        _histories.clear()
+    _view_cache.clear()
+    _results.clear()
+    set_admission(None)
+    with _subscriptions_lock:
+        _subscriptions = None
+
+
+def set_admission(admission: Admission | None) -> None:
+    """Limit the rate of the game commands, None to stop limiting"""
+    global _admission
+    _admission = admission
 
 
 def get_game(uuid: UUID) -> Game:
     game_events = events().get_game_events(uuid)
-    return Game.from_events(uuid, game_events)
+    game = Game.from_events(uuid, game_events)
+    if uuid not in _validations:
+        _validations.track(uuid, game.events)
+    return game
+
+
+def history(uuid: UUID) -> BoardHistory:
+    """Point in time boards of a game, indexed once and caught up on each call"""
+    game_events = events().get_game_events(uuid)
+    with _histories_lock:
+        game_history = _histories.get(uuid)
+        if game_history is None or len(game_history) > len(game_events):
+            game_history = _histories[uuid] = BoardHistory()
+        _histories.move_to_end(uuid)
+        while len(_histories) > MAX_HISTORIES:
+            _histories.popitem(last=False)
+    game_history.catch_up(game_events)
+    return game_history
+
+
+def views(uuid: UUID) -> "GameViews":
+    from .views import GameViews
+
+    return GameViews(uuid, events(), system_events())
+
+
+def _board_version(uuid: UUID) -> int | None:
+    """Version of the board from the length of the game stream: every event
+    but GameCreated makes a new version
+    """
+    length = events().length(uuid)
+    return length - 1 if length else None
+
+
+_view_cache = ViewCache(views, _board_version)
 
 
-def views(uuid: UUID) -> GameViews:
-    return GameViews(uuid, events())
+def view_json(
+    uuid: UUID, name: str, arguments: Sequence = (), since: int | None = None
+) -> tuple[int, bytes | None]:
+    """Board version and JSON of a game view, None if unchanged `since` a version"""
+    return _view_cache.get(uuid, name, arguments, since)
+
+
+def subscribe(uuid: UUID, on_push: Callable[[], None] | None = None) -> "Subscription":
+    """Deltas of the state of a game, pushed as its events are committed"""
+    global _subscriptions
+    with _subscriptions_lock:
+        if _subscriptions is None:
+            from .subscriptions import Subscriptions
+
+            _subscriptions = Subscriptions()
+        return _subscriptions.subscribe(uuid, on_push=on_push)
+
+
+def unsubscribe(subscription: "Subscription") -> None:
+    if _subscriptions is not None:
+        _subscriptions.unsubscribe(subscription)
+
+
+def _publish(uuid: UUID, game_events: Sequence) -> None:
+    if _subscriptions is not None:
+        _subscriptions.publish(uuid, game_events)
 
 
 def commit(game: Game) -> None:
-    """Save the new events in the game"""
+    """Save the new events in the game, then push them to the subscribers and
+    on the bus: the events of a rejected command are never pushed
+    """
     events().add_events(game.uuid, game.new_events)
+    _validations.apply(game.uuid, game.new_events)
+    _publish(game.uuid, game.new_events)
+    event_bus.push_all(game.new_events)
+
+
+def rollback(uuid: UUID, error: Err) -> None:
+    """Log the error message alone, out of the game stream"""
+    offset = events().length(uuid)
+    system_events().add(uuid, offset, ErrorRaised(error.err()))
+    logger.error(error)
 
 
 def commit_or_rollback(result: Result, game: Game) -> None:
     """Commit all game events according to a command result.
-    If command result is an error, commit the error message alone.
+    If command result is an error, log the error message alone.
     """
     match result:
         case Ok():
             # just save the new events generated by the command
             commit(game)
         case Err():
-            events().add_events(game.uuid, [ErrorRaised(result.err())])
-            logger.error(result)
+            rollback(game.uuid, result)
+
+
+def _idempotent(run: Callable[[C], Result]) -> Callable[[C], Result]:
+    """Return the recent result of a command sent again with its request id"""
+
+    @wraps(run)
+    def _run(command: C, /) -> Result:
+        if command.request_id is None:
+            return run(command)
+        reservation = _results.reserve(command)
+        if not isinstance(reservation, Reservation):
+            return reservation
+        try:
+            result = run(command)
+        except BaseException as error:
+            reservation.release(error)
+            raise
+        if isinstance(result, Throttled):
+            reservation.forget(result)
+        else:
+            reservation.add(result)
+        return result
+
+    return _run
 
 
 @singledispatch
@@ -50,6 +194,7 @@ def execute(command: Command, /) -> Result:
 
 
 @execute.register
+@_idempotent
 def create_game(command: CreateGame, /) -> Result:
     game = Game.new()
     result = handle(game, command)
@@ -57,8 +202,48 @@ def create_game(command: CreateGame, /) -> Result:
     return result
 
 
+def create_games(tables: Iterable[Sequence[str]]) -> list[UUID]:
+    """Create and start a game for each table of players, in one store write.
+    The events are delivered to the bus once all the games are created.
+    """
+    games = []
+    for players in tables:
+        game = Game.new()
+        commands = [
+            CreateGame(),
+            *(AddPlayer(game.uuid, player) for player in players),
+            StartGame(game.uuid),
+        ]
+        for command in commands:
+            handle(game, command).unwrap()
+        games.append(game)
+    events().add_many({game.uuid: game.new_events for game in games})
+    for game in games:
+        _validations.track(game.uuid, game.new_events)
+        _publish(game.uuid, game.new_events)
+    event_bus.push_all([event for game in games for event in game.new_events])
+    return [game.uuid for game in games]
+
+
+def _admitted(run: Callable[[G], Result]) -> Callable[[G], Result]:
+    """Reject the commands over the rate limits, without loading the game"""
+
+    @wraps(run)
+    def _run(command: G, /) -> Result:
+        if _admission is not None and (rejection := _admission.reject(command)):
+            return rejection
+        return run(command)
+
+    return _run
+
+
 @execute.register
+@_idempotent
+@_admitted
 def game_command(command: GameCommand, /) -> Result:
+    if rejection := _validations.reject(command, events().length(command.game)):
+        rollback(command.game, rejection)
+        return rejection
     game = get_game(command.game)
     result = handle(game, command)
     commit_or_rollback(result, game)
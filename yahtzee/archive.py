@@ -0,0 +1,256 @@
+"""Cold storage tier for finished games.
+
+Finished games are moved from the hot store to append-only segment files on
+disk, synced before the games are deleted from the hot store. Each game is a
+compressed chunk of changes in the columnar format, so nothing is unpickled
+from the segments. The summaries of the final scorecards last read stay in memory, and
+reading the events of an archived game decompresses them on demand.
+
+The archived events keep their position in the change feed: the changes of
+the archiving store merge the archived games with the hot feed, so a
+consumer reading the feed from the start still sees every game.
+"""
+import os
+import struct
+from collections import OrderedDict
+from collections.abc import Collection, Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import NamedTuple
+from uuid import UUID
+
+from .columnar import decode_changes, encode_changes
+from .game import Game
+from .game import events as evt
+from .game.events import Event as GameEvent
+from .repository import Change, InMemoryEventsStore
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+DEFAULT_MAX_SUMMARIES = 10_000
+
+# game uuid, number of events, compressed payload size,
+# feed positions of the first and last events
+_HEADER = struct.Struct(">16sIIQQ")
+
+
+class _Location(NamedTuple):
+    segment: Path
+    offset: int
+    size: int
+    events: int
+    first: int
+    last: int
+
+
+class ColdStorage:
+    """Append-only segments of compressed game streams"""
+
+    def __init__(self, directory: Path, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        self._directory = directory
+        self._segment_size = segment_size
+        self._index: dict[UUID, _Location] = {}
+        directory.mkdir(parents=True, exist_ok=True)
+        self._segments = sorted(directory.glob("segment-*.seg"))
+        for segment in self._segments:
+            self._index.update(self._scan(segment))
+
+    def __contains__(self, uuid: UUID) -> bool:
+        return uuid in self._index
+
+    def games(self) -> Iterable[UUID]:
+        return list(self._index)
+
+    def length(self, uuid: UUID) -> int:
+        """Number of events of an archived game, without reading them"""
+        location = self._index.get(uuid)
+        return 0 if location is None else location.events
+
+    def write(
+        self, uuid: UUID, events: Sequence[GameEvent], positions: Sequence[int]
+    ) -> None:
+        """Write the events of a game and their feed positions, synced to disk"""
+        payload = encode_changes(
+            [
+                Change(position, uuid, event)
+                for position, event in zip(positions, events)
+            ]
+        )
+        segment = self._current_segment()
+        first, last = (positions[0], positions[-1]) if positions else (0, 0)
+        with segment.open("ab") as f:
+            offset = f.tell() + _HEADER.size
+            f.write(_HEADER.pack(uuid.bytes, len(events), len(payload), first, last))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self._index[uuid] = _Location(
+            segment, offset, len(payload), len(events), first, last
+        )
+
+    def read(self, uuid: UUID) -> list[GameEvent]:
+        return self._read(uuid)[0]
+
+    def positions(self, uuid: UUID) -> list[int]:
+        """Feed positions of the events of an archived game"""
+        return self._read(uuid)[1]
+
+    def changes(self, since: int, until: int | None) -> list[Change]:
+        """Archived changes after the `since` position, up to `until`"""
+        changes: list[Change] = []
+        for uuid, location in self._index.items():
+            if location.last <= since or (until is not None and location.first > until):
+                continue
+            events, positions = self._read(uuid)
+            changes.extend(
+                Change(position, uuid, event)
+                for position, event in zip(positions, events)
+                if since < position and (until is None or position <= until)
+            )
+        return changes
+
+    def _read(self, uuid: UUID) -> tuple[list[GameEvent], list[int]]:
+        location = self._index[uuid]
+        with location.segment.open("rb") as f:
+            f.seek(location.offset)
+            payload = f.read(location.size)
+        changes = decode_changes(payload)
+        events = [change.event for change in changes]
+        return events, [change.position for change in changes]
+
+    def _current_segment(self) -> Path:
+        if (
+            not self._segments
+            or self._segments[-1].stat().st_size >= self._segment_size
+        ):
+            name = f"segment-{len(self._segments) + 1:06d}.seg"
+            self._segments.append(self._directory / name)
+            self._segments[-1].touch()
+            # the new segment survives a crash once its directory is synced
+            directory = os.open(self._directory, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        return self._segments[-1]
+
+    @staticmethod
+    def _scan(segment: Path) -> Iterator[tuple[UUID, _Location]]:
+        with segment.open("rb") as f:
+            while header := f.read(_HEADER.size):
+                if len(header) < _HEADER.size:
+                    return  # truncated by a crash while archiving
+                uuid_bytes, count, size, first, last = _HEADER.unpack(header)
+                offset = f.tell()
+                if len(f.read(size)) < size:
+                    return
+                location = _Location(segment, offset, size, count, first, last)
+                yield UUID(bytes=uuid_bytes), location
+
+
+class ArchivingEventsStore:
+    """Events store moving finished games from a hot store to cold storage.
+    The games of the hot store which already ended are found on start.
+    """
+
+    def __init__(
+        self,
+        hot: InMemoryEventsStore,
+        cold: ColdStorage,
+        max_summaries: int = DEFAULT_MAX_SUMMARIES,
+    ) -> None:
+        self._hot = hot
+        self._cold = cold
+        self._finished: set[UUID] = {
+            change.game
+            for change in hot.changes()
+            if isinstance(change.event, evt.GameEnded)
+        }
+        self._summaries: OrderedDict[UUID, list[dict]] = OrderedDict()
+        self._max_summaries = max_summaries
+
+    def get_game_events(self, uuid: UUID) -> list[GameEvent]:
+        hot_events = self._hot.get_game_events(uuid)
+        if uuid in self._cold:
+            return self._cold.read(uuid) + hot_events
+        return hot_events
+
+    def length(self, uuid: UUID) -> int:
+        return self._cold.length(uuid) + self._hot.length(uuid)
+
+    def add_events(self, uuid: UUID, events: Sequence[GameEvent]) -> None:
+        self._hot.add_events(uuid, events)
+        if any(isinstance(event, evt.GameEnded) for event in events):
+            self._finished.add(uuid)
+
+    def add_many(self, events_by_game: Mapping[UUID, Sequence[GameEvent]]) -> None:
+        self._hot.add_many(events_by_game)
+        for uuid, events in events_by_game.items():
+            if any(isinstance(event, evt.GameEnded) for event in events):
+                self._finished.add(uuid)
+
+    def games(self) -> Iterable[UUID]:
+        return set(self._hot.games()) | set(self._cold.games())
+
+    def changes(self, since: int = 0, limit: int | None = None) -> Sequence[Change]:
+        hot = self._hot.changes(since, limit)
+        # the archived changes up to the last hot change read
+        until = hot[-1].position if limit is not None and len(hot) == limit else None
+        cold = self._cold.changes(since, until)
+        if not cold:
+            return hot
+        # a game being archived is in both
+        merged = {change.position: change for change in (*hot, *cold)}
+        changes = sorted(merged.values(), key=lambda change: change.position)
+        return changes if limit is None else changes[:limit]
+
+    def head(self) -> int:
+        return self._hot.head()
+
+    def summary(self, uuid: UUID) -> list[dict]:
+        """Final scorecards of an archived game"""
+        summary = self._summaries.get(uuid)
+        if summary is None:
+            summary = _summarize(uuid, self._cold.read(uuid))
+        self._keep_summary(uuid, summary)
+        return summary
+
+    def _keep_summary(self, uuid: UUID, summary: list[dict]) -> None:
+        self._summaries[uuid] = summary
+        self._summaries.move_to_end(uuid)
+        while len(self._summaries) > self._max_summaries:
+            self._summaries.popitem(last=False)
+
+    def archive(self, uuid: UUID) -> None:
+        """Move the events of a game to the cold storage"""
+        self._archive(uuid, self._positions({uuid})[uuid])
+
+    def archive_finished(self) -> int:
+        """Archive all the games that ended, return the number of archived games"""
+        finished = list(self._finished)
+        positions = self._positions(finished)
+        for uuid in finished:
+            self._archive(uuid, positions[uuid])
+        self._hot.compact()
+        return len(finished)
+
+    def _archive(self, uuid: UUID, positions: list[int]) -> None:
+        events = self.get_game_events(uuid)
+        if uuid in self._cold:
+            # archived again with the events added since
+            positions = self._cold.positions(uuid) + positions
+        self._cold.write(uuid, events, positions)
+        self._keep_summary(uuid, _summarize(uuid, events))
+        self._hot.delete_events(uuid)
+        self._finished.discard(uuid)
+
+    def _positions(self, games: Collection[UUID]) -> dict[UUID, list[int]]:
+        """Feed positions of the events of some games, in one read of the feed"""
+        positions: dict[UUID, list[int]] = {uuid: [] for uuid in games}
+        for change in self._hot.changes():
+            if change.game in positions:
+                positions[change.game].append(change.position)
+        return positions
+
+
+def _summarize(uuid: UUID, events: Iterable[GameEvent]) -> list[dict]:
+    game = Game.from_events(uuid, events)
+    return [player.asdict() for player in game.board.players]
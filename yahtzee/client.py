@@ -0,0 +1,251 @@
+"""Asyncio client of the game server, with connection pooling.
+
+    async with ClientPool(host="127.0.0.1", port=7777) as client:
+        game = (await client.execute(CreateGame())).unwrap()["uuid"]
+        players = await client.view(game, "players")
+
+Requests are pipelined: many requests may be in flight on each connection,
+and their responses are matched by request id. A subscription gets the
+deltas of a game pushed on its connection:
+
+    async with await client.subscribe(game) as deltas:
+        changes = await deltas.get()
+
+A connection closed by the server fails its pending and new requests, and
+its subscriptions, with `ConnectionError`; the pool opens new connections in
+place of the closed ones.
+"""
+import asyncio
+import itertools
+from typing import Any
+from uuid import UUID
+
+from . import protocol as proto
+from .commands import Command
+from .result import Result, ResultError
+
+DEFAULT_POOL_SIZE = 4
+
+
+class Connection:
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._pending: dict[int, asyncio.Future[dict]] = {}
+        self._subscriptions: dict[int, DeltaStream] = {}
+        # why the connection can't be used anymore
+        self._closed: Exception | None = None
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def open(
+        cls, host: str | None = None, port: int | None = None, path: str | None = None
+    ) -> "Connection":
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed is not None
+
+    async def request(self, message: dict) -> dict:
+        return await self._request(next(self._ids), message)
+
+    async def subscribe(self, game: UUID | str) -> "DeltaStream":
+        request_id = next(self._ids)
+        stream = self._subscriptions[request_id] = DeltaStream(self, request_id)
+        try:
+            response = await self._request(request_id, {"subscribe": str(game)})
+        except BaseException:
+            self._subscriptions.pop(request_id, None)
+            raise
+        if not response["ok"]:
+            self._subscriptions.pop(request_id, None)
+            raise ResultError(response["error"])
+        return stream
+
+    async def unsubscribe(self, stream: "DeltaStream") -> None:
+        if self._subscriptions.pop(stream.id, None) is not None and not self.closed:
+            await self.request({"unsubscribe": stream.id})
+
+    async def _request(self, request_id: int, message: dict) -> dict:
+        if self._closed is not None:
+            raise ConnectionError(f"Connection closed: {self._closed}")
+        response = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = response
+        try:
+            self._writer.write(proto.encode({"id": request_id, **message}))
+            await self._writer.drain()
+        except ConnectionError:
+            self._pending.pop(request_id, None)
+            raise
+        return await response
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._receiver.cancel()
+
+    async def _receive(self) -> None:
+        error: Exception = ConnectionError("Connection closed")
+        try:
+            while (message := await proto.read_message(self._reader)) is not None:
+                if "subscription" in message:
+                    stream = self._subscriptions.get(message["subscription"])
+                    if stream is not None:
+                        stream.put(message["deltas"])
+                    continue
+                future = self._pending.pop(message.pop("id", None), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (proto.ProtocolError, ConnectionError) as exc:
+            error = exc
+        finally:
+            self._closed = error
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Connection closed: {error}"))
+            self._pending.clear()
+            for stream in self._subscriptions.values():
+                stream.put(None)
+            self._subscriptions.clear()
+
+
+class DeltaStream:
+    """Deltas of a game pushed by the server, until closed"""
+
+    def __init__(self, connection: Connection, subscription_id: int) -> None:
+        self.id = subscription_id
+        self._connection = connection
+        # None once the connection is closed
+        self._deltas: asyncio.Queue[list[dict] | None] = asyncio.Queue()
+
+    async def __aenter__(self) -> "DeltaStream":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.close()
+
+    def put(self, deltas: list[dict] | None) -> None:
+        self._deltas.put_nowait(deltas)
+
+    async def get(self) -> list[dict]:
+        """The next deltas pushed, as `{"kind": ..., "data": ...}`"""
+        deltas = await self._deltas.get()
+        if deltas is None:
+            self._deltas.put_nowait(None)
+            raise ConnectionError("Connection closed")
+        return deltas
+
+    async def close(self) -> None:
+        await self._connection.unsubscribe(self)
+
+
+class ClientPool:
+    """Pool of connections to a game server.
+    Each request goes to the least busy connection.
+    """
+
+    def __init__(
+        self,
+        host: str | None = None,
+        port: int | None = None,
+        path: str | None = None,
+        size: int = DEFAULT_POOL_SIZE,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._path = path
+        self._size = size
+        self._connections: list[Connection] = []
+        self._reopening = asyncio.Lock()
+
+    async def __aenter__(self) -> "ClientPool":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        self._connections = list(
+            await asyncio.gather(
+                *(
+                    Connection.open(self._host, self._port, self._path)
+                    for _ in range(self._size)
+                )
+            )
+        )
+
+    async def close(self) -> None:
+        await asyncio.gather(*(connection.close() for connection in self._connections))
+        self._connections = []
+
+    async def request(self, message: dict) -> dict:
+        return await (await self._connection()).request(message)
+
+    async def _connection(self) -> Connection:
+        """The least busy connection"""
+        if not self._connections:
+            raise ConnectionError("The pool is not opened")
+        if any(connection.closed for connection in self._connections):
+            await self._reopen()
+        return min(self._connections, key=lambda conn: conn.in_flight)
+
+    async def _reopen(self) -> None:
+        """Open new connections in place of the closed ones"""
+        async with self._reopening:
+            closed = [conn for conn in self._connections if conn.closed]
+            if not closed:
+                return
+            try:
+                opened = await asyncio.gather(
+                    *(
+                        Connection.open(self._host, self._port, self._path)
+                        for _ in closed
+                    )
+                )
+            except OSError as error:
+                raise ConnectionError(f"Can't reconnect: {error}") from error
+            await asyncio.gather(*(connection.close() for connection in closed))
+            self._connections = [
+                conn for conn in self._connections if not conn.closed
+            ] + list(opened)
+
+    async def execute(self, command: Command) -> Result:
+        response = await self.request({"command": proto.command_to_dict(command)})
+        return proto.result_from_dict(response)
+
+    async def subscribe(self, game: UUID | str) -> DeltaStream:
+        """Deltas of a game pushed by the server"""
+        return await (await self._connection()).subscribe(game)
+
+    async def view(self, game: UUID | str, name: str, **arguments: Any) -> Any:
+        response = await self.request({"view": name, "game": str(game), **arguments})
+        if not response["ok"]:
+            raise ResultError(response["error"])
+        return response["value"]
+
+    async def poll(
+        self, game: UUID | str, name: str, since: int | None = None, **arguments: Any
+    ) -> tuple[int, Any]:
+        """Board version and value of a view, None if unchanged `since` a version"""
+        response = await self.request(
+            {"view": name, "game": str(game), "since": since, **arguments}
+        )
+        if not response["ok"]:
+            raise ResultError(response["error"])
+        return response["version"], response.get("value")
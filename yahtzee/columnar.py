@@ -0,0 +1,283 @@
+"""Bulk export and import of game events in a columnar format.
+
+Events are streamed in chunks of rows. Each chunk is zlib compressed and holds
+typed columns: game, sequence, event type, player, category, points, round,
+attempt and dice fields; the player column also holds the rules of the
+created games. Strings and game uuids are dictionary encoded per chunk, so
+memory stays bounded by the chunk size on both sides.
+
+Exports can be split by game uuid ranges to run in parallel.
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from typing import BinaryIO
+from uuid import UUID
+
+from .game import events as evt
+from .game.dices import DicePosition
+from .game.score import Category
+from .repository import Change, EventsStore
+
+MAGIC = b"YTZC1\n"
+DEFAULT_CHUNK_ROWS = 65_536
+
+UUID_SPACE = 1 << 128
+
+EVENT_TYPES: tuple[type[evt.Event], ...] = (
+    evt.GameCreated,
+    evt.GameStarted,
+    evt.GameEnded,
+    evt.PlayerAdded,
+    evt.PointsScored,
+    evt.TurnChanged,
+    evt.RollPerformed,
+    evt.DicePositionChanged,
+)
+_TYPE_CODES = {event_type: code for code, event_type in enumerate(EVENT_TYPES)}
+_CATEGORIES = tuple(category.value for category in Category)
+_CATEGORY_CODES = {category: code for code, category in enumerate(_CATEGORIES)}
+_POSITIONS = tuple(position.value for position in DicePosition)
+_POSITION_CODES = {position: code for code, position in enumerate(_POSITIONS)}
+
+# column name, array typecode
+COLUMNS = (
+    ("game", "I"),
+    ("seq", "I"),
+    ("type", "B"),
+    ("player", "i"),
+    ("category", "b"),
+    ("points", "i"),
+    ("round", "i"),
+    ("attempt", "b"),
+    ("dice_number", "b"),
+    ("dice_position", "b"),
+    ("dice_value", "b"),
+)
+NULL = -1
+
+_CHUNK_HEADER = struct.Struct(">I")
+
+
+class FormatError(Exception):
+    """The stream is not a valid columnar export"""
+
+
+def uuid_ranges(parts: int) -> list[tuple[int, int]]:
+    """Split the uuid space in `parts` ranges of `UUID.int` to export in parallel"""
+    bounds = [UUID_SPACE * i // parts for i in range(parts + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+class _Chunk:
+    def __init__(self) -> None:
+        self.games: dict[UUID, int] = {}
+        self.strings: dict[str, int] = {}
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.columns["seq"])
+
+    def _string(self, value: str) -> int:
+        return self.strings.setdefault(value, len(self.strings))
+
+    def append(self, game: UUID, seq: int, event: evt.Event) -> None:
+        row = dict.fromkeys(self.columns, NULL)
+        row["game"] = self.games.setdefault(game, len(self.games))
+        row["seq"] = seq
+        row["type"] = _TYPE_CODES[type(event)]
+        match event:
+            case evt.GameCreated(rules=rules):
+                row["player"] = self._string(rules)
+            case evt.PlayerAdded(player=player):
+                row["player"] = self._string(player)
+            case evt.PointsScored(player=player, category=category, points=points):
+                row["player"] = self._string(player)
+                row["category"] = _CATEGORY_CODES[category]
+                row["points"] = points
+            case evt.TurnChanged(new_player=player, round_number=round_number):
+                row["player"] = self._string(player)
+                row["round"] = round_number
+            case evt.RollPerformed(attempt_nb=attempt):
+                row["attempt"] = attempt
+            case evt.DicePositionChanged(number=number, position=position, value=value):
+                row["dice_number"] = number
+                row["dice_position"] = _POSITION_CODES[position]
+                row["dice_value"] = value
+        for name, column in self.columns.items():
+            column.append(row[name])
+
+    def dump(self) -> bytes:
+        header = {
+            "rows": len(self),
+            "games": [game.hex for game in self.games],
+            "strings": list(self.strings),
+        }
+        body = [json.dumps(header).encode()]
+        for column in self.columns.values():
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            body.append(column.tobytes())
+        sizes = struct.pack(f">{len(body)}I", *map(len, body))
+        return zlib.compress(sizes + b"".join(body))
+
+    @classmethod
+    def load(cls, data: bytes) -> Iterator[evt.Event]:
+        for _, _, event in cls.rows(data):
+            yield event
+
+    @classmethod
+    def rows(cls, data: bytes) -> Iterator[tuple[UUID, int, evt.Event]]:
+        """Game, sequence and event of each row"""
+        raw = zlib.decompress(data)
+        nb_parts = len(COLUMNS) + 1
+        sizes = struct.unpack_from(f">{nb_parts}I", raw)
+        offset = struct.calcsize(f">{nb_parts}I")
+        parts = []
+        for size in sizes:
+            parts.append(raw[offset : offset + size])
+            offset += size
+
+        header = json.loads(parts[0])
+        games = [UUID(hex=game) for game in header["games"]]
+        strings = header["strings"]
+        columns = {}
+        for (name, typecode), part in zip(COLUMNS, parts[1:]):
+            column = array(typecode)
+            column.frombytes(part)
+            if sys.byteorder == "big":
+                column.byteswap()
+            columns[name] = column
+
+        for i in range(header["rows"]):
+            row = {name: column[i] for name, column in columns.items()}
+            game = games[row["game"]]
+            yield game, row["seq"], _decode(game, row, strings)
+
+
+def _decode(game: UUID, row: dict[str, int], strings: list[str]) -> evt.Event:
+    event_type = EVENT_TYPES[row["type"]]
+    match event_type:
+        case evt.GameCreated if row["player"] != NULL:
+            return evt.GameCreated(game, strings[row["player"]])
+        case evt.PlayerAdded:
+            return evt.PlayerAdded(game, strings[row["player"]])
+        case evt.PointsScored:
+            category = _CATEGORIES[row["category"]]
+            return evt.PointsScored(
+                game, strings[row["player"]], category, row["points"]
+            )
+        case evt.TurnChanged:
+            return evt.TurnChanged(game, strings[row["player"]], row["round"])
+        case evt.RollPerformed:
+            return evt.RollPerformed(game, row["attempt"])
+        case evt.DicePositionChanged:
+            position = _POSITIONS[row["dice_position"]]
+            return evt.DicePositionChanged(
+                game, row["dice_number"], position, row["dice_value"]  # type: ignore[arg-type]
+            )
+        case _:
+            return event_type(game)
+
+
+def encode_changes(changes: Sequence[Change]) -> bytes:
+    """A chunk of changes, their positions in the sequence column"""
+    chunk = _Chunk()
+    for change in changes:
+        chunk.append(change.game, change.position, change.event)
+    return chunk.dump()
+
+
+def decode_changes(data: bytes) -> list[Change]:
+    try:
+        return [Change(seq, game, event) for game, seq, event in _Chunk.rows(data)]
+    except (zlib.error, struct.error, ValueError, KeyError, IndexError) as error:
+        raise FormatError(f"Invalid chunk of changes: {error}") from error
+
+
+def export_events(
+    store: EventsStore,
+    output: BinaryIO,
+    uuid_range: tuple[int, int] = (0, UUID_SPACE),
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> int:
+    """Export the game events of the games in `uuid_range`.
+    Return the number of exported events.
+    """
+    low, high = uuid_range
+    games = sorted(uuid for uuid in store.games() if low <= uuid.int < high)
+    output.write(MAGIC)
+    exported = 0
+    chunk = _Chunk()
+    for uuid in games:
+        for seq, event in enumerate(store.get_game_events(uuid)):
+            chunk.append(uuid, seq, event)
+            if len(chunk) >= chunk_rows:
+                exported += _write_chunk(output, chunk)
+                chunk = _Chunk()
+    if len(chunk):
+        exported += _write_chunk(output, chunk)
+    return exported
+
+
+def _write_chunk(output: BinaryIO, chunk: _Chunk) -> int:
+    data = chunk.dump()
+    output.write(_CHUNK_HEADER.pack(len(data)))
+    output.write(data)
+    return len(chunk)
+
+
+def read_events(input: BinaryIO) -> Iterator[evt.Event]:
+    """Stream the events of an export, chunk by chunk"""
+    for _, _, event in _read_rows(input):
+        yield event
+
+
+def _read_rows(input: BinaryIO) -> Iterator[tuple[UUID, int, evt.Event]]:
+    if input.read(len(MAGIC)) != MAGIC:
+        raise FormatError("Not a yahtzee columnar export")
+    while header := input.read(_CHUNK_HEADER.size):
+        (size,) = _CHUNK_HEADER.unpack(header)
+        data = input.read(size)
+        if len(data) < size:
+            raise FormatError("Truncated chunk")
+        yield from _Chunk.rows(data)
+
+
+def import_events(store: EventsStore, inputs: Iterable[BinaryIO]) -> int:
+    """Load exported events straight into a store, game stream by game stream.
+    The events of a game must continue its stream in the store: importing a
+    game already imported raises `FormatError`, the games before it being
+    imported. Return the number of imported events.
+    """
+    imported = 0
+    for input in inputs:
+        stream: list[evt.Event] = []
+        start = 0
+        for game, seq, event in _read_rows(input):
+            if stream and game != stream[-1].game:
+                imported += _import_stream(store, start, stream)
+                stream = []
+            if not stream:
+                start = seq
+            elif seq != start + len(stream):
+                raise FormatError(f"Event {seq} of {game} is out of sequence")
+            stream.append(event)
+        if stream:
+            imported += _import_stream(store, start, stream)
+    return imported
+
+
+def _import_stream(store: EventsStore, start: int, stream: list[evt.Event]) -> int:
+    uuid = stream[0].game
+    length = store.length(uuid)
+    if start != length:
+        raise FormatError(
+            f"Events of {uuid} from {start} do not continue its {length} events"
+        )
+    store.add_events(uuid, stream)
+    return len(stream)
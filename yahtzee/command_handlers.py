@@ -1,4 +1,3 @@
-import logging
 from collections.abc import Callable
 from functools import singledispatch, wraps
 from typing import Any
@@ -7,11 +6,13 @@ from . import commands as cmd
 from .game import Game
 from .game import events as evt
 from .game.board import GameOver, GameStatus, Player, Round
-from .game.dices import Combination, DiceNumber, DicePosition
+from .game.dices import DiceNumber, DicePosition
+from .game.rules import RULES, rules
 from .game.score import Category
+from .lazy import getLogger
 from .result import Err, Ok, Result
 
-logger = logging.getLogger(__name__)
+logger = getLogger(__name__)
 
 Handler = Callable[[Any, Game], Result]
 
@@ -27,8 +28,10 @@ def _new(command: cmd.Command, _: Game, /) -> Result:
 
 
 @_new.register
-def create_game(_: cmd.CreateGame, game: Game, /) -> Result:
-    game.append(evt.GameCreated(game.uuid))
+def create_game(command: cmd.CreateGame, game: Game, /) -> Result:
+    if command.rules not in RULES:
+        return Err(f"Unknown rules `{command.rules}`")
+    game.append(evt.GameCreated(game.uuid, command.rules))
     return Ok({"uuid": game.uuid})
 
 
@@ -39,9 +42,8 @@ def _pending(command: cmd.Command, _: Game, /) -> Result:
 
 @_pending.register
 def add_player(command: cmd.AddPlayer, game: Game, /) -> Result:
-    player = Player(command.name)
-    if player in game.board.players:
-        return Err(f"Player `{player}` is already in game")
+    if game.board.has_player(command.name):
+        return Err(f"Player `{Player(command.name)}` is already in game")
 
     game.append(evt.PlayerAdded(game.uuid, command.name))
     return Ok()
@@ -78,6 +80,8 @@ def _validator(validator: Handler) -> Callable[[Handler], Handler]:
 
 @_validator
 def _player_can_play(command: cmd.PlayerCommand, game, /) -> Result:
+    if not game.board.has_player(command.player):
+        return Err(f"{command.player}, you are not in the game")
     player = game.board.get_player(command.player)
     if player is not game.board.playing_player:
         return Err(f"{command.player}, it's not your turn to play")
@@ -110,13 +114,26 @@ def score(command: cmd.Score, game: Game, /) -> Result:
 
     player = game.board.get_player(command.player)
     category = Category(command.combination)
+    if category.is_bonus:
+        return Err(f"{command.player}, {category.value} is not a combination")
     if not player.can_score(category):
         return Err(f"{command.player}, you already scored {category.value}")
 
-    combination = Combination(command.combination)
-    score = dices.score(combination)
+    game_rules = rules(game.board.rules)
+    scorecard = player.scorecard
+    outcome = game_rules.outcome(dices, scorecard)
+    if refusal := game_rules.refusal(outcome, category, scorecard):
+        return Err(f"{command.player}, {refusal}")
 
-    game.append(evt.PointsScored(game.uuid, command.player, category.value, score))
+    points = outcome.points[category]
+    game.append(evt.PointsScored(game.uuid, command.player, category.value, points))
+    if outcome.bonus:
+        bonus = (scorecard[Category.YAHTZEE_BONUS] or 0) + outcome.bonus
+        game.append(
+            evt.PointsScored(
+                game.uuid, command.player, Category.YAHTZEE_BONUS.value, bonus
+            )
+        )
 
     match game.board.round.next_round():
         case Round() as next_round:
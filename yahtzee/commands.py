@@ -1,16 +1,27 @@
 from abc import ABC
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Literal
 from uuid import UUID
 
+from .game.rules import STANDARD
 
+
+@dataclass(frozen=True)
 class Command(ABC):
-    """Send a command to yahtzee game"""
+    """Send a command to yahtzee game.
+    A command sent again with the same `request_id` is not executed twice.
+    """
+
+    request_id: str | None = field(default=None, kw_only=True, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.request_id is not None and not isinstance(self.request_id, str):
+            raise TypeError(f"Request id {self.request_id!r} is not a string")
 
 
 @dataclass(frozen=True)
 class CreateGame(Command):
-    pass
+    rules: str = STANDARD
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,309 @@
+"""Memory footprint of the stores, the live games and the caches.
+
+    report = diagnostics.report(app.events())
+
+gives the deep sizes of the stored events (by game and by event type), of a
+sample of rehydrated boards, of the module level caches, and the allocation
+hot spots while replaying the sampled games. Shared flyweights (dices, blank
+score lines) are not charged to the objects referencing them.
+
+`python -m yahtzee.diagnostics` plays synthetic games and prints the report,
+with the hot spots of the command handling.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tracemalloc
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from enum import Enum
+from pathlib import Path
+from types import BuiltinFunctionType, FunctionType, ModuleType
+from uuid import UUID
+
+from . import app
+from .commands import AddPlayer, CreateGame, RollDices, Score, StartGame
+from .game import Game
+from .game import dices as _dices
+from .game import hints as _hints
+from .game import score as _score
+from .game.players import Player
+from .repository import EventsStore, system_events
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+DEFAULT_SAMPLE = 100
+DEFAULT_TOP = 10
+
+_NOT_OWNED = (type, ModuleType, FunctionType, BuiltinFunctionType, Enum)
+_LEAVES = (str, bytes, bytearray, int, float, complex, bool)
+
+
+def _shared() -> set[int]:
+    """Ids of the flyweights shared by all the games"""
+    shared = {id(dice) for dice in _dices._DICES.values()}
+    shared.update(id(line) for line in _score._BLANK_LINES.values())
+    shared.add(id(Player.nobody()))
+    return shared
+
+
+def deep_size(obj: object, seen: set[int] | None = None) -> int:
+    """Bytes of an object and of all the objects it references.
+    Objects whose id is in `seen` are not counted, and counted objects are
+    added to it: share it between calls to count shared objects only once.
+    """
+    seen = _shared() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _NOT_OWNED):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, _LEAVES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        if hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+        for cls in type(obj).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if slot not in ("__dict__", "__weakref__") and hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return size
+
+
+@dataclass
+class Footprint:
+    count: int = 0
+    bytes: int = 0
+
+    @property
+    def mean(self) -> float:
+        return self.bytes / self.count if self.count else 0.0
+
+
+def store_report(store: EventsStore) -> dict:
+    """Events per game, and bytes per event type"""
+    seen = _shared()
+    by_type: dict[str, Footprint] = defaultdict(Footprint)
+    events_per_game = []
+    for uuid in store.games():
+        game_events = store.get_game_events(uuid)
+        events_per_game.append(len(game_events))
+        for event in game_events:
+            footprint = by_type[type(event).__name__]
+            footprint.count += 1
+            footprint.bytes += deep_size(event, seen)
+    events_bytes = sum(footprint.bytes for footprint in by_type.values())
+    return {
+        "games": len(events_per_game),
+        "events": sum(events_per_game),
+        "events_per_game": {
+            "mean": statistics.fmean(events_per_game) if events_per_game else 0.0,
+            "max": max(events_per_game, default=0),
+        },
+        "bytes": events_bytes + deep_size(store, seen),
+        "events_bytes": events_bytes,
+        "by_event_type": {
+            name: {**asdict(footprint), "mean": round(footprint.mean, 1)}
+            for name, footprint in sorted(by_type.items())
+        },
+    }
+
+
+def game_report(game: Game) -> dict:
+    """Bytes of a live game, its board and the parts of the board"""
+    board = game.board
+    return {
+        "game": deep_size(game),
+        "board": deep_size(board),
+        "scorecards": sum(deep_size(player.scorecard) for player in board.players),
+        "dices": deep_size(board.dices),
+        "events": deep_size(game.events),
+    }
+
+
+def caches_report() -> dict:
+    """Entries and bytes of the caches in use, without creating the others"""
+    caches: dict[str, dict] = {
+        "dices.hands": _dices._HANDS,
+        "validation.states": app._validations._states,
+        "system_events": system_events()._logs,
+        "views": app._view_cache._games,
+    }
+    report = {
+        name: {"entries": len(cache), "bytes": deep_size(cache)}
+        for name, cache in caches.items()
+    }
+    report["results"] = {"entries": len(app._results), "bytes": deep_size(app._results)}
+    if _hints._tables.cache_info().currsize:
+        report["hints.tables"] = {"entries": 1, "bytes": deep_size(_hints._tables())}
+    report["hints.expectations"] = {
+        "entries": _hints._expectations.cache_info().currsize
+    }
+    # the table of the hints is only reported once used, not allocated here
+    positions = _hints._positions
+    if positions is not None:
+        report["hints.positions"] = {
+            "entries": len(positions),
+            "bytes": positions.nbytes,
+            "hits": positions.hits,
+            "misses": positions.misses,
+        }
+    return report
+
+
+@dataclass(frozen=True)
+class HotSpot:
+    location: str
+    bytes: int
+    blocks: int
+
+
+def hot_spots(
+    action: Callable[[], object], limit: int = DEFAULT_TOP, frames: int = 1
+) -> list[HotSpot]:
+    """Lines of the package holding the most memory allocated by `action`.
+    Only what is still alive after the action is reported: keep the results
+    alive in the action to see what they cost.
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(frames)
+    try:
+        before = tracemalloc.take_snapshot()
+        action()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    package = [tracemalloc.Filter(True, f"{PACKAGE_DIR}/*")]
+    stats = after.filter_traces(package).compare_to(
+        before.filter_traces(package), "lineno"
+    )
+    return [
+        HotSpot(str(stat.traceback), stat.size_diff, stat.count_diff)
+        for stat in stats[:limit]
+        if stat.size_diff > 0
+    ]
+
+
+def sample_games(store: EventsStore, size: int = DEFAULT_SAMPLE) -> list[UUID]:
+    games = list(store.games())
+    return games[:: max(1, len(games) // size)][:size]
+
+
+def replay_hot_spots(
+    store: EventsStore, sample: int = DEFAULT_SAMPLE, limit: int = DEFAULT_TOP
+) -> list[HotSpot]:
+    games: list[Game] = []
+
+    def replay() -> None:
+        for uuid in sample_games(store, sample):
+            games.append(Game.from_events(uuid, store.get_game_events(uuid)))
+
+    return hot_spots(replay, limit)
+
+
+def report(
+    store: EventsStore, sample: int = DEFAULT_SAMPLE, top: int = DEFAULT_TOP
+) -> dict:
+    games = [
+        Game.from_events(uuid, store.get_game_events(uuid))
+        for uuid in sample_games(store, sample)
+    ]
+    game_reports = [game_report(game) for game in games]
+    return {
+        "store": store_report(store),
+        "live_games": {
+            "sample": len(games),
+            "mean_bytes": {
+                part: round(statistics.fmean(report[part] for report in game_reports))
+                for part in game_reports[0]
+            }
+            if game_reports
+            else {},
+        },
+        "caches": caches_report(),
+        "replay_hot_spots": [
+            asdict(spot) for spot in replay_hot_spots(store, sample, top)
+        ],
+    }
+
+
+def play_games(games: int, players: int) -> None:
+    """Play complete games with random choices"""
+    for _ in range(games):
+        game = app.execute(CreateGame()).unwrap()["uuid"]
+        names = [f"player-{i}" for i in range(players)]
+        for name in names:
+            app.execute(AddPlayer(game, name))
+        app.execute(StartGame(game))
+        categories = [category for category in _score.Category if not category.is_bonus]
+        random.shuffle(categories)
+        for category in categories:
+            for name in names:
+                app.execute(RollDices(game, name))
+                app.execute(Score(game, name, category.value))
+
+
+def _print_report(report: dict, command_spots: Iterable[HotSpot]) -> None:
+    store = report["store"]
+    print(
+        f"store: {store['games']} games, {store['events']} events, "
+        f"{store['bytes'] / 1024:.0f} KiB "
+        f"({store['events_bytes'] / max(1, store['events']):.0f} B/event)"
+    )
+    for name, footprint in store["by_event_type"].items():
+        print(
+            f"  {name:<20} {footprint['count']:>8} x {footprint['mean']:>6.0f} B"
+            f" = {footprint['bytes'] / 1024:>8.0f} KiB"
+        )
+    print(f"live games (sample of {report['live_games']['sample']}), mean bytes:")
+    for part, size in report["live_games"]["mean_bytes"].items():
+        print(f"  {part:<20} {size:>8}")
+    print("caches:")
+    for name, cache in report["caches"].items():
+        size = f"{cache['bytes'] / 1024:>8.0f} KiB" if "bytes" in cache else ""
+        print(f"  {name:<20} {cache['entries']:>8} entries {size}")
+    for title, spots in (
+        ("replay", [HotSpot(**spot) for spot in report["replay_hot_spots"]]),
+        ("commands", command_spots),
+    ):
+        print(f"{title} hot spots:")
+        for spot in spots:
+            print(
+                f"  {spot.bytes / 1024:>8.1f} KiB {spot.blocks:>7} blocks  {spot.location}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report the memory footprint")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    app.bootstrap()
+    command_spots = hot_spots(lambda: play_games(args.games, args.players), args.top)
+    result = report(app.events(), args.sample, args.top)
+    if args.json:
+        result["command_hot_spots"] = [asdict(spot) for spot in command_spots]
+        print(json.dumps(result, indent=2))
+    else:
+        _print_report(result, command_spots)
+
+
+if __name__ == "__main__":
+    main()
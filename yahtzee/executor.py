@@ -0,0 +1,102 @@
+"""Thread pool executing commands, ordered per game.
+
+    with CommandExecutor(workers=8) as executor:
+        futures = [executor.submit(command) for command in commands]
+        results = [future.result() for future in futures]
+
+Commands of the same game run one at a time, in submission order, so a game
+is never handled by two threads at once. Commands of different games run in
+parallel on the pool.
+"""
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import TracebackType
+from uuid import UUID
+
+from . import app
+from .commands import Command, GameCommand
+from .result import Result
+
+DEFAULT_WORKERS = 8
+# commands run in a row for a game before yielding its worker to other games
+DEFAULT_BURST = 16
+
+Execute = Callable[[Command], Result]
+
+
+class CommandExecutor:
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        execute: Execute = app.execute,
+        burst: int = DEFAULT_BURST,
+    ) -> None:
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="yahtzee")
+        self._execute = execute
+        self._burst = burst
+        self._lock = threading.Lock()
+        # queued commands of the games being executed
+        self._queues: dict[UUID, deque[tuple[Command, Future[Result]]]] = {}
+        self._shutdown = False
+
+    def __enter__(self) -> "CommandExecutor":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.shutdown()
+
+    def submit(self, command: Command) -> "Future[Result]":
+        if not isinstance(command, GameCommand):
+            return self._pool.submit(self._execute, command)
+        future: Future[Result] = Future()
+        with self._lock:
+            # checked before queueing: a queue of a game not drained would
+            # take the later commands of the game
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new commands after shutdown")
+            queue = self._queues.get(command.game)
+            if queue is not None:
+                queue.append((command, future))
+                return future
+            self._queues[command.game] = deque([(command, future)])
+            # under the lock, so the pool is not shut down in between
+            self._pool.submit(self._drain, command.game)
+        return future
+
+    def execute(self, command: Command) -> Result:
+        return self.submit(command).result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting commands, run the queued ones if `wait`"""
+        with self._lock:
+            self._shutdown = True
+        self._pool.shutdown(wait)
+
+    def _drain(self, game: UUID) -> None:
+        """Run the queued commands of a game"""
+        while True:
+            for _ in range(self._burst):
+                with self._lock:
+                    queue = self._queues[game]
+                    if not queue:
+                        del self._queues[game]
+                        return
+                    command, future = queue.popleft()
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(self._execute(command))
+                    except BaseException as error:
+                        future.set_exception(error)
+            try:
+                # let the other games run, this one keeps its queue
+                self._pool.submit(self._drain, game)
+                return
+            except RuntimeError:
+                continue  # shutting down: finish the game here
@@ -1,13 +1,15 @@
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from enum import Enum
 from functools import singledispatchmethod
-from logging import getLogger
 from typing import Union
 from uuid import UUID
 
+from ..lazy import getLogger
 from . import events as evt
 from .dices import Dice, Dices
 from .players import Player, Players
+from .rules import STANDARD
 from .score import Category
 
 logger = getLogger(__name__)
@@ -31,9 +33,13 @@ class PlayerTurn:
             return self.__class__(self.player, self.attempted_rolls + 1)
         return self
 
+    @property
+    def rolls_left(self) -> int:
+        return max(0, 3 - self.attempted_rolls)
+
     @property
     def can_reroll(self) -> bool:
-        return self.attempted_rolls < 3
+        return self.rolls_left > 0
 
 
 RoundNumber = int
@@ -56,30 +62,27 @@ class Round:
 
     number: RoundNumber
     player_turn: PlayerTurn
-    _players: Players
+    _players: Sequence[Player]
+    _seat: int = 0
 
     @classmethod
     def from_players(
         cls,
-        players: Players,
+        players: Sequence[Player],
         number: RoundNumber = 1,
-        current_player: Player | None = None,
+        seat: int = 0,
     ) -> "Round":
         if not players:
             return cls(number, PlayerTurn.null(), players)
 
-        if current_player is None:
-            current_player = players[0]
-
-        return cls(number, PlayerTurn(current_player), players)
+        return cls(number, PlayerTurn(players[seat]), players, seat)
 
     @property
     def _next_player(self) -> Player | None:
-        player_index = self._players.index(self.current_player)
-        try:
-            return self._players[player_index + 1]
-        except IndexError:
-            return None
+        next_seat = self._seat + 1
+        if next_seat < len(self._players):
+            return self._players[next_seat]
+        return None
 
     def next_round(self) -> Union["Round", GameOver]:
         match (self._next_player):
@@ -89,17 +92,27 @@ class Round:
                 return self.__class__.from_players(self._players, self.number + 1)
             case Player() as next_player:
                 return self.__class__(
-                    self.number, PlayerTurn(next_player), self._players
+                    self.number, PlayerTurn(next_player), self._players, self._seat + 1
                 )
 
     def next_attempt(self) -> "Round":
-        return self.__class__(self.number, self.player_turn.next_attempt, self._players)
+        return self.__class__(
+            self.number, self.player_turn.next_attempt, self._players, self._seat
+        )
 
     def with_attempt(self, attempt_nb: int) -> "Round":
         return self.__class__(
-            self.number, PlayerTurn(self.current_player, attempt_nb), self._players
+            self.number,
+            PlayerTurn(self.current_player, attempt_nb),
+            self._players,
+            self._seat,
         )
 
+    def with_players(self, players: Sequence[Player]) -> "Round":
+        """Same round, playing with updated players"""
+        player_turn = PlayerTurn(players[self._seat], self.player_turn.attempted_rolls)
+        return self.__class__(self.number, player_turn, players, self._seat)
+
     @property
     def current_player(self) -> Player:
         return self.player_turn.player
@@ -128,6 +141,8 @@ class Board:
     dices: Dices
     game_id: UUID
     version: int
+    seats: dict[str, int] = field(default_factory=dict)
+    rules: str = STANDARD
 
     def inc_version(self) -> None:
         self.version += 1
@@ -151,14 +166,19 @@ class Board:
     def game_created(self, event: evt.GameCreated, /):
         self.game_id = event.game
         self.status = GameStatus.PENDING
+        self.rules = event.rules
 
     @apply.register
     def player_added(self, event: evt.PlayerAdded, /):
+        self.seats[event.player] = len(self.players)
         self.players.append(Player(event.player))
         self.inc_version()
 
+    def has_player(self, player_name: str) -> bool:
+        return player_name in self.seats
+
     def get_player(self, player_name: str) -> Player:
-        return next(player for player in self.players if player.name == player_name)
+        return self.players[self.seats[player_name]]
 
     @property
     def playing_player(self) -> Player:
@@ -184,8 +204,8 @@ class Board:
 
     @apply.register
     def turn_changed(self, event: evt.TurnChanged):
-        player = self.get_player(event.new_player)
-        self.round = Round.from_players(self.players, event.round_number, player)
+        seat = self.seats[event.new_player]
+        self.round = Round.from_players(self.players, event.round_number, seat)
         self.inc_version()
 
     @apply.register
@@ -37,12 +37,28 @@ class DiceNumber(Enum):
     FIVE = 5
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, eq=False)
 class Dice:
+    """A single dice.
+    There are only 90 distinct dices: each of them is a shared instance, so
+    dices are compared by identity.
+    """
+
     number: DiceNumber
     value: DiceValue
     position: DicePosition
 
+    def __new__(
+        cls, number: DiceNumber, value: DiceValue, position: DicePosition
+    ) -> "Dice":
+        try:
+            return _DICES[number, value, position]
+        except KeyError:
+            raise ValueError(f"Invalid dice {number}, {value}, {position}") from None
+
+    def __reduce__(self):
+        return self.__class__, (self.number, self.value, self.position)
+
     def __gt__(self, other: "Dice") -> bool:
         return self.value > other.value
 
@@ -56,7 +72,7 @@ class Dice:
 
     @classmethod
     def in_the_cup(cls, number: DiceNumber) -> "Dice":
-        return cls(number, DiceValue.random(), DicePosition.IN_THE_CUP)
+        return _DICES[number, DiceValue.random(), DicePosition.IN_THE_CUP]
 
     @classmethod
     def from_literal(
@@ -65,11 +81,10 @@ class Dice:
         value: Literal[1, 2, 3, 4, 5, 6],
         position: Literal["in_the_cup", "on_the_track", "aside"],
     ) -> "Dice":
-        return cls(
-            DiceNumber(number),
-            DiceValue(value),
-            DicePosition(position),
-        )
+        try:
+            return _LITERAL_DICES[number, value, position]
+        except KeyError:
+            raise ValueError(f"Invalid dice {number}, {value}, {position}") from None
 
     @property
     def points(self) -> Literal[1, 2, 3, 4, 5, 6]:
@@ -81,9 +96,7 @@ class Dice:
         """
         if not self.is_in_the_cup:
             return self
-        return self.__class__(
-            self.number, DiceValue.random(), DicePosition.ON_THE_TRACK
-        )
+        return _DICES[self.number, DiceValue.random(), DicePosition.ON_THE_TRACK]
 
     def asdict(self) -> dict:
         return {
@@ -93,6 +106,24 @@ class Dice:
         }
 
 
+def _build_dice(number: DiceNumber, value: DiceValue, position: DicePosition) -> Dice:
+    dice = object.__new__(Dice)
+    Dice.__init__(dice, number, value, position)
+    return dice
+
+
+_DICES: dict[tuple[DiceNumber, DiceValue, DicePosition], Dice] = {
+    (number, value, position): _build_dice(number, value, position)
+    for number in DiceNumber
+    for value in DiceValue
+    for position in DicePosition
+}
+_LITERAL_DICES: dict[tuple[int, int, str], Dice] = {
+    (number.value, value.value, position.value): dice
+    for (number, value, position), dice in _DICES.items()
+}
+
+
 DicesSet = list[Dice]
 
 
@@ -214,7 +245,9 @@ _COMBINATION_SCORES: dict[Combination, Callable[[list[DiceValue]], int]] = {
 
 @dataclasses.dataclass(frozen=True)
 class Dices:
-    """A _hand_ of five dices"""
+    """A _hand_ of five dices.
+    Recently used hands are shared instances.
+    """
 
     dice_1: Dice
     dice_2: Dice
@@ -222,29 +255,36 @@ class Dices:
     dice_4: Dice
     dice_5: Dice
 
+    def __new__(
+        cls, dice_1: Dice, dice_2: Dice, dice_3: Dice, dice_4: Dice, dice_5: Dice
+    ) -> "Dices":
+        return _hand(dice_1, dice_2, dice_3, dice_4, dice_5)
+
+    def __reduce__(self):
+        return self.__class__, tuple(self.all)
+
     @classmethod
     def new_cup(cls) -> "Dices":
-        dices = [Dice.in_the_cup(num) for num in DiceNumber]
-        return cls(*dices)
+        return _hand(*(Dice.in_the_cup(num) for num in DiceNumber))
 
     @property
     def all_on_the_table(self) -> bool:
         return all(dice.is_on_the_table for dice in self.all)
 
     def get(self, number: DiceNumber) -> Dice:
-        return next(dice for dice in self.all if dice.number == number)
+        return next(dice for dice in self.all if dice.number is number)
 
     @property
     def all(self) -> Iterator[Dice]:
         yield from (self.dice_1, self.dice_2, self.dice_3, self.dice_4, self.dice_5)
 
     def roll(self) -> "Dices":
-        dices = [dice.roll() for dice in self.all]
-        return self.__class__(*dices)
+        return _hand(*(dice.roll() for dice in self.all))
 
     def update(self, dice: Dice) -> "Dices":
-        dices = [dice if _dice.number == dice.number else _dice for _dice in self.all]
-        return self.__class__(*dices)
+        return _hand(
+            *(dice if _dice.number is dice.number else _dice for _dice in self.all)
+        )
 
     @property
     def visibles(self) -> Iterator[Dice]:
@@ -256,3 +296,21 @@ class Dices:
 
     def score(self, combination: Combination) -> int:
         return combination.score(list(self.values))
+
+
+_MAX_HANDS = 4096
+_HANDS: dict[tuple[Dice, ...], Dices] = {}
+
+
+def _hand(*dices: Dice) -> Dices:
+    """Return the shared instance of a hand"""
+    try:
+        return _HANDS[dices]
+    except KeyError:
+        pass
+    if len(_HANDS) >= _MAX_HANDS:
+        _HANDS.clear()
+    hand = object.__new__(Dices)
+    Dices.__init__(hand, *dices)
+    _HANDS[dices] = hand
+    return hand
@@ -1,10 +1,14 @@
+import threading
 from abc import ABC
 from collections import defaultdict
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Literal, TypeVar
 from uuid import UUID
 
+from .rules import STANDARD
+
 
 @dataclass(frozen=True)
 class Event(ABC):
@@ -13,7 +17,7 @@ class Event(ABC):
 
 @dataclass(frozen=True)
 class GameCreated(Event):
-    pass
+    rules: str = STANDARD
 
 
 @dataclass(frozen=True)
@@ -58,24 +62,87 @@ class DicePositionChanged(Event):
 
 E = TypeVar("E", bound=Event)
 EventHandler = Callable[[E], None]
+BatchHandler = Callable[[list[E]], None]
 
 
 class _EventBus:
     def __init__(self) -> None:
         self._handlers: dict[type[Event], list[EventHandler]] = defaultdict(list)
+        self._batch_handlers: dict[type[Event], list[BatchHandler]] = defaultdict(list)
+        # events held by the batch of each thread
+        self._batches = threading.local()
 
     def push(self, event: Event) -> None:
+        pending: list[Event] | None = getattr(self._batches, "pending", None)
+        if pending is not None:
+            pending.append(event)
+            return
         event_type = type(event)
-        for handler in self._handlers[event_type]:
+        for handler in self._handlers.get(event_type, ()):
             handler(event)
+        for batch_handler in self._batch_handlers.get(event_type, ()):
+            batch_handler([event])
+
+    def push_all(self, events: list[Event]) -> None:
+        """Push some events at once, batch handlers getting them as lists"""
+        pending: list[Event] | None = getattr(self._batches, "pending", None)
+        if pending is not None:
+            pending.extend(events)
+            return
+        self._deliver(events)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Hold the pushed events, and deliver them all at once on exit.
+        Batch handlers get one list per event type instead of one call per event.
+        Nothing is delivered if the block raises.
+        Batches are per thread: events pushed by other threads are not held.
+        """
+        if getattr(self._batches, "pending", None) is not None:
+            yield  # already batching
+            return
+        pending: list[Event] = []
+        self._batches.pending = pending
+        try:
+            yield
+        finally:
+            self._batches.pending = None
+        self._deliver(pending)
+
+    def _deliver(self, events: list[Event]) -> None:
+        by_type: dict[type[Event], list[Event]] = defaultdict(list)
+        for event in events:
+            by_type[type(event)].append(event)
+            for handler in self._handlers.get(type(event), ()):
+                handler(event)
+        for event_type, typed_events in by_type.items():
+            for batch_handler in self._batch_handlers.get(event_type, ()):
+                batch_handler(typed_events)
 
     def register(self, handler: EventHandler) -> EventHandler:
         """Register an event handler.
         Can be used as a decorator.
         """
         event_type = handler.__annotations__["event"]
+        return self.subscribe(event_type, handler)
+
+    def subscribe(self, event_type: type[Event], handler: EventHandler) -> EventHandler:
+        """Register an event handler for the given event type"""
         self._handlers[event_type].append(handler)
         return handler
 
+    def unsubscribe(self, event_type: type[Event], handler: EventHandler) -> None:
+        self._handlers[event_type].remove(handler)
+
+    def subscribe_batch(
+        self, event_type: type[Event], handler: BatchHandler
+    ) -> BatchHandler:
+        """Register a handler receiving the events of the given type as lists"""
+        self._batch_handlers[event_type].append(handler)
+        return handler
+
+    def unsubscribe_batch(self, event_type: type[Event], handler: BatchHandler) -> None:
+        self._batch_handlers[event_type].remove(handler)
+
 
 event_bus = _EventBus()
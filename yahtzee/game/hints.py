@@ -0,0 +1,291 @@
+"""Expected scores of the open categories for the current roll.
+
+For every category, the best expected score reachable from the current hand
+if the player goes for that category with the rolls left. Hands are the 252
+multisets of 5 dice values; the transition table gives, for each of the 462
+multisets of kept dices, the distribution of the hands after a reroll. The
+tables and the per category expectations are built on the first hint, then
+a hint is a few hundred lookups.
+
+A hint only depends on the open categories, the dice values and the rolls
+left: it is computed once per such position, whatever the game, and kept in
+a transposition table that processes may share (see `transposition`).
+"""
+import dataclasses
+import struct
+from functools import cache, lru_cache
+from itertools import combinations_with_replacement
+from math import factorial
+
+from .dices import Combination, DiceNumber, Dices, DiceValue
+from .positions import NOT_ROLLED, Position
+from .score import Category, Scorecard
+from .transposition import TranspositionTable
+
+_FACES = range(1, 7)
+_MASKS = range(32)
+# keep mask -> positions of the kept dices
+_MASK_BITS = [tuple(bit for bit in range(5) if mask >> bit & 1) for mask in _MASKS]
+# keep mask over the dice numbers -> kept dice numbers
+_MASK_NUMBERS = [
+    tuple(number for bit, number in enumerate(DiceNumber) if mask >> bit & 1)
+    for mask in _MASKS
+]
+
+Hand = tuple[int, ...]
+
+_CATEGORIES = list(Category)
+_CATEGORY_CODES = {category: code for code, category in enumerate(_CATEGORIES)}
+# category or keep hint: category, score, expected score
+_LINE = struct.Struct("<BBd")
+_COUNT = struct.Struct("<B")
+# score of a category hint before a roll
+_NO_SCORE = 255
+
+# unpacked hints kept in this process, shared instances
+_UNPACKED_HINTS = 4096
+
+_positions: TranspositionTable | None = None
+
+
+@dataclasses.dataclass(frozen=True)
+class _Tables:
+    hands: list[Hand]
+    hand_index: dict[Hand, int]
+    # keep index -> (hand index, probability) after rolling the other dices
+    outcomes: list[list[tuple[int, float]]]
+    # hand index -> keep mask over the sorted hand -> keep index
+    keeps: list[list[int]]
+
+
+@dataclasses.dataclass(frozen=True)
+class _Expectations:
+    # rolls left -> hand index -> best expected score
+    hands: list[list[float]]
+    # rolls left -> keep index -> expected score after rerolling the others
+    keeps: list[list[float]]
+
+
+@dataclasses.dataclass(frozen=True)
+class CategoryHint:
+    category: Category
+    score: int | None
+    expected: float
+
+
+@dataclasses.dataclass(frozen=True)
+class KeepHint:
+    dices: tuple[DiceNumber, ...]
+    category: Category
+    expected: float
+
+
+@dataclasses.dataclass(frozen=True)
+class Hint:
+    rolls_left: int
+    categories: list[CategoryHint]
+    keeps: list[KeepHint]
+
+    def asdict(self) -> dict:
+        return {
+            "rolls_left": self.rolls_left,
+            "categories": [
+                {
+                    "category": hint.category.value,
+                    "score": hint.score,
+                    "expected": round(hint.expected, 2),
+                }
+                for hint in self.categories
+            ],
+            "keeps": [
+                {
+                    "dices": [number.value for number in hint.dices],
+                    "category": hint.category.value,
+                    "expected": round(hint.expected, 2),
+                }
+                for hint in self.keeps
+            ],
+        }
+
+
+def _probability(roll: Hand) -> float:
+    """Probability to roll this multiset of values"""
+    arrangements = factorial(len(roll))
+    for face in _FACES:
+        arrangements //= factorial(roll.count(face))
+    return arrangements / 6 ** len(roll)
+
+
+@cache
+def _tables() -> _Tables:
+    hands: list[Hand] = list(combinations_with_replacement(_FACES, 5))
+    hand_index = {hand: index for index, hand in enumerate(hands)}
+    kept = [
+        keep
+        for size in range(6)
+        for keep in combinations_with_replacement(_FACES, size)
+    ]
+    keep_index = {keep: index for index, keep in enumerate(kept)}
+    outcomes = [
+        [
+            (hand_index[tuple(sorted(keep + roll))], _probability(roll))
+            for roll in combinations_with_replacement(_FACES, 5 - len(keep))
+        ]
+        for keep in kept
+    ]
+    keeps = [
+        [
+            keep_index[
+                tuple(value for bit, value in enumerate(hand) if mask >> bit & 1)
+            ]
+            for mask in _MASKS
+        ]
+        for hand in hands
+    ]
+    return _Tables(hands, hand_index, outcomes, keeps)
+
+
+@cache
+def _expectations(category: Category) -> _Expectations:
+    tables = _tables()
+    combination = Combination(category.value)
+    hands = [
+        [
+            float(combination.score([DiceValue(value) for value in hand]))
+            for hand in tables.hands
+        ]
+    ]
+    keeps: list[list[float]] = [[]]
+    for _ in range(3):
+        previous = hands[-1]
+        keeps.append(
+            [
+                sum(probability * previous[hand] for hand, probability in outcomes)
+                for outcomes in tables.outcomes
+            ]
+        )
+        hands.append(
+            [max(keeps[-1][keep] for keep in hand_keeps) for hand_keeps in tables.keeps]
+        )
+    return _Expectations(hands, keeps)
+
+
+def _open_categories(scorecard: Scorecard) -> list[Category]:
+    return [
+        category
+        for category in Category
+        if not category.is_bonus and not scorecard.is_scored(category)
+    ]
+
+
+def set_transposition_table(table: TranspositionTable | None) -> None:
+    """Keep the hints in this table, None for a new in-process table"""
+    global _positions
+    _positions = table
+
+
+def transposition_table() -> TranspositionTable:
+    global _positions
+    if _positions is None:
+        _positions = TranspositionTable()
+    return _positions
+
+
+def hint(dices: Dices, scorecard: Scorecard, rolls_left: int) -> Hint:
+    """Expected scores of the open categories, and the best dices to keep"""
+    position = Position.of(dices, scorecard, rolls_left)
+    # the hints do not depend on the scores of the scored lines
+    key = dataclasses.replace(position, upper_score=0, yahtzee=0).key
+    table = transposition_table()
+    packed = table.get(key)
+    if packed is None:
+        packed = _analyse(position, scorecard)
+        table.put(key, packed)
+    sorted_dices = sorted(dices.all, key=lambda dice: dice.value)
+    return _unpack(packed, rolls_left, tuple(dice.number for dice in sorted_dices))
+
+
+def _analyse(position: Position, scorecard: Scorecard) -> bytes:
+    """Packed hint of a position: the keeps are masks over the sorted hand"""
+    rolls_left, hand = position.rolls_left, position.hand
+    categories = _open_categories(scorecard)
+    expectations = [_expectations(category) for category in categories]
+    if hand == NOT_ROLLED:
+        # nothing rolled yet: every dice goes in the next roll
+        lines = [
+            (category, _NO_SCORE, expected.keeps[rolls_left][0])
+            for category, expected in zip(categories, expectations)
+        ]
+        return _pack(_by_expected(lines), [])
+    lines = [
+        (category, int(expected.hands[0][hand]), expected.hands[rolls_left][hand])
+        for category, expected in zip(categories, expectations)
+    ]
+    keeps = _keeps(_tables().keeps[hand], categories, expectations, rolls_left)
+    return _pack(_by_expected(lines), keeps)
+
+
+def _by_expected(
+    lines: list[tuple[Category, int, float]]
+) -> list[tuple[Category, int, float]]:
+    return sorted(lines, key=lambda line: line[2], reverse=True)
+
+
+def _keeps(
+    hand_keeps: list[int],
+    categories: list[Category],
+    expectations: list[_Expectations],
+    rolls_left: int,
+) -> list[tuple[int, Category, float]]:
+    """Best category and expected score of each keep mask over the sorted hand"""
+    if not rolls_left or not categories:
+        return []
+    columns = list(
+        zip(categories, (expected.keeps[rolls_left] for expected in expectations))
+    )
+    seen = set()
+    keeps = []
+    for mask, keep in enumerate(hand_keeps):
+        if keep in seen:
+            continue
+        seen.add(keep)
+        best, target = -1.0, categories[0]
+        for category, column in columns:
+            if column[keep] > best:
+                best, target = column[keep], category
+        keeps.append((mask, target, best))
+    keeps.sort(key=lambda keep: keep[2], reverse=True)
+    return keeps
+
+
+def _pack(
+    lines: list[tuple[Category, int, float]], keeps: list[tuple[int, Category, float]]
+) -> bytes:
+    packed = bytearray(_COUNT.pack(len(lines)))
+    for category, score, expected in lines:
+        packed += _LINE.pack(_CATEGORY_CODES[category], score, expected)
+    packed += _COUNT.pack(len(keeps))
+    for mask, category, expected in keeps:
+        packed += _LINE.pack(mask, _CATEGORY_CODES[category], expected)
+    return bytes(packed)
+
+
+@lru_cache(maxsize=_UNPACKED_HINTS)
+def _unpack(packed: bytes, rolls_left: int, numbers: tuple[DiceNumber, ...]) -> Hint:
+    """Hint of a packed one, for the dice numbers of the sorted hand"""
+    (count,) = _COUNT.unpack_from(packed)
+    end = _COUNT.size + count * _LINE.size
+    categories = [
+        CategoryHint(_CATEGORIES[code], None if score == _NO_SCORE else score, expected)
+        for code, score, expected in _LINE.iter_unpack(packed[_COUNT.size : end])
+    ]
+    number_bits = [1 << (number.value - 1) for number in numbers]
+    keeps = [
+        KeepHint(
+            _MASK_NUMBERS[sum(number_bits[bit] for bit in _MASK_BITS[mask])],
+            _CATEGORIES[code],
+            expected,
+        )
+        for mask, code, expected in _LINE.iter_unpack(packed[end + _COUNT.size :])
+    ]
+    return Hint(rolls_left, categories, keeps)
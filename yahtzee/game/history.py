@@ -0,0 +1,117 @@
+"""Point in time boards of a game.
+
+`BoardHistory` indexes a game stream by board version and by round, and
+keeps a `PersistentBoard` checkpoint every `interval` events. The board at
+any point is the closest checkpoint before it, plus at most `interval - 1`
+events: scrubbing through a finished game costs the same at any position.
+
+    history = BoardHistory.from_events(events)
+    history.at_version(42)
+    history.after_round(3)
+"""
+import threading
+from bisect import bisect_right
+from collections.abc import Iterable, Sequence
+
+from . import events as evt
+from .persistent import PersistentBoard
+
+DEFAULT_CHECKPOINT_INTERVAL = 32
+
+
+class BoardHistory:
+    def __init__(self, interval: int = DEFAULT_CHECKPOINT_INTERVAL) -> None:
+        self.interval = interval
+        self._events: list[evt.Event] = []
+        # checkpoints[i] is the board after the first i * interval events
+        self._checkpoints = [PersistentBoard.new()]
+        self._board = self._checkpoints[0]
+        # _version_offsets[v] is the number of events reaching the version v
+        self._version_offsets = [0]
+        # _round_offsets[r - 1] is the number of events starting the round r
+        self._round_offsets: list[int] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_events(
+        cls, events: Iterable[evt.Event], interval: int = DEFAULT_CHECKPOINT_INTERVAL
+    ) -> "BoardHistory":
+        history = cls(interval)
+        history.extend(events)
+        return history
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @property
+    def board(self) -> PersistentBoard:
+        """The latest board"""
+        return self._board
+
+    @property
+    def version(self) -> int:
+        return self._board.version
+
+    @property
+    def rounds(self) -> int:
+        return len(self._round_offsets)
+
+    def extend(self, events: Iterable[evt.Event]) -> None:
+        """Index the events following the ones already indexed"""
+        board = self._board
+        for event in events:
+            board = board.apply(event)
+            self._events.append(event)
+            offset = len(self._events)
+            if board.version == len(self._version_offsets):
+                self._version_offsets.append(offset)
+            match event:
+                case evt.GameStarted():
+                    self._round_offsets.append(offset)
+                case evt.TurnChanged(round_number=round_number):
+                    if round_number > len(self._round_offsets):
+                        self._round_offsets.append(offset)
+            if offset % self.interval == 0:
+                self._checkpoints.append(board)
+        self._board = board
+
+    def catch_up(self, events: Sequence[evt.Event]) -> None:
+        """Index the events of the whole stream not yet indexed, once even when
+        many threads catch up at once
+        """
+        with self._lock:
+            self.extend(events[len(self._events) :])
+
+    def at_offset(self, offset: int) -> PersistentBoard:
+        """The board after the first `offset` events"""
+        if not 0 <= offset <= len(self._events):
+            raise IndexError(f"No offset {offset} in {len(self._events)} events")
+        if offset == len(self._events):
+            return self._board
+        checkpoint = offset // self.interval
+        start = checkpoint * self.interval
+        return self._checkpoints[checkpoint].apply_all(self._events[start:offset])
+
+    def at_version(self, version: int) -> PersistentBoard:
+        """The board as soon as it reached the `version`"""
+        if not 0 <= version < len(self._version_offsets):
+            raise IndexError(f"No version {version}, last is {self.version}")
+        return self.at_offset(self._version_offsets[version])
+
+    def after_round(self, round_number: int) -> PersistentBoard:
+        """The board once the round is over: at the start of the next round,
+        or at the end of the game for the last round
+        """
+        if not 1 <= round_number <= len(self._round_offsets):
+            raise IndexError(f"No round {round_number}, last is {self.rounds}")
+        if round_number == len(self._round_offsets):
+            return self._board
+        return self.at_offset(self._round_offsets[round_number])
+
+    def round_at(self, offset: int) -> int:
+        """Round being played after the first `offset` events, 0 before the start"""
+        return bisect_right(self._round_offsets, offset)
+
+    @property
+    def events(self) -> Sequence[evt.Event]:
+        return self._events
@@ -0,0 +1,139 @@
+"""Persistent board for cheap branching.
+
+Applying an event to a `PersistentBoard` returns a new board sharing all the
+unchanged players, scorecards and dices with the previous one, so many
+"what if" branches can be evaluated from the same position.
+"""
+import dataclasses
+from collections.abc import Iterable, Mapping
+from functools import singledispatchmethod
+from uuid import UUID
+
+from ..lazy import getLogger
+from . import events as evt
+from .board import Board, GameOver, GameStatus, Round
+from .dices import Dice, Dices
+from .players import Player
+from .score import Category, Scorecard
+
+logger = getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class PersistentBoard:
+    players: tuple[Player, ...]
+    status: GameStatus
+    round: Round | GameOver
+    dices: Dices
+    game_id: UUID
+    version: int
+    seats: Mapping[str, int]
+    rules: str
+
+    @classmethod
+    def new(cls) -> "PersistentBoard":
+        return cls.from_board(Board.new())
+
+    @classmethod
+    def from_board(cls, board: Board) -> "PersistentBoard":
+        """Snapshot of a mutable board"""
+        players = tuple(
+            Player(player.name, _copy(player.scorecard)) for player in board.players
+        )
+        round = board.round
+        if isinstance(round, Round) and players:
+            round = round.with_players(players)
+        return cls(
+            players=players,
+            status=board.status,
+            round=round,
+            dices=board.dices,
+            game_id=board.game_id,
+            version=board.version,
+            seats=dict(board.seats),
+            rules=board.rules,
+        )
+
+    def apply_all(self, events: Iterable[evt.Event]) -> "PersistentBoard":
+        board = self
+        for event in events:
+            board = board.apply(event)
+        return board
+
+    def has_player(self, player_name: str) -> bool:
+        return player_name in self.seats
+
+    def get_player(self, player_name: str) -> Player:
+        return self.players[self.seats[player_name]]
+
+    @property
+    def playing_player(self) -> Player:
+        return self.round.current_player
+
+    def _next(self, **changes) -> "PersistentBoard":
+        return dataclasses.replace(self, version=self.version + 1, **changes)
+
+    @singledispatchmethod
+    def apply(self, event: evt.Event, /) -> "PersistentBoard":
+        logger.warning("Unapplyable event %s", event)
+        return self
+
+    @apply.register
+    def game_created(self, event: evt.GameCreated, /):
+        return dataclasses.replace(
+            self, game_id=event.game, status=GameStatus.PENDING, rules=event.rules
+        )
+
+    @apply.register
+    def player_added(self, event: evt.PlayerAdded, /):
+        seats = {**self.seats, event.player: len(self.players)}
+        return self._next(players=(*self.players, Player(event.player)), seats=seats)
+
+    @apply.register
+    def game_started(self, _: evt.GameStarted, /):
+        return self._next(
+            status=GameStatus.STARTED, round=Round.from_players(self.players)
+        )
+
+    @apply.register
+    def points_scored(self, event: evt.PointsScored, /):
+        seat = self.seats[event.player]
+        player = self.players[seat]
+        scorecard = player.scorecard.with_score(Category(event.category), event.points)
+        players = (
+            *self.players[:seat],
+            Player(player.name, scorecard),
+            *self.players[seat + 1 :],
+        )
+        round = self.round
+        if isinstance(round, Round):
+            round = round.with_players(players)
+        return self._next(players=players, round=round)
+
+    @apply.register
+    def dice_changed(self, event: evt.DicePositionChanged, /):
+        dice = Dice.from_literal(event.number, event.value, event.position)
+        return self._next(dices=self.dices.update(dice))
+
+    @apply.register
+    def turn_changed(self, event: evt.TurnChanged, /):
+        seat = self.seats[event.new_player]
+        round = Round.from_players(self.players, event.round_number, seat)
+        return self._next(round=round)
+
+    @apply.register
+    def roll_performed(self, event: evt.RollPerformed, /):
+        round = self.round
+        if isinstance(round, Round):
+            round = round.with_attempt(event.attempt_nb)
+        return self._next(round=round)
+
+    @apply.register
+    def game_ended(self, _: evt.GameEnded, /):
+        return self._next(status=GameStatus.OVER)
+
+
+def _copy(scorecard: Scorecard) -> Scorecard:
+    copied = Scorecard()
+    copied.lines.update(scorecard.lines)
+    return copied
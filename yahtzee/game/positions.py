@@ -0,0 +1,72 @@
+"""Canonical positions of a player turn.
+
+Many turns of many games are the same situation for an analysis: the same
+categories scored, the same upper section subtotal, the same multiset of
+dice values and the same rolls left. A `Position` is that situation: the
+player, the dice numbers and the scores of the lines are forgotten, but for
+the upper subtotal and the Yahtzee line. Its `key` is a 31 bits fingerprint,
+equal for equal positions.
+"""
+import dataclasses
+from itertools import combinations_with_replacement
+
+from .board import PlayerTurn
+from .dices import Dices
+from .score import Category, Score, Scorecard
+
+# index of the sorted values of a hand, in the order of `hints`
+HANDS: dict[tuple[int, ...], int] = {
+    hand: index
+    for index, hand in enumerate(combinations_with_replacement(range(1, 7), 5))
+}
+# hand of the dices not all on the table
+NOT_ROLLED = len(HANDS)
+
+_CATEGORIES = tuple(category for category in Category if not category.is_bonus)
+# the upper categories come first
+_UPPER_CATEGORIES = _CATEGORIES[:6]
+# an upper section subtotal past the bonus threshold is the same
+_UPPER_BONUS_THRESHOLD = 63
+# Yahtzee line: open, scratched, scored
+_YAHTZEE_STATES = {None: 0, 0: 1}
+
+
+@dataclasses.dataclass(frozen=True)
+class Position:
+    scored: int  # bit mask of the scored categories, in the `Category` order
+    upper_score: Score  # upper section subtotal, up to the bonus threshold
+    yahtzee: int  # state of the Yahtzee line
+    hand: int  # index of the sorted dice values, NOT_ROLLED before a roll
+    rolls_left: int
+
+    @classmethod
+    def of(cls, dices: Dices, scorecard: Scorecard, rolls_left: int) -> "Position":
+        scores = [scorecard.lines[category].score for category in _CATEGORIES]
+        scored = sum(1 << bit for bit, score in enumerate(scores) if score is not None)
+        upper_score = sum(score for score in scores[: len(_UPPER_CATEGORIES)] if score)
+        yahtzee = _YAHTZEE_STATES.get(scorecard.lines[Category.YAHTZEE].score, 2)
+        if dices.all_on_the_table:
+            hand = HANDS[tuple(sorted([dice.value for dice in dices.all]))]
+        else:
+            hand = NOT_ROLLED
+        return cls(
+            scored,
+            min(upper_score, _UPPER_BONUS_THRESHOLD),
+            yahtzee,
+            hand,
+            rolls_left,
+        )
+
+    @classmethod
+    def of_turn(cls, dices: Dices, turn: PlayerTurn) -> "Position":
+        return cls.of(dices, turn.player.scorecard, turn.rolls_left)
+
+    @property
+    def key(self) -> int:
+        return (
+            self.scored
+            | self.upper_score << 13
+            | self.yahtzee << 19
+            | self.hand << 21
+            | self.rolls_left << 29
+        )
@@ -0,0 +1,148 @@
+"""Scoring rules of the games, compiled to lookup tables.
+
+A `RuleSet` is a variant of the scoring rules, chosen when the game is
+created. It is compiled on first use to a table giving, for each of the 252
+hands of five dices and each state of the Yahtzee line of the scorecard (the
+only part of the scorecard the scores depend on), the points of every
+category. Scoring a roll is then a single lookup, whatever the variant.
+
+Yahtzee bonus: a Yahtzee rolled once the Yahtzee line is scored 50 gives
+`yahtzee_bonus` more points.
+
+Joker: a Yahtzee rolled once the Yahtzee line is scored (50 or 0) is a joker,
+scoring the full house and the straights at their full value. A forced joker
+goes to the upper category of its dices if open, else to any lower category,
+else to any upper category. A free joker goes anywhere.
+"""
+import dataclasses
+from collections.abc import Mapping
+from enum import Enum
+from functools import cache
+from itertools import combinations_with_replacement
+
+from .dices import Combination, Dices, DiceValue
+from .score import Category, Score, Scorecard
+
+STANDARD = "standard"
+
+Hand = tuple[int, ...]
+
+_CATEGORIES = tuple(category for category in Category if not category.is_bonus)
+_UPPER_CATEGORIES = (
+    Category.ACES,
+    Category.TWOS,
+    Category.THREES,
+    Category.FOURS,
+    Category.FIVES,
+    Category.SIXES,
+)
+_LOWER_CATEGORIES = tuple(
+    category for category in _CATEGORIES if category not in _UPPER_CATEGORIES
+)
+# lower categories a joker scores at their best value
+_JOKER_CATEGORIES = (
+    Category.FULL_HOUSE,
+    Category.SMALL_STRAIGHT,
+    Category.LARGE_STRAIGHT,
+)
+
+
+class Joker(Enum):
+    NONE = "none"
+    FORCED = "forced"
+    FREE = "free"
+
+
+@dataclasses.dataclass(frozen=True)
+class RuleSet:
+    name: str
+    yahtzee_bonus: Score = 0
+    joker: Joker = Joker.NONE
+
+
+RULES: dict[str, RuleSet] = {
+    rules.name: rules
+    for rules in (
+        RuleSet(STANDARD),
+        RuleSet("official", yahtzee_bonus=100, joker=Joker.FORCED),
+        # house variants
+        RuleSet("yahtzee-bonus", yahtzee_bonus=100),
+        RuleSet("free-joker", yahtzee_bonus=100, joker=Joker.FREE),
+    )
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class Outcome:
+    """Points of a hand in every category"""
+
+    points: Mapping[Category, Score]
+    bonus: Score = 0
+    # upper category a forced joker must take, None if the hand is no joker
+    joker: Category | None = None
+
+
+class Rules:
+    """A compiled rule set"""
+
+    def __init__(self, rule_set: RuleSet) -> None:
+        self.rule_set = rule_set
+        self._outcomes = _compile(rule_set)
+
+    def outcome(self, dices: Dices, scorecard: Scorecard) -> Outcome:
+        hand = tuple(sorted([dice.points for dice in dices.all]))
+        return self._outcomes[hand, scorecard[Category.YAHTZEE]]
+
+    def refusal(
+        self, outcome: Outcome, category: Category, scorecard: Scorecard
+    ) -> str | None:
+        """Why the outcome can't be scored in the category, None if it can"""
+        if outcome.joker is None or self.rule_set.joker is not Joker.FORCED:
+            return None
+        if not scorecard.is_scored(outcome.joker):
+            if category is not outcome.joker:
+                return f"you must score your Yahtzee in {outcome.joker.value}"
+        elif category in _UPPER_CATEGORIES and not all(
+            scorecard.is_scored(lower) for lower in _LOWER_CATEGORIES
+        ):
+            return "you must score your Yahtzee in the lower section"
+        return None
+
+
+def rules(name: str) -> Rules:
+    """Compiled rules of a variant, KeyError if unknown"""
+    return _rules(RULES[name])
+
+
+@cache
+def _rules(rule_set: RuleSet) -> Rules:
+    return Rules(rule_set)
+
+
+def _compile(rule_set: RuleSet) -> dict[tuple[Hand, Score | None], Outcome]:
+    hands = list(combinations_with_replacement(range(1, 7), 5))
+    points = {
+        hand: {
+            category: Combination(category.value).score([DiceValue(v) for v in hand])
+            for category in _CATEGORIES
+        }
+        for hand in hands
+    }
+    best = {
+        category: max(scores[category] for scores in points.values())
+        for category in _JOKER_CATEGORIES
+    }
+    yahtzee = max(scores[Category.YAHTZEE] for scores in points.values())
+    outcomes: dict[tuple[Hand, Score | None], Outcome] = {}
+    for hand, scores in points.items():
+        outcome = Outcome(scores)
+        outcomes[hand, None] = outcomes[hand, 0] = outcomes[hand, yahtzee] = outcome
+        if scores[Category.YAHTZEE] != yahtzee:
+            continue
+        joker = None
+        if rule_set.joker is not Joker.NONE:
+            scores = {**scores, **best}
+            joker = _UPPER_CATEGORIES[hand[0] - 1]
+        outcomes[hand, 0] = Outcome(scores, 0, joker)
+        outcomes[hand, yahtzee] = Outcome(scores, rule_set.yahtzee_bonus, joker)
+    return outcomes
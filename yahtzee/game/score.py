@@ -1,3 +1,4 @@
+import copy
 import dataclasses
 from collections.abc import Iterator
 from enum import Enum
@@ -61,6 +62,10 @@ class ScoreLine:
         return self.category.is_bonus
 
 
+# score lines are immutable, all the blank scorecards share them
+_BLANK_LINES = {category: ScoreLine(category) for category in Category}
+
+
 @dataclasses.dataclass(frozen=True)
 class Scorecard:
     lines: dict[Category, ScoreLine] = dataclasses.field(default_factory=dict)
@@ -69,8 +74,7 @@ class Scorecard:
         return self.lines[category].is_scored
 
     def __post_init__(self):
-        for category in Category:
-            self.lines[category] = ScoreLine(category)
+        self.lines.update(_BLANK_LINES)
 
     def __iter__(self) -> Iterator[ScoreLine]:
         return iter(self.lines.values())
@@ -83,6 +87,13 @@ class Scorecard:
         self.lines[category] = ScoreLine(category, score)
         self._set_upper_section_bonus()
 
+    def with_score(self, category: Category, score: Score) -> "Scorecard":
+        """Return a scored copy of the scorecard, leaving this one unchanged"""
+        scorecard = copy.copy(self)
+        object.__setattr__(scorecard, "lines", dict(self.lines))
+        scorecard[category] = score
+        return scorecard
+
     def _set_upper_section_bonus(self) -> None:
         if self.lines[Category.UPPER_SECTION_BONUS].is_scored:
             return
@@ -0,0 +1,183 @@
+"""Size-bounded table of analysed positions, shared by threads and processes.
+
+A transposition table maps the key of a position (see `positions`) to the
+encoded result of its analysis, so a position reached again, in any game, is
+not analysed again. The table is a fixed array of buckets of slots: a key
+goes in the bucket of its hash, and a full bucket replaces one of its slots.
+
+    table = TranspositionTable.shared("yahtzee-hints")  # first process
+    table = TranspositionTable.attach("yahtzee-hints")  # other processes
+
+A shared table lives in a `multiprocessing.shared_memory` segment, left to
+its creator to `unlink`. Writes
+are serialized by a lock in a process, not across processes: each slot has
+the checksum of its key and value, and a slot torn by two processes writing
+together is read as missing. The result of an analysis only depends on the
+position, so a missing one is computed again.
+"""
+import os
+import struct
+import threading
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+
+DEFAULT_SLOTS = 16_384
+DEFAULT_VALUE_SIZE = 498
+BUCKET_SLOTS = 4
+
+_MAGIC = b"YTZT"
+_HEADER = struct.Struct("<4sII")
+# key + 1 (0 is an empty slot), checksum, value length
+_SLOT = struct.Struct("<QIH")
+_HASH = 0x9E3779B97F4A7C15
+_MAX_KEY = 2**63
+
+
+def _untrack(memory: shared_memory.SharedMemory) -> None:
+    """Keep the segment when a process using it exits, it is unlinked explicitly"""
+    if os.name == "posix":
+        resource_tracker.unregister(memory._name, "shared_memory")  # type: ignore[attr-defined]
+
+
+def _buffer(memory: shared_memory.SharedMemory) -> memoryview:
+    if memory.buf is None:
+        raise ValueError(f"{memory.name} is closed")
+    return memory.buf
+
+
+def _checksum(stored: int, value: bytes) -> int:
+    return zlib.crc32(value, zlib.crc32(stored.to_bytes(8, "little")))
+
+
+class TranspositionTable:
+    def __init__(
+        self,
+        slots: int = DEFAULT_SLOTS,
+        value_size: int = DEFAULT_VALUE_SIZE,
+        *,
+        _memory: shared_memory.SharedMemory | None = None,
+    ) -> None:
+        """An in-process table, see `shared` and `attach` for the shared ones"""
+        self.value_size = value_size
+        self.slots = slots - slots % BUCKET_SLOTS or BUCKET_SLOTS
+        self.hits = 0
+        self.misses = 0
+        self._slot_size = _SLOT.size + value_size
+        size = _HEADER.size + self.slots * self._slot_size
+        self._memory = _memory
+        self._buffer = (
+            memoryview(bytearray(size)) if _memory is None else _buffer(_memory)
+        )
+        self._buckets = self.slots // BUCKET_SLOTS
+        self._replaced = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(
+        cls,
+        name: str | None = None,
+        slots: int = DEFAULT_SLOTS,
+        value_size: int = DEFAULT_VALUE_SIZE,
+    ) -> "TranspositionTable":
+        """Create a table in a new shared memory segment"""
+        slots = slots - slots % BUCKET_SLOTS or BUCKET_SLOTS
+        size = _HEADER.size + slots * (_SLOT.size + value_size)
+        memory = shared_memory.SharedMemory(name, create=True, size=size)
+        _untrack(memory)
+        _HEADER.pack_into(_buffer(memory), 0, _MAGIC, slots, value_size)
+        return cls(slots, value_size, _memory=memory)
+
+    @classmethod
+    def attach(cls, name: str) -> "TranspositionTable":
+        """Table of the shared memory segment created by another process"""
+        memory = shared_memory.SharedMemory(name)
+        _untrack(memory)
+        magic, slots, value_size = _HEADER.unpack_from(_buffer(memory))
+        if magic != _MAGIC:
+            memory.close()
+            raise ValueError(f"{name} is not a transposition table")
+        return cls(slots, value_size, _memory=memory)
+
+    @property
+    def name(self) -> str | None:
+        """Name of the shared memory segment, None for an in-process table"""
+        return None if self._memory is None else self._memory.name
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buffer)
+
+    def __len__(self) -> int:
+        return sum(
+            _SLOT.unpack_from(self._buffer, self._offset(slot))[0] != 0
+            for slot in range(self.slots)
+        )
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER.size + slot * self._slot_size
+
+    def _bucket(self, key: int) -> range:
+        first = (key * _HASH & 0xFFFFFFFFFFFFFFFF) % self._buckets * BUCKET_SLOTS
+        return range(first, first + BUCKET_SLOTS)
+
+    def get(self, key: int) -> bytes | None:
+        buffer = self._buffer
+        stored = key + 1
+        for slot in self._bucket(key):
+            offset = self._offset(slot)
+            slot_key, checksum, length = _SLOT.unpack_from(buffer, offset)
+            if slot_key != stored:
+                continue
+            start = offset + _SLOT.size
+            value = bytes(buffer[start : start + length])
+            if _checksum(stored, value) == checksum:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key: int, value: bytes) -> None:
+        if not 0 <= key < _MAX_KEY:
+            raise ValueError(f"Key {key} out of range")
+        if len(value) > self.value_size:
+            raise ValueError(f"{len(value)} bytes value, at most {self.value_size}")
+        buffer = self._buffer
+        stored = key + 1
+        with self._lock:
+            bucket = self._bucket(key)
+            target = None
+            for slot in bucket:
+                slot_key = _SLOT.unpack_from(buffer, self._offset(slot))[0]
+                if slot_key == stored or (slot_key == 0 and target is None):
+                    target = slot
+            if target is None:
+                self._replaced = (self._replaced + 1) % BUCKET_SLOTS
+                target = bucket[self._replaced]
+            offset = self._offset(target)
+            # the slot is empty while written
+            _SLOT.pack_into(buffer, offset, 0, 0, 0)
+            start = offset + _SLOT.size
+            buffer[start : start + len(value)] = value
+            _SLOT.pack_into(
+                buffer, offset, stored, _checksum(stored, value), len(value)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in range(self.slots):
+                _SLOT.pack_into(self._buffer, self._offset(slot), 0, 0, 0)
+            self.hits = self.misses = 0
+
+    def close(self) -> None:
+        """Detach from the shared memory segment"""
+        if self._memory is not None:
+            self._buffer.release()
+            self._memory.close()
+
+    def unlink(self) -> None:
+        """Destroy the shared memory segment, once every process closed it"""
+        if self._memory is not None:
+            if os.name == "posix":
+                # unlinking unregisters the segment
+                resource_tracker.register(self._memory._name, "shared_memory")  # type: ignore[attr-defined]
+            self._memory.unlink()
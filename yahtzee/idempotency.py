@@ -0,0 +1,141 @@
+"""Results of the recent commands, by request id.
+
+A client retrying a command after a timeout sends it again with the same
+`request_id`. The result of the first execution is returned and the command
+is not executed again: a retried roll does not roll the dices twice, and a
+retried rejected command does not log its error twice. A copy sent while
+the first one still runs waits for its result.
+
+The last `per_game` results of the `max_games` games last played are kept,
+a game creation counting as a game.
+"""
+import threading
+from collections import OrderedDict
+from uuid import UUID
+
+from .commands import Command, GameCommand
+from .result import Err, Result
+
+DEFAULT_PER_GAME = 16
+DEFAULT_MAX_GAMES = 10_000
+
+
+class _Pending:
+    """Result of a command, set once its first execution is over.
+    Not a `concurrent.futures.Future`, which would import `logging` eagerly.
+    """
+
+    def __init__(self) -> None:
+        self._done = threading.Event()
+        self._result: Result | None = None
+        self._error: BaseException | None = None
+
+    def set_result(self, result: Result) -> None:
+        self._result = result
+        self._done.set()
+
+    def set_exception(self, error: BaseException) -> None:
+        self._error = error
+        self._done.set()
+
+    def result(self) -> Result:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        assert self._result is not None
+        return self._result
+
+
+class RecentResults:
+    def __init__(
+        self, per_game: int = DEFAULT_PER_GAME, max_games: int = DEFAULT_MAX_GAMES
+    ) -> None:
+        self._per_game = per_game
+        self._max_games = max_games
+        # game (request id of a game creation) -> request id -> command, result
+        self._games: OrderedDict[
+            UUID | str, OrderedDict[str, tuple[Command, _Pending]]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(results) for results in self._games.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._games.clear()
+
+    def reserve(self, command: Command) -> "Result | Reservation":
+        """Result of the first execution of the command, waiting for it while
+        it runs. A reservation when the command was not recently run: its
+        result must then be given to it, or it must be released.
+        """
+        assert command.request_id is not None
+        game = _game(command)
+        with self._lock:
+            results = self._games.get(game)
+            if results is None:
+                results = self._games[game] = OrderedDict()
+                if len(self._games) > self._max_games:
+                    self._games.popitem(last=False)
+            else:
+                self._games.move_to_end(game)
+            if command.request_id not in results:
+                pending = _Pending()
+                results[command.request_id] = (command, pending)
+                if len(results) > self._per_game:
+                    results.popitem(last=False)
+                return Reservation(self, command, pending)
+            results.move_to_end(command.request_id)
+            first, pending = results[command.request_id]
+        if first != command:
+            return Err(f"Request {command.request_id} was already used by {first}")
+        return pending.result()
+
+    def _drop(self, command: Command, pending: _Pending) -> None:
+        """Forget a reserved command, unless it was evicted meanwhile"""
+        assert command.request_id is not None
+        with self._lock:
+            results = self._games.get(_game(command), OrderedDict())
+            entry = results.get(command.request_id)
+            if entry is not None and entry[1] is pending:
+                del results[command.request_id]
+
+
+class Reservation:
+    """First execution of a command, whose result its copies wait for.
+    The copies already waiting get the result even when the command was
+    evicted from the recent results while it ran.
+    """
+
+    def __init__(
+        self, results: RecentResults, command: Command, pending: _Pending
+    ) -> None:
+        self._results = results
+        self._command = command
+        self._pending = pending
+
+    def add(self, result: Result) -> None:
+        """Result of the command, given to its copies"""
+        self._pending.set_result(result)
+
+    def forget(self, result: Result) -> None:
+        """Result of the command given to its copies, not kept: a later copy
+        runs it again
+        """
+        self._results._drop(self._command, self._pending)
+        self._pending.set_result(result)
+
+    def release(self, error: BaseException) -> None:
+        """Forget the command which failed: its copies fail too, and a later
+        copy runs it again
+        """
+        self._results._drop(self._command, self._pending)
+        self._pending.set_exception(error)
+
+
+def _game(command: Command) -> UUID | str:
+    if isinstance(command, GameCommand):
+        return command.game
+    assert command.request_id is not None
+    return command.request_id
@@ -0,0 +1,24 @@
+"""Deferred imports, to keep the cold start of the package cheap.
+
+`logging` costs about as much to import as the whole game model, yet our
+modules only log on error paths. `getLogger` returns a logger importing
+`logging` the first time something is logged.
+"""
+from typing import TYPE_CHECKING, Any, cast
+
+if TYPE_CHECKING:
+    from logging import Logger
+
+
+class LazyLogger:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __getattr__(self, attribute: str) -> Any:
+        import logging
+
+        return getattr(logging.getLogger(self.name), attribute)
+
+
+def getLogger(name: str) -> "Logger":
+    return cast("Logger", LazyLogger(name))
@@ -0,0 +1,388 @@
+"""Events store keeping each game stream as a packed byte buffer.
+
+`PackedEventsStore` is an in-memory store for many games: the events of a
+game are encoded in a single `bytearray`, the game uuid being stored once
+for the stream, and are decoded when read. Most events take 1 to 4 bytes:
+
+    DicePositionChanged   1 byte: number, position and value in the event code
+    RollPerformed         code, attempt
+    TurnChanged           code, seat of the player, round
+    PointsScored          code, seat of the player, category, points
+    PlayerAdded           code, name (the seat of the player is its order)
+
+Integers are varints; a player name is inlined where a seat is expected when
+the player was not added to the game.
+
+`get_game_events` returns a lazy sequence: its length is known without
+decoding, and the events are decoded on first access. Equal events of a
+decoded stream are shared instances. The decoded events of the games read
+last are kept, so replaying the games being played decodes nothing.
+"""
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextlib import ExitStack
+from typing import overload
+from uuid import UUID
+
+from .game import events as evt
+from .game.dices import DicePosition
+from .game.score import Category
+from .repository import DEFAULT_LOCK_STRIPES, Change
+
+_GAME_CREATED = 0
+_GAME_STARTED = 1
+_GAME_ENDED = 2
+_PLAYER_ADDED = 3
+_POINTS_SCORED = 4
+_TURN_CHANGED = 5
+_ROLL_PERFORMED = 6
+# code of a dice event: _DICE + (number - 1) * 18 + position * 6 + value - 1
+_DICE = 16
+
+_CATEGORIES = tuple(category.value for category in Category)
+_CATEGORY_CODES = {category: code for code, category in enumerate(_CATEGORIES)}
+_POSITIONS = tuple(position.value for position in DicePosition)
+_POSITION_CODES = {position: code for code, position in enumerate(_POSITIONS)}
+# seat of a player inlined by name
+_NO_SEAT = 0
+
+# games whose decoded events are kept
+DEFAULT_HOT_GAMES = 1024
+
+
+def _varint(value: int, data: bytearray) -> None:
+    while value > 0x7F:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def _string(value: str, data: bytearray) -> None:
+    encoded = value.encode()
+    _varint(len(encoded), data)
+    data += encoded
+
+
+class _Stream:
+    """Encoded events of a game"""
+
+    __slots__ = ("data", "count", "seats", "added", "decoded")
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.count = 0
+        # player name -> seat, from 1 in the order of the PlayerAdded events
+        self.seats: dict[str, int] = {}
+        self.added = 0
+        # events decoded last read, appended to while the game is hot
+        self.decoded: list[evt.Event] | None = None
+
+    def append(self, event: evt.Event) -> None:
+        data = self.data
+        match event:
+            case evt.DicePositionChanged(number=number, position=position, value=value):
+                position_code = _POSITION_CODES[position]
+                data.append(_DICE + (number - 1) * 18 + position_code * 6 + value - 1)
+            case evt.RollPerformed(attempt_nb=attempt):
+                data.append(_ROLL_PERFORMED)
+                _varint(attempt, data)
+            case evt.TurnChanged(new_player=player, round_number=round_number):
+                data.append(_TURN_CHANGED)
+                self._player(player)
+                _varint(round_number, data)
+            case evt.PointsScored(player=player, category=category, points=points):
+                data.append(_POINTS_SCORED)
+                self._player(player)
+                data.append(_CATEGORY_CODES[category])
+                _varint(points, data)
+            case evt.PlayerAdded(player=player):
+                data.append(_PLAYER_ADDED)
+                _string(player, data)
+                self.added += 1
+                # names are shared by the streams
+                self.seats[sys.intern(player)] = self.added
+            case evt.GameCreated(rules=rules):
+                data.append(_GAME_CREATED)
+                _string(rules, data)
+            case evt.GameStarted():
+                data.append(_GAME_STARTED)
+            case evt.GameEnded():
+                data.append(_GAME_ENDED)
+            case _:
+                raise TypeError(f"Can't pack {event}")
+        self.count += 1
+
+    def _player(self, player: str) -> None:
+        seat = self.seats.get(player)
+        if seat is None:
+            self.data.append(_NO_SEAT)
+            _string(player, self.data)
+        else:
+            _varint(seat, self.data)
+
+
+def decode(game: UUID, data: bytes) -> list[evt.Event]:
+    """Decode the events of a packed stream"""
+    events: list[evt.Event] = []
+    append = events.append
+    players: list[str] = []
+    # equal dice and roll events share an instance
+    shared: dict[int, evt.Event] = {}
+    size = len(data)
+    i = 0
+
+    def varint() -> int:
+        nonlocal i
+        value = shift = 0
+        while True:
+            byte = data[i]
+            i += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def string() -> str:
+        nonlocal i
+        length = varint()
+        i += length
+        return data[i - length : i].decode()
+
+    def player() -> str:
+        seat = varint()
+        return players[seat - 1] if seat != _NO_SEAT else string()
+
+    while i < size:
+        code = data[i]
+        if code >= _DICE:
+            event = shared.get(code)
+            if event is None:
+                number, rest = divmod(code - _DICE, 18)
+                position, value = divmod(rest, 6)
+                event = shared[code] = evt.DicePositionChanged(
+                    game, number + 1, _POSITIONS[position], value + 1  # type: ignore[arg-type]
+                )
+            append(event)
+            i += 1
+            continue
+        # single byte seat and integers, the common case
+        if code == _POINTS_SCORED:
+            seat, category, points = data[i + 1 : i + 4]
+            if seat and seat < 0x80 and points < 0x80:
+                append(
+                    evt.PointsScored(
+                        game, players[seat - 1], _CATEGORIES[category], points
+                    )
+                )
+                i += 4
+                continue
+        elif code == _TURN_CHANGED:
+            seat, round_number = data[i + 1 : i + 3]
+            if seat and seat < 0x80 and round_number < 0x80:
+                append(evt.TurnChanged(game, players[seat - 1], round_number))
+                i += 3
+                continue
+        i += 1
+        if code == _ROLL_PERFORMED:
+            key = -data[i]
+            event = shared.get(key)
+            if event is None:
+                event = evt.RollPerformed(game, varint())
+                shared[key] = event
+            else:
+                i += 1
+            append(event)
+        elif code == _TURN_CHANGED:
+            name = player()
+            append(evt.TurnChanged(game, name, varint()))
+        elif code == _POINTS_SCORED:
+            name = player()
+            category = data[i]
+            i += 1
+            append(evt.PointsScored(game, name, _CATEGORIES[category], varint()))
+        elif code == _PLAYER_ADDED:
+            name = sys.intern(string())
+            players.append(name)
+            append(evt.PlayerAdded(game, name))
+        elif code == _GAME_CREATED:
+            append(evt.GameCreated(game, string()))
+        elif code == _GAME_STARTED:
+            append(evt.GameStarted(game))
+        elif code == _GAME_ENDED:
+            append(evt.GameEnded(game))
+        else:
+            raise ValueError(f"Unknown event code {code} at {i - 1}")
+    return events
+
+
+class PackedEvents(Sequence[evt.Event]):
+    """Events of a packed stream, decoded on first access"""
+
+    def __init__(
+        self,
+        game: UUID,
+        data: bytes,
+        count: int,
+        events: list[evt.Event] | None = None,
+    ) -> None:
+        self._game = game
+        self._data = data
+        self._count = count
+        self._events = events
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def events(self) -> list[evt.Event]:
+        if self._events is None:
+            self._events = decode(self._game, self._data)
+        return self._events
+
+    @overload
+    def __getitem__(self, index: int) -> evt.Event:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[evt.Event]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> evt.Event | list[evt.Event]:
+        return self.events[index]
+
+    def __iter__(self) -> Iterator[evt.Event]:
+        return iter(self.events)
+
+
+class PackedEventsStore:
+    """In memory store of packed streams, safe to use from many threads.
+
+    Locking is the one of `InMemoryEventsStore`. The change feed is packed
+    too: the index of the game and the offset of the event in the stream.
+    """
+
+    def __init__(
+        self, stripes: int = DEFAULT_LOCK_STRIPES, hot_games: int = DEFAULT_HOT_GAMES
+    ) -> None:
+        self._streams: dict[UUID, _Stream] = {}
+        self._hot: OrderedDict[UUID, _Stream] = OrderedDict()
+        self._hot_games = hot_games
+        self._hot_lock = threading.Lock()
+        # None for the deleted games
+        self._game_ids: list[UUID | None] = []
+        self._game_index: dict[UUID, int] = {}
+        self._feed_games = array("I")
+        self._feed_offsets = array("I")
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._feed_lock = threading.Lock()
+
+    def _stripe(self, uuid: UUID) -> threading.Lock:
+        return self._stripes[uuid.int % len(self._stripes)]
+
+    def get_game_events(self, uuid: UUID) -> PackedEvents:
+        with self._stripe(uuid):
+            stream = self._streams.get(uuid)
+            if stream is None:
+                return PackedEvents(uuid, b"", 0)
+            if stream.decoded is None and self._hot_games:
+                stream.decoded = decode(uuid, bytes(stream.data))
+            self._heat(uuid, stream)
+            if stream.decoded is not None:
+                return PackedEvents(uuid, b"", stream.count, list(stream.decoded))
+            return PackedEvents(uuid, bytes(stream.data), stream.count)
+
+    def length(self, uuid: UUID) -> int:
+        with self._stripe(uuid):
+            stream = self._streams.get(uuid)
+            return 0 if stream is None else stream.count
+
+    def _heat(self, uuid: UUID, stream: _Stream) -> None:
+        """Keep the decoded events of the game, forget the coldest ones"""
+        if stream.decoded is None:
+            return
+        with self._hot_lock:
+            self._hot[uuid] = stream
+            self._hot.move_to_end(uuid)
+            while len(self._hot) > self._hot_games:
+                _, cold = self._hot.popitem(last=False)
+                cold.decoded = None
+
+    def add_events(self, uuid: UUID, events: Sequence[evt.Event]) -> None:
+        with self._stripe(uuid):
+            self._append(uuid, events)
+
+    def add_many(self, events_by_game: Mapping[UUID, Sequence[evt.Event]]) -> None:
+        stripes = {
+            id(self._stripe(uuid)): self._stripe(uuid) for uuid in events_by_game
+        }
+        with ExitStack() as stack:
+            for _, stripe in sorted(stripes.items()):
+                stack.enter_context(stripe)
+            for uuid, events in events_by_game.items():
+                self._append(uuid, events)
+
+    def _append(self, uuid: UUID, events: Sequence[evt.Event]) -> None:
+        """Append to a stream, its stripe being locked"""
+        with self._feed_lock:
+            stream = self._streams.get(uuid)
+            if stream is None:
+                stream = self._streams[uuid] = _Stream()
+            index = self._game_index.get(uuid)
+            if index is None:
+                index = self._game_index[uuid] = len(self._game_ids)
+                self._game_ids.append(uuid)
+            start = stream.count
+            for event in events:
+                stream.append(event)
+            if stream.decoded is not None:
+                stream.decoded.extend(events)
+            self._feed_games.extend([index] * len(events))
+            self._feed_offsets.extend(range(start, stream.count))
+
+    def delete_events(self, uuid: UUID) -> None:
+        """Forget the events of a game.
+        The change feed keeps its positions, but not the deleted events.
+        """
+        with self._stripe(uuid), self._feed_lock:
+            if self._streams.pop(uuid, None) is not None:
+                self._game_ids[self._game_index.pop(uuid)] = None
+            with self._hot_lock:
+                self._hot.pop(uuid, None)
+
+    def games(self) -> Iterable[UUID]:
+        with self._feed_lock:
+            return [uuid for uuid, stream in self._streams.items() if stream.count]
+
+    def changes(self, since: int = 0, limit: int | None = None) -> Sequence[Change]:
+        changes: list[Change] = []
+        while True:
+            # the changes of the deleted games are skipped, read on to the limit
+            until = None if limit is None else since + limit - len(changes)
+            with self._feed_lock:
+                games = self._feed_games[since:until]
+                offsets = self._feed_offsets[since:until]
+                head = len(self._feed_games)
+                packed = {}
+                for index in set(games):
+                    uuid = self._game_ids[index]
+                    if uuid is not None:
+                        packed[index] = (uuid, bytes(self._streams[uuid].data))
+            decoded = {
+                index: decode(uuid, data) for index, (uuid, data) in packed.items()
+            }
+            changes.extend(
+                Change(position, packed[index][0], decoded[index][offset])
+                for position, (index, offset) in enumerate(
+                    zip(games, offsets), since + 1
+                )
+                if index in packed
+            )
+            if until is None or until >= head or len(changes) == limit:
+                return changes
+            since = until
+
+    def head(self) -> int:
+        return len(self._feed_games)
@@ -0,0 +1,184 @@
+"""Wire protocol of the game server.
+
+Every message is a frame: a 4 bytes big endian length followed by a JSON
+document. Requests carry an `id` echoed by their response, so a client can
+pipeline many requests on the same connection.
+
+    {"id": 1, "command": {"type": "RollDices", "game": "...", "player": "Bob"}}
+    {"id": 2, "view": "players", "game": "..."}
+    {"id": 1, "ok": true, "value": true}
+    {"id": 2, "ok": false, "error": "..."}
+
+View responses carry the board `version` of the game. A view request with
+`"since": <version>` gets `"unchanged": true` instead of the value while the
+game is still at that version.
+
+    {"id": 3, "view": "players", "game": "...", "since": 12}
+    {"id": 3, "ok": true, "version": 12, "unchanged": true}
+
+A subscription to a game gets the deltas of its state pushed, tagged by the
+id of the subscription request, until it is unsubscribed.
+
+    {"id": 4, "subscribe": "..."}
+    {"id": 4, "ok": true, "value": true}
+    {"subscription": 4, "deltas": [{"kind": "roll", "data": {"attempt": 1}}]}
+    {"id": 5, "unsubscribe": 4}
+"""
+import asyncio
+import dataclasses
+import json
+import struct
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, Literal, get_args, get_origin, get_type_hints
+from uuid import UUID
+
+from . import commands as cmd
+from .result import Err, Ok, Result
+from .viewcache import to_json
+
+if TYPE_CHECKING:
+    from .subscriptions import Delta
+
+MAX_FRAME_SIZE = 1024 * 1024
+
+_FRAME_HEADER = struct.Struct(">I")
+
+COMMANDS: dict[str, type[cmd.Command]] = {
+    command.__name__: command
+    for command in (
+        cmd.CreateGame,
+        cmd.AddPlayer,
+        cmd.StartGame,
+        cmd.EndGame,
+        cmd.RollDices,
+        cmd.Score,
+        cmd.KeepDice,
+    )
+}
+
+# view name -> arguments names
+VIEWS: dict[str, tuple[str, ...]] = {
+    "players": (),
+    "player": ("name",),
+    "current_player": (),
+    "dices": (),
+    "dice": ("number",),
+    "state": (),
+    "hint": (),
+    "rules": (),
+}
+
+
+# command -> field name -> type
+_FIELD_HINTS = {command: get_type_hints(command) for command in COMMANDS.values()}
+
+
+class ProtocolError(Exception):
+    """Malformed frame or message"""
+
+
+def encode(message: dict) -> bytes:
+    return _frame(to_json(message))
+
+
+def encode_view(request_id: Any, version: int, value: bytes | None) -> bytes:
+    """Response to a view request, the view being already serialized.
+    A None `value` tells the view is unchanged since the requested version.
+    """
+    encoded_id = b"%d" % request_id if type(request_id) is int else to_json(request_id)
+    head = b'{"id":%s,"ok":true,"version":%d' % (encoded_id, version)
+    if value is None:
+        return _frame(head + b',"unchanged":true}')
+    return _frame(head + b',"value":' + value + b"}")
+
+
+def encode_deltas(subscription_id: Any, deltas: "Iterable[Delta]") -> bytes:
+    return encode(
+        {"subscription": subscription_id, "deltas": [d.asdict() for d in deltas]}
+    )
+
+
+def _frame(payload: bytes) -> bytes:
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> dict | None:
+    """Read the next message, or None when the stream is closed"""
+    try:
+        header = await reader.readexactly(_FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = _FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame of {size} bytes is too large")
+    try:
+        message = json.loads(await reader.readexactly(size))
+    except (asyncio.IncompleteReadError, ValueError) as error:
+        raise ProtocolError("Malformed frame") from error
+    if not isinstance(message, dict):
+        raise ProtocolError(f"Message is a {type(message).__name__}, not an object")
+    return message
+
+
+def command_to_dict(command: cmd.Command) -> dict:
+    fields = {
+        field.name: getattr(command, field.name)
+        for field in dataclasses.fields(command)  # type: ignore[arg-type]
+    }
+    return {"type": type(command).__name__, **fields}
+
+
+def command_from_dict(data: Any) -> cmd.Command:
+    if not isinstance(data, dict):
+        raise ProtocolError(f"Command is a {type(data).__name__}, not an object")
+    data = dict(data)
+    name = data.pop("type", None)
+    command_type = COMMANDS.get(name) if isinstance(name, str) else None
+    if command_type is None:
+        raise ProtocolError(f"Unknown command {name!r}")
+    hints = _FIELD_HINTS[command_type]
+    for field_name, value in data.items():
+        if field_name not in hints:
+            raise ProtocolError(f"Unknown field {field_name!r} of {name}")
+        data[field_name] = _field_value(field_name, value, hints[field_name])
+    try:
+        return command_type(**data)
+    except TypeError as error:
+        raise ProtocolError(str(error)) from None
+
+
+def parse_game(value: Any) -> UUID:
+    if not isinstance(value, str):
+        raise ProtocolError(f"Game {value!r} is not a string")
+    try:
+        return UUID(value)
+    except ValueError:
+        raise ProtocolError(f"Game {value!r} is not a uuid") from None
+
+
+def _field_value(name: str, value: Any, hint: Any) -> Any:
+    """Value of a command field read from JSON, checked against its type"""
+    if hint is UUID:
+        return parse_game(value)
+    if get_origin(hint) is Literal:
+        choices = get_args(hint)
+        if not any(type(value) is type(c) and value == c for c in choices):
+            raise ProtocolError(f"{name} {value!r} is not one of {choices}")
+        return value
+    if not isinstance(value, get_args(hint) or hint):
+        raise ProtocolError(f"{name} {value!r} is not of type {hint}")
+    return value
+
+
+def result_to_dict(result: Result) -> dict:
+    match result:
+        case Ok():
+            return {"ok": True, "value": result.unwrap()}
+        case Err():
+            return {"ok": False, "error": str(result.err())}
+
+
+def result_from_dict(data: dict) -> Result:
+    if data["ok"]:
+        return Ok(data["value"])
+    return Err(data["error"])
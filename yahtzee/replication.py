@@ -0,0 +1,253 @@
+"""Read replicas fed by the events store change feed.
+
+A `FeedServer` exposes the change feed of the command node store over a local
+socket or pipe. A `Replica` tails it into its own store to serve `GameViews`.
+
+Nothing is unpickled from the peer: a replica sends the position it is at,
+the feed answers with its head and the next changes in the columnar format.
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections.abc import Sequence
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from uuid import UUID
+
+from .columnar import FormatError, decode_changes, encode_changes
+from .repository import Change, EventsStore, InMemoryEventsStore
+from .views import GameViews
+
+logger = logging.getLogger(__name__)
+
+Address = str | tuple[str, int]
+
+DEFAULT_BATCH_SIZE = 1000
+
+_POSITION = struct.Struct(">Q")
+_LOG_RECORD = struct.Struct(">I")
+
+
+class FeedServer:
+    """Serve the change feed of an events store to replicas"""
+
+    def __init__(
+        self,
+        store: EventsStore,
+        address: Address,
+        authkey: bytes | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self._store = store
+        self._listener = Listener(address, authkey=authkey)
+        self._batch_size = batch_size
+        self._closed = threading.Event()
+
+    @property
+    def address(self) -> Address:
+        return self._listener.address
+
+    def serve_forever(self) -> None:
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def start(self) -> threading.Thread:
+        """Serve the feed from a background thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        self._closed.set()
+        self._listener.close()
+
+    def _serve(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    request = conn.recv_bytes(_POSITION.size)
+                except (EOFError, OSError):
+                    return
+                if len(request) != _POSITION.size:
+                    logger.warning("Invalid request of the change feed")
+                    return
+                (since,) = _POSITION.unpack(request)
+                changes = self._store.changes(since, self._batch_size)
+                head = _POSITION.pack(self._store.head())
+                conn.send_bytes(head + encode_changes(changes))
+
+
+class Replica:
+    """Read model kept up to date from a `FeedServer`.
+
+    The applied changes are appended to a log next to the checkpoint, which
+    holds the position of the last applied change and the size of the log,
+    so that a restarted replica rebuilds its store and resumes where it
+    stopped. Saving a checkpoint only writes the changes applied since the
+    previous one.
+    """
+
+    def __init__(
+        self,
+        address: Address,
+        checkpoint: Path | None = None,
+        authkey: bytes | None = None,
+    ) -> None:
+        self._address = address
+        self._authkey = authkey
+        self._checkpoint = checkpoint
+        self._conn: Connection | None = None
+        self.store = InMemoryEventsStore()
+        self.position = 0
+        self.head = 0
+        # applied changes not in the log yet
+        self._unsaved: list[Change] = []
+        if checkpoint is not None and checkpoint.exists():
+            self._load_checkpoint(checkpoint)
+
+    @property
+    def lag(self) -> int:
+        """Number of committed events not applied yet"""
+        return max(self.head - self.position, 0)
+
+    def views(self, uuid: UUID) -> GameViews:
+        return GameViews(uuid, self.store)
+
+    def poll(self) -> int:
+        """Fetch and apply the next batch of changes.
+        Return the number of applied changes.
+        """
+        conn = self._connection()
+        conn.send_bytes(_POSITION.pack(self.position))
+        response = conn.recv_bytes()
+        (self.head,) = _POSITION.unpack_from(response)
+        changes = decode_changes(response[_POSITION.size :])
+        self._apply(changes)
+        if self._checkpoint is not None:
+            self._unsaved.extend(changes)
+        return len(changes)
+
+    def catch_up(self) -> None:
+        while self.poll():
+            pass
+        self.save_checkpoint()
+
+    def tail(self, stop: threading.Event, interval: float = 0.1) -> None:
+        """Apply changes until `stop` is set, checkpointing when idle"""
+        while not stop.is_set():
+            if not self.poll():
+                self.save_checkpoint()
+                stop.wait(interval)
+        self.save_checkpoint()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @property
+    def _log(self) -> Path:
+        assert self._checkpoint is not None
+        return self._checkpoint.with_name(self._checkpoint.name + ".log")
+
+    def save_checkpoint(self) -> None:
+        if self._checkpoint is None or not self._unsaved:
+            return
+        record = encode_changes(self._unsaved)
+        with self._log.open("ab") as f:
+            f.write(_LOG_RECORD.pack(len(record)) + record)
+            f.flush()
+            os.fsync(f.fileno())
+            log_size = f.tell()
+        tmp = self._checkpoint.with_suffix(".tmp")
+        with tmp.open("w") as f:
+            json.dump({"position": self.position, "log_size": log_size}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._checkpoint)
+        self._unsaved = []
+
+    def _load_checkpoint(self, checkpoint: Path) -> None:
+        state = json.loads(checkpoint.read_text())
+        log_size = state["log_size"]
+        if log_size:
+            with self._log.open("r+b") as f:
+                # changes logged after the checkpoint was saved are fetched again
+                f.truncate(log_size)
+                while header := f.read(_LOG_RECORD.size):
+                    (size,) = _LOG_RECORD.unpack(header)
+                    record = f.read(size)
+                    if len(record) < size:
+                        raise FormatError(f"Truncated replica log {self._log}")
+                    self._apply(decode_changes(record))
+        self.position = self.head = state["position"]
+
+    def _connection(self) -> Connection:
+        if self._conn is None:
+            self._conn = Client(self._address, authkey=self._authkey)
+        return self._conn
+
+    def _apply(self, changes: Sequence[Change]) -> None:
+        batch: list[Change] = []
+        for change in changes:
+            if batch and batch[-1].game != change.game:
+                self._commit(batch)
+                batch = []
+            batch.append(change)
+        if batch:
+            self._commit(batch)
+
+    def _commit(self, batch: list[Change]) -> None:
+        self.store.add_events(batch[0].game, [change.event for change in batch])
+        self.position = batch[-1].position
+
+
+def run_replica(
+    address: Address,
+    checkpoint: Path | None = None,
+    authkey: bytes | None = None,
+    interval: float = 0.1,
+    report_every: float = 5.0,
+) -> None:
+    """Tail the feed forever, logging how far behind the replica is"""
+    replica = Replica(address, checkpoint, authkey)
+    stop = threading.Event()
+    tailer = threading.Thread(target=replica.tail, args=(stop, interval), daemon=True)
+    tailer.start()
+    try:
+        while tailer.is_alive():
+            logger.info("replica at %s, lag %s", replica.position, replica.lag)
+            time.sleep(report_every)
+    except KeyboardInterrupt:
+        stop.set()
+        tailer.join()
+    finally:
+        replica.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a yahtzee read replica")
+    parser.add_argument("address", help="unix socket path or host:port of the feed")
+    parser.add_argument("--checkpoint", type=Path)
+    parser.add_argument("--interval", type=float, default=0.1)
+    args = parser.parse_args()
+
+    address: Address = args.address
+    host, _, port = args.address.rpartition(":")
+    if port.isdigit():
+        address = (host, int(port))
+
+    logging.basicConfig(level=logging.INFO)
+    run_replica(address, args.checkpoint, interval=args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
-from collections import defaultdict
-from collections.abc import Iterable, Sequence
+import threading
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Iterable, Mapping, Sequence
+from contextlib import ExitStack
+from dataclasses import dataclass, replace
 from typing import Protocol
 from uuid import UUID
 
@@ -8,38 +11,235 @@ from .game.events import Event as GameEvent
 
 Event = GameEvent | SystemEvent
 
+DEFAULT_SYSTEM_EVENTS_RETENTION = 100
+DEFAULT_SYSTEM_EVENTS_GAMES = 10_000
+DEFAULT_LOCK_STRIPES = 64
+
+
+@dataclass(frozen=True)
+class Change:
+    """A committed event and its position in the store change feed"""
+
+    position: int
+    game: UUID
+    event: GameEvent
+
 
 class EventsStore(Protocol):
-    def get_events(self, uuid: UUID) -> Iterable[Event]:
+    def get_game_events(self, uuid: UUID) -> Sequence[GameEvent]:
+        ...
+
+    def length(self, uuid: UUID) -> int:
+        """Number of events of a game, without reading them"""
         ...
 
-    def get_game_events(self, uuid: UUID) -> Iterable[GameEvent]:
+    def add_events(self, uuid: UUID, events: Sequence[GameEvent]) -> None:
         ...
 
-    def add_events(self, uuid: UUID, events: Sequence[Event]) -> None:
+    def add_many(self, events_by_game: Mapping[UUID, Sequence[GameEvent]]) -> None:
+        """Add the events of many games in one write"""
+        ...
+
+    def games(self) -> Iterable[UUID]:
+        ...
+
+    def changes(self, since: int = 0, limit: int | None = None) -> Sequence[Change]:
+        """Committed events after the `since` position, in commit order.
+        The events of the deleted games are skipped.
+        """
+        ...
+
+    def head(self) -> int:
+        """Position of the last committed event"""
         ...
 
 
 class InMemoryEventsStore(EventsStore):
-    def __init__(self) -> None:
-        self._events: dict[UUID, list[Event]] = defaultdict(list)
+    """Events kept in memory, safe to use from many threads.
+
+    The streams are guarded by striped locks, picked by game uuid, so
+    commands on different games do not contend on reads. Writes briefly
+    take the change feed lock too, always after the stream lock.
+
+    The changes of the deleted games are dropped from the feed once they are
+    a quarter of it: they leave a hole, and the holes at the start of the
+    feed are trimmed.
+    """
+
+    def __init__(self, stripes: int = DEFAULT_LOCK_STRIPES) -> None:
+        self._events: dict[UUID, list[GameEvent]] = defaultdict(list)
+        # changes from the position _trimmed + 1, None for a dropped one
+        self._feed: list[Change | None] = []
+        self._trimmed = 0
+        # deleted games still in the feed, and the number of their changes
+        self._deleted: set[UUID] = set()
+        self._deleted_changes = 0
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._feed_lock = threading.Lock()
+
+    def _stripe(self, uuid: UUID) -> threading.Lock:
+        return self._stripes[uuid.int % len(self._stripes)]
 
-    def get_events(self, uuid: UUID) -> list[Event]:
-        return self._events[uuid]
+    def get_game_events(self, uuid: UUID) -> list[GameEvent]:
+        with self._stripe(uuid):
+            return list(self._events.get(uuid, ()))
 
-    def get_game_events(self, uuid: UUID) -> Iterable[GameEvent]:
-        for event in self.get_events(uuid):
-            match event:
-                case SystemEvent():
-                    continue
-                case GameEvent():
-                    yield event
+    def length(self, uuid: UUID) -> int:
+        with self._stripe(uuid):
+            return len(self._events.get(uuid, ()))
 
-    def add_events(self, uuid: UUID, events: Sequence[Event]) -> None:
-        self._events[uuid].extend(events)
+    def add_events(self, uuid: UUID, events: Sequence[GameEvent]) -> None:
+        with self._stripe(uuid):
+            self._append(uuid, events)
+
+    def add_many(self, events_by_game: Mapping[UUID, Sequence[GameEvent]]) -> None:
+        stripes = {
+            id(self._stripe(uuid)): self._stripe(uuid) for uuid in events_by_game
+        }
+        with ExitStack() as stack:
+            for _, stripe in sorted(stripes.items()):
+                stack.enter_context(stripe)
+            for uuid, events in events_by_game.items():
+                self._append(uuid, events)
+
+    def _append(self, uuid: UUID, events: Sequence[GameEvent]) -> None:
+        """Append to a stream, its stripe being locked"""
+        with self._feed_lock:
+            if uuid in self._deleted:
+                # the changes of the game added again are not dropped
+                self._compact()
+            self._events[uuid].extend(events)
+            feed = self._feed
+            feed.extend(
+                Change(position, uuid, event)
+                for position, event in enumerate(events, self._trimmed + len(feed) + 1)
+            )
+
+    def delete_events(self, uuid: UUID) -> None:
+        """Forget the events of a game, and eventually its changes"""
+        with self._stripe(uuid), self._feed_lock:
+            events = self._events.pop(uuid, None)
+            if events:
+                self._deleted.add(uuid)
+                self._deleted_changes += len(events)
+            if self._deleted_changes * 4 >= len(self._feed):
+                self._compact()
+
+    def compact(self) -> None:
+        """Drop the changes of the deleted games from the feed"""
+        with self._feed_lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        deleted = self._deleted
+        if not deleted:
+            return
+        feed = self._feed
+        for index, change in enumerate(feed):
+            if change is not None and change.game in deleted:
+                feed[index] = None
+        start = next(
+            (index for index, change in enumerate(feed) if change is not None),
+            len(feed),
+        )
+        del feed[:start]
+        self._trimmed += start
+        deleted.clear()
+        self._deleted_changes = 0
+
+    def games(self) -> Iterable[UUID]:
+        with self._feed_lock:
+            return [uuid for uuid, events in self._events.items() if events]
+
+    def changes(self, since: int = 0, limit: int | None = None) -> Sequence[Change]:
+        with self._feed_lock:
+            feed, deleted = self._feed, self._deleted
+            changes: list[Change] = []
+            index = max(since - self._trimmed, 0)
+            while index < len(feed) and (limit is None or len(changes) < limit):
+                change = feed[index]
+                index += 1
+                if change is not None and change.game not in deleted:
+                    changes.append(change)
+            return changes
+
+    def head(self) -> int:
+        return self._trimmed + len(self._feed)
+
+
+@dataclass
+class SystemEventsCounters:
+    raised: int = 0
+    sampled_out: int = 0
+    evicted: int = 0
+
+
+class SystemEventsLog:
+    """Bounded log of the system events raised for each game.
+
+    Only one system event every `sample_every` is kept, and at most
+    `retention` of them per game. Each logged event remembers the length of
+    the game stream when it was raised, to interleave it with game events.
+    The logs and the counters of the `max_games` games which last raised an
+    event are kept: a rejected command may name a game that does not exist.
+
+    The logs and the counters are guarded by a lock, and read as copies.
+    """
+
+    def __init__(
+        self,
+        retention: int = DEFAULT_SYSTEM_EVENTS_RETENTION,
+        sample_every: int = 1,
+        max_games: int = DEFAULT_SYSTEM_EVENTS_GAMES,
+    ) -> None:
+        self.retention = retention
+        self.sample_every = sample_every
+        self.max_games = max_games
+        self._logs: dict[UUID, deque[tuple[int, SystemEvent]]] = {}
+        # the games in the order they last raised an event
+        self._counters: OrderedDict[UUID, SystemEventsCounters] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, uuid: UUID, offset: int, event: SystemEvent) -> None:
+        with self._lock:
+            counters = self._counter(uuid)
+            counters.raised += 1
+            if (counters.raised - 1) % self.sample_every:
+                counters.sampled_out += 1
+                return
+            log = self._logs.setdefault(uuid, deque(maxlen=self.retention))
+            if len(log) == log.maxlen:
+                counters.evicted += 1
+            log.append((offset, event))
+
+    def _counter(self, uuid: UUID) -> SystemEventsCounters:
+        """Counters of a game, dropping the game least recently raising"""
+        counters = self._counters.get(uuid)
+        if counters is not None:
+            self._counters.move_to_end(uuid)
+            return counters
+        counters = self._counters[uuid] = SystemEventsCounters()
+        if len(self._counters) > self.max_games:
+            dropped, _ = self._counters.popitem(last=False)
+            self._logs.pop(dropped, None)
+        return counters
+
+    def __len__(self) -> int:
+        """Number of games tracked"""
+        with self._lock:
+            return len(self._counters)
+
+    def get(self, uuid: UUID) -> Sequence[tuple[int, SystemEvent]]:
+        with self._lock:
+            return tuple(self._logs.get(uuid, ()))
+
+    def counters(self, uuid: UUID) -> SystemEventsCounters:
+        with self._lock:
+            return replace(self._counters.get(uuid, SystemEventsCounters()))
 
 
 _events: None | EventsStore = None
+_system_events = SystemEventsLog()
 
 
 def set_events_store(repo: EventsStore) -> None:
@@ -54,3 +254,12 @@ def events() -> EventsStore:
             "Events Store was not initialized: call `set_events_store` first"
         )
     return _events
+
+
+def set_system_events_log(log: SystemEventsLog) -> None:
+    global _system_events
+    _system_events = log
+
+
+def system_events() -> SystemEventsLog:
+    return _system_events
@@ -0,0 +1,432 @@
+"""Asyncio game server.
+
+Serves `app.execute`, the game views and the subscriptions to the game
+states over TCP or a unix socket, using the framed protocol of
+`yahtzee.protocol`.
+
+Run a server with `python -m yahtzee.server --port 7777`, or benchmark it on
+a single box with `python -m yahtzee.server --load-test`.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from . import app
+from . import protocol as proto
+from .admission import DEFAULT_GAME_LIMIT, DEFAULT_PLAYER_LIMIT, Admission, Limit
+from .client import ClientPool
+from .commands import AddPlayer, Command, CreateGame, RollDices, Score, StartGame
+from .executor import DEFAULT_WORKERS, CommandExecutor
+from .game import hints
+from .game.score import Category
+from .game.transposition import TranspositionTable
+from .packing import PackedEventsStore
+from .repository import set_events_store
+from .result import Result
+from .subscriptions import Subscription
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 64
+DEFAULT_SHUTDOWN_TIMEOUT = 5.0
+
+
+class GameServer:
+    """Serve commands and views to many connections.
+
+    Each connection may pipeline up to `max_in_flight` requests. Past that
+    the server stops reading from the connection until responses are
+    written, which pushes back on the client.
+
+    The requests of a connection are answered concurrently, each response
+    written as soon as it is ready. The commands run on a `CommandExecutor`
+    of `workers` threads, in order for each game, and the views on the
+    default executor of the loop: a slow request holds neither the other
+    requests of its connection nor the other connections.
+    """
+
+    def __init__(
+        self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, workers: int = DEFAULT_WORKERS
+    ) -> None:
+        self._max_in_flight = max_in_flight
+        self._executor = CommandExecutor(workers)
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.Task] = set()
+        self._closing = asyncio.Event()
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Listen on a TCP port, return the bound port"""
+        self._server = await asyncio.start_server(self._accept, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start_unix(self, path: str) -> None:
+        self._server = await asyncio.start_unix_server(self._accept, path)
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None, "Server is not started"
+        await self._closing.wait()
+
+    async def shutdown(self, timeout: float = DEFAULT_SHUTDOWN_TIMEOUT) -> None:
+        """Stop accepting connections and let the pending requests complete"""
+        self._closing.set()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._connections:
+            _, pending = await asyncio.wait(self._connections, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        await asyncio.to_thread(self._executor.shutdown)
+
+    async def _accept(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections.add(task)
+        try:
+            await self._serve(reader, writer)
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # the requests in flight are bounded when they are answered
+        requests: asyncio.Queue[dict | None] = asyncio.Queue(1)
+        # subscription request id -> subscription, task pushing its deltas
+        pushers: dict[int | str, tuple[Subscription, asyncio.Task]] = {}
+        responder = asyncio.create_task(self._respond(requests, writer, pushers))
+        receiver = asyncio.create_task(self._receive(reader, requests))
+        try:
+            await asyncio.wait({receiver, responder}, return_when="FIRST_COMPLETED")
+            if responder.done():
+                # the connection is lost: the requests read would never be answered
+                receiver.cancel()
+                return
+            # answer the requests read, unless the connection is lost meanwhile
+            ending = asyncio.create_task(requests.put(None))
+            await asyncio.wait({ending, responder}, return_when="FIRST_COMPLETED")
+            ending.cancel()
+            await responder
+        finally:
+            for subscription_id in list(pushers):
+                _unsubscribe(pushers, subscription_id)
+
+    async def _receive(
+        self, reader: asyncio.StreamReader, requests: "asyncio.Queue[dict | None]"
+    ) -> None:
+        """Queue the requests read until the connection or the server closes"""
+        closing = asyncio.create_task(self._closing.wait())
+        try:
+            while True:
+                reading = asyncio.create_task(proto.read_message(reader))
+                await asyncio.wait({closing, reading}, return_when="FIRST_COMPLETED")
+                if not reading.done():
+                    reading.cancel()
+                    break
+                message = reading.result()
+                if message is None:
+                    break
+                await requests.put(message)
+        except (proto.ProtocolError, ConnectionError) as error:
+            logger.warning("Closing connection: %s", error)
+        finally:
+            closing.cancel()
+
+    async def _respond(
+        self,
+        requests: "asyncio.Queue[dict | None]",
+        writer: asyncio.StreamWriter,
+        pushers: dict[int | str, tuple[Subscription, asyncio.Task]],
+    ) -> None:
+        """Answer each request in its own task, writing its response once ready.
+
+        The responses are matched to the requests by id, so a slow request
+        does not hold the next ones of the connection.
+        """
+        in_flight = asyncio.Semaphore(self._max_in_flight)
+        answering: set[asyncio.Task] = set()
+
+        async def answer(request: dict) -> None:
+            try:
+                writer.write(await self._response(request, writer, pushers))
+                await writer.drain()
+            except ConnectionError:
+                # the connection is lost: stop reading the requests
+                dispatching.cancel()
+            finally:
+                in_flight.release()
+
+        async def dispatch() -> None:
+            while (request := await requests.get()) is not None:
+                await in_flight.acquire()
+                task = asyncio.create_task(answer(request))
+                answering.add(task)
+                task.add_done_callback(answering.discard)
+
+        dispatching = asyncio.create_task(dispatch())
+        try:
+            await asyncio.wait({dispatching})
+            if answering:
+                await asyncio.wait(answering)
+        finally:
+            dispatching.cancel()
+
+    async def _response(
+        self,
+        request: dict,
+        writer: asyncio.StreamWriter,
+        pushers: dict[int | str, tuple[Subscription, asyncio.Task]],
+    ) -> bytes:
+        """Encoded response to a request, an error if it failed"""
+        try:
+            if "subscribe" in request or "unsubscribe" in request:
+                return self._subscription(request, writer, pushers)
+            if "command" in request:
+                return await self._execute(request)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, respond, request)
+        except Exception as error:
+            # a request must not stop the responses to the next ones
+            logger.exception("Failed to respond to %s", request)
+            return proto.encode(
+                {"id": request.get("id"), "ok": False, "error": str(error)}
+            )
+
+    async def _execute(self, request: dict) -> bytes:
+        """Response to a command request, the command running on the executor"""
+        try:
+            command = proto.command_from_dict(request["command"])
+        except proto.ProtocolError as error:
+            response = {"ok": False, "error": f"Invalid request: {error}"}
+        else:
+            result = await asyncio.wrap_future(self._executor.submit(command))
+            response = proto.result_to_dict(result)
+        return proto.encode({"id": request.get("id"), **response})
+
+    def _subscription(
+        self,
+        request: dict,
+        writer: asyncio.StreamWriter,
+        pushers: dict[int | str, tuple[Subscription, asyncio.Task]],
+    ) -> bytes:
+        """Start or stop pushing the deltas of a game to the connection"""
+        request_id = request.get("id")
+        if "unsubscribe" in request:
+            found = _unsubscribe(pushers, request["unsubscribe"])
+            return proto.encode({"id": request_id, "ok": True, "value": found})
+        try:
+            if not isinstance(request_id, (int, str)):
+                raise ValueError(f"Subscription id {request_id!r} is not an int or str")
+            game = UUID(request["subscribe"])
+        except (ValueError, TypeError, AttributeError) as error:
+            return proto.encode(
+                {"id": request_id, "ok": False, "error": f"Invalid request: {error}"}
+            )
+        _unsubscribe(pushers, request_id)
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        def on_push() -> None:
+            # called from the thread committing the events
+            loop.call_soon_threadsafe(ready.set)
+
+        subscription = app.subscribe(game, on_push)
+        pusher = asyncio.create_task(_push(request_id, subscription, ready, writer))
+        pushers[request_id] = subscription, pusher
+        return proto.encode({"id": request_id, "ok": True, "value": True})
+
+
+async def _push(
+    subscription_id: int | str,
+    subscription: Subscription,
+    ready: asyncio.Event,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """Write the deltas of a subscription as they are pushed"""
+    try:
+        while True:
+            await ready.wait()
+            ready.clear()
+            if deltas := subscription.drain():
+                writer.write(proto.encode_deltas(subscription_id, deltas))
+                await writer.drain()
+    except ConnectionError:
+        app.unsubscribe(subscription)
+
+
+def _unsubscribe(
+    pushers: dict[int | str, tuple[Subscription, asyncio.Task]], subscription_id: Any
+) -> bool:
+    """Stop pushing the deltas of a subscription, if it exists"""
+    try:
+        subscription, pusher = pushers.pop(subscription_id)
+    except (KeyError, TypeError):
+        return False
+    app.unsubscribe(subscription)
+    pusher.cancel()
+    return True
+
+
+def respond(request: dict) -> bytes:
+    """Encoded response to a view request, served from the cache"""
+    try:
+        version, value = _cached_view(request)
+    except (proto.ProtocolError, KeyError, ValueError, TypeError) as error:
+        return proto.encode(
+            {"id": request.get("id"), "ok": False, "error": f"Invalid request: {error}"}
+        )
+    return proto.encode_view(request.get("id"), version, value)
+
+
+def _cached_view(request: dict) -> tuple[int, bytes | None]:
+    name = request["view"]
+    if not isinstance(name, str) or name not in proto.VIEWS:
+        raise proto.ProtocolError(f"Unknown view {name!r}")
+    arguments = [request[argument] for argument in proto.VIEWS[name]]
+    return app.view_json(
+        proto.parse_game(request["game"]), name, arguments, request.get("since")
+    )
+
+
+async def _play_game(client: ClientPool, latencies: list[float]) -> None:
+    async def timed(command: Command) -> Result:
+        start = time.perf_counter()
+        result = await client.execute(command)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    game = UUID((await timed(CreateGame())).unwrap()["uuid"])
+    players = [f"player-{i}" for i in range(random.randint(1, 4))]
+    await asyncio.gather(*(timed(AddPlayer(game, player)) for player in players))
+    await timed(StartGame(game))
+    for category in Category:
+        if category.is_bonus:
+            continue
+        for player in players:
+            await timed(RollDices(game, player))
+            await timed(Score(game, player, category.value))
+
+
+async def load_test(games: int, concurrency: int, pool_size: int) -> None:
+    app.bootstrap()
+    logging.disable(logging.ERROR)
+    server = GameServer()
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "yahtzee.sock")
+        await server.start_unix(path)
+        latencies: list[float] = []
+        async with ClientPool(path=path, size=pool_size) as client:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def play() -> None:
+                async with semaphore:
+                    await _play_game(client, latencies)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(play() for _ in range(games)))
+            elapsed = time.perf_counter() - start
+        await server.shutdown()
+
+    latencies.sort()
+    print(f"{games} games, {len(latencies)} requests in {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.0f} requests/s")
+    print(
+        "latency: "
+        f"p50 {statistics.median(latencies) * 1e3:.2f}ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f}ms, "
+        f"max {latencies[-1] * 1e3:.2f}ms"
+    )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    app.bootstrap()
+    if args.packed:
+        set_events_store(PackedEventsStore())
+    positions = _positions_table(args.shared_hints) if args.shared_hints else None
+    app.set_admission(
+        Admission(
+            Limit(args.game_rate, 2 * args.game_rate) if args.game_rate else None,
+            Limit(args.player_rate, 2 * args.player_rate) if args.player_rate else None,
+        )
+    )
+    server = GameServer(args.max_in_flight)
+    if args.unix:
+        await server.start_unix(args.unix)
+        logger.info("Listening on %s", args.unix)
+    else:
+        port = await server.start_tcp(args.host, args.port)
+        logger.info("Listening on %s:%s", args.host, port)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.shutdown()
+        if positions is not None:
+            positions.close()
+
+
+def _positions_table(name: str) -> TranspositionTable:
+    """Share the hints with the servers of this host, through a named table"""
+    try:
+        table = TranspositionTable.attach(name)
+    except FileNotFoundError:
+        table = TranspositionTable.shared(name)
+        # the segment lasts as long as the host, for the servers started later
+        logger.info("Created the shared hints table %s", name)
+    hints.set_transposition_table(table)
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a yahtzee game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", help="listen on a unix socket instead of TCP")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument(
+        "--game-rate",
+        type=float,
+        default=DEFAULT_GAME_LIMIT.rate,
+        help="commands per second and per game, 0 for no limit",
+    )
+    parser.add_argument(
+        "--player-rate",
+        type=float,
+        default=DEFAULT_PLAYER_LIMIT.rate,
+        help="commands per second and per player, 0 for no limit",
+    )
+    parser.add_argument(
+        "--packed", action="store_true", help="keep the events as packed streams"
+    )
+    parser.add_argument(
+        "--shared-hints",
+        metavar="NAME",
+        help="share the hints with the servers using the same table name",
+    )
+    parser.add_argument("--load-test", action="store_true")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        if args.load_test:
+            asyncio.run(load_test(args.games, args.concurrency, args.pool_size))
+        else:
+            asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Incremental statistics over scored points.
+
+`Statistics` consumes `PointsScored` and `GameEnded` events to maintain a
+leaderboard, per player averages of final scores and per category histograms
+without replaying the games.
+
+The scorecards of the games not over are kept for the `max_live_games` games
+last scored in. The Yahtzee bonus line carries the running total of the
+bonuses: each bonus is counted once.
+
+Statistics backfilled from the change feed know their position in it, and are
+checkpointed to resume from there. The events pushed on the bus, once
+committed, have no position: statistics attached to a bus are checkpointed to
+be attached again, not backfilled.
+
+The statistics are updated under a lock, as the bus pushes the events from
+the threads executing the commands, and checkpointed from a snapshot taken
+under the lock.
+"""
+import heapq
+import math
+import os
+import pickle
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from functools import singledispatchmethod
+from pathlib import Path
+from uuid import UUID
+
+from .game import events as evt
+from .game.events import _EventBus
+from .game.score import Category, Score, Scorecard
+from .repository import EventsStore
+
+DEFAULT_TOP_K = 10
+DEFAULT_MAX_LIVE_GAMES = 10_000
+BACKFILL_BATCH_SIZE = 10_000
+
+
+@dataclass
+class RunningStats:
+    """Running mean and variance (Welford's algorithm)"""
+
+    count: int = 0
+    mean: float = 0.0
+    _m2: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+@dataclass
+class Histogram:
+    """Fixed width bins, the last bin collects all the higher values"""
+
+    width: int = 5
+    counts: list[int] = field(default_factory=lambda: [0] * 11)
+
+    def add(self, value: Score) -> None:
+        index = min(value // self.width, len(self.counts) - 1)
+        self.counts[index] += 1
+
+    @property
+    def bins(self) -> list[tuple[int, int]]:
+        return [(i * self.width, count) for i, count in enumerate(self.counts)]
+
+
+@dataclass(frozen=True, order=True)
+class Ranking:
+    score: Score
+    player: str
+    game: UUID = field(compare=False)
+
+
+class Statistics:
+    def __init__(
+        self, top_k: int = DEFAULT_TOP_K, max_live_games: int = DEFAULT_MAX_LIVE_GAMES
+    ) -> None:
+        self.top_k = top_k
+        self.max_live_games = max_live_games
+        self.position = 0
+        # fed by a bus, the position is not the one of the consumed events
+        self.attached = False
+        self.players: dict[str, RunningStats] = defaultdict(RunningStats)
+        self.categories: dict[Category, Histogram] = defaultdict(Histogram)
+        self._leaderboard: list[Ranking] = []
+        # scorecards of the games not over, the last scored in last
+        self._live: OrderedDict[UUID, dict[str, Scorecard]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def leaderboard(self) -> list[Ranking]:
+        """Best final scores, best first"""
+        with self._lock:
+            return sorted(self._leaderboard, reverse=True)
+
+    def apply(self, event: evt.Event, /) -> None:
+        with self._lock:
+            self._apply(event)
+
+    @singledispatchmethod
+    def _apply(self, _: evt.Event, /) -> None:
+        pass
+
+    @_apply.register
+    def points_scored(self, event: evt.PointsScored, /) -> None:
+        category = Category(event.category)
+        scorecards = self._live_game(event.game)
+        scorecard = scorecards.setdefault(event.player, Scorecard())
+        # the Yahtzee bonus line carries the running total of the bonuses
+        scored = event.points - (scorecard[category] or 0)
+        scorecard[category] = event.points
+        self.categories[category].add(scored)
+
+    def _live_game(self, game: UUID) -> dict[str, Scorecard]:
+        """Scorecards of a game not over, dropping the game least recently
+        scored in: a game may be abandoned
+        """
+        scorecards = self._live.get(game)
+        if scorecards is not None:
+            self._live.move_to_end(game)
+            return scorecards
+        scorecards = self._live[game] = {}
+        if len(self._live) > self.max_live_games:
+            self._live.popitem(last=False)
+        return scorecards
+
+    @_apply.register
+    def game_ended(self, event: evt.GameEnded, /) -> None:
+        for player, scorecard in self._live.pop(event.game, {}).items():
+            score = scorecard.score
+            self.players[player].add(score)
+            self._rank(Ranking(score, player, event.game))
+
+    def _rank(self, ranking: Ranking) -> None:
+        if len(self._leaderboard) < self.top_k:
+            heapq.heappush(self._leaderboard, ranking)
+        elif ranking > self._leaderboard[0]:
+            heapq.heapreplace(self._leaderboard, ranking)
+
+    def backfill(self, store: EventsStore) -> int:
+        """Stream the store change feed since the last consumed position.
+        Return the number of consumed changes.
+        """
+        if self.attached:
+            raise RuntimeError("Statistics attached to a bus have no feed position")
+        consumed = 0
+        while changes := store.changes(self.position, BACKFILL_BATCH_SIZE):
+            with self._lock:
+                for change in changes:
+                    self._apply(change.event)
+                self.position = changes[-1].position
+            consumed += len(changes)
+        return consumed
+
+    def attach(self, bus: _EventBus) -> None:
+        """Consume the events as they are pushed on the bus, once committed"""
+        self.attached = True
+        bus.subscribe(evt.PointsScored, self.apply)
+        bus.subscribe(evt.GameEnded, self.apply)
+
+    def save(self, checkpoint: Path) -> None:
+        with self._lock:
+            snapshot = pickle.dumps(self)
+        tmp = checkpoint.with_suffix(".tmp")
+        tmp.write_bytes(snapshot)
+        os.replace(tmp, checkpoint)
+
+    @classmethod
+    def load(cls, checkpoint: Path, top_k: int = DEFAULT_TOP_K) -> "Statistics":
+        """Restore statistics from a checkpoint, or start empty"""
+        if not checkpoint.exists():
+            return cls(top_k)
+        with checkpoint.open("rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,208 @@
+"""Push game state deltas to subscribers.
+
+Instead of polling `GameViews`, a client subscribes to a game and receives
+compact deltas built from the events of the game, once they are committed.
+
+    subscription = app.subscribe(game)
+    deltas = subscription.wait(timeout=1)
+"""
+import threading
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from functools import singledispatch
+from typing import Any
+from uuid import UUID
+
+from .game import events as evt
+from .lazy import getLogger
+
+logger = getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 64
+
+
+@dataclass
+class Delta:
+    """A change of a game state"""
+
+    game: UUID
+    kind: str
+    data: dict[Any, Any] = field(default_factory=dict)
+
+    def merge(self, other: "Delta") -> bool:
+        """Coalesce `other` into this delta when they change the same thing"""
+        if self.kind != "dices" or other.kind != "dices" or self.game != other.game:
+            return False
+        self.data.update(other.data)
+        return True
+
+    def asdict(self) -> dict:
+        return {"kind": self.kind, "data": self.data}
+
+    def __str__(self) -> str:
+        match self.kind:
+            case "dices":
+                return ", ".join(
+                    f"dice {number} now {value} {position}"
+                    for number, (value, position) in sorted(self.data.items())
+                )
+            case "score":
+                return "{player} scored {category} {points}".format(**self.data)
+            case _:
+                details = " ".join(f"{k}={v}" for k, v in self.data.items())
+                return f"{self.kind} {details}".strip()
+
+
+@singledispatch
+def _delta(_: evt.Event, /) -> Delta | None:
+    return None
+
+
+@_delta.register
+def _game_created(event: evt.GameCreated, /) -> Delta:
+    return Delta(event.game, "state", {"state": "pending"})
+
+
+@_delta.register
+def _game_started(event: evt.GameStarted, /) -> Delta:
+    return Delta(event.game, "state", {"state": "started"})
+
+
+@_delta.register
+def _game_ended(event: evt.GameEnded, /) -> Delta:
+    return Delta(event.game, "state", {"state": "over"})
+
+
+@_delta.register
+def _player_added(event: evt.PlayerAdded, /) -> Delta:
+    return Delta(event.game, "player", {"name": event.player})
+
+
+@_delta.register
+def _points_scored(event: evt.PointsScored, /) -> Delta:
+    return Delta(
+        event.game,
+        "score",
+        {"player": event.player, "category": event.category, "points": event.points},
+    )
+
+
+@_delta.register
+def _turn_changed(event: evt.TurnChanged, /) -> Delta:
+    return Delta(
+        event.game, "turn", {"player": event.new_player, "round": event.round_number}
+    )
+
+
+@_delta.register
+def _roll_performed(event: evt.RollPerformed, /) -> Delta:
+    return Delta(event.game, "roll", {"attempt": event.attempt_nb})
+
+
+@_delta.register
+def _dice_changed(event: evt.DicePositionChanged, /) -> Delta:
+    return Delta(event.game, "dices", {event.number: (event.value, event.position)})
+
+
+class Subscription:
+    """Bounded queue of deltas for a single subscriber.
+
+    When the queue is full the oldest delta is dropped, and the next drain
+    starts with a `resync` delta: the subscriber should then reload the full
+    state from `GameViews`.
+
+    `on_push` is called after the deltas of each commit are pushed, from the
+    thread committing the events, to wake up a subscriber not waiting on the
+    queue.
+    """
+
+    def __init__(
+        self,
+        game: UUID,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        on_push: Callable[[], None] | None = None,
+    ) -> None:
+        self.game = game
+        self.overflowed = False
+        self._queue: deque[Delta] = deque(maxlen=maxsize)
+        self._ready = threading.Condition()
+        self._on_push = on_push
+
+    def push(self, *deltas: Delta) -> None:
+        """Queue the deltas of a commit, drained together"""
+        with self._ready:
+            for delta in deltas:
+                if self._queue and self._queue[-1].merge(delta):
+                    continue
+                if len(self._queue) == self._queue.maxlen:
+                    self.overflowed = True
+                self._queue.append(delta)
+            self._ready.notify_all()
+        if self._on_push is not None:
+            self._on_push()
+
+    def drain(self) -> list[Delta]:
+        """Return and forget all the pending deltas"""
+        with self._ready:
+            deltas = list(self._queue)
+            self._queue.clear()
+            if self.overflowed:
+                deltas.insert(0, Delta(self.game, "resync"))
+                self.overflowed = False
+            return deltas
+
+    def wait(self, timeout: float | None = None) -> list[Delta]:
+        """Wait for deltas to be pushed, then drain them"""
+        with self._ready:
+            self._ready.wait_for(lambda: bool(self._queue), timeout)
+            return self.drain()
+
+
+class Subscriptions:
+    """Route the committed events to the subscribers of each game"""
+
+    def __init__(self) -> None:
+        self._by_game: dict[UUID, set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._by_game.values())
+
+    def subscribe(
+        self,
+        game: UUID,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        on_push: Callable[[], None] | None = None,
+    ) -> Subscription:
+        subscription = Subscription(game, maxsize, on_push)
+        with self._lock:
+            self._by_game[game].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._by_game.get(subscription.game, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._by_game.pop(subscription.game, None)
+
+    def publish(self, game: UUID, events: Iterable[evt.Event]) -> None:
+        """Push the deltas of events of a game, once they are committed"""
+        with self._lock:
+            subscribers = tuple(self._by_game.get(game, ()))
+        if not subscribers:
+            return
+        deltas = [delta for event in events if (delta := _delta(event)) is not None]
+        for subscription in subscribers:
+            try:
+                subscription.push(
+                    *(
+                        Delta(delta.game, delta.kind, dict(delta.data))
+                        for delta in deltas
+                    )
+                )
+            except Exception:
+                # the events are committed: a subscriber must not fail the command
+                logger.exception("Failed to push deltas to a subscriber of %s", game)
@@ -0,0 +1,163 @@
+"""Tournaments of many simultaneous games.
+
+Players are seated at tables of `table_size` players, one game per table.
+When every game of a round is over, the `qualified` best players of each
+table move on to the next round, until a single table is left whose winner
+is the champion. At least one player of each table of many players is out,
+so each round has fewer players than the previous one.
+
+`Tournaments` follows the games from the `PointsScored` and `GameEnded`
+events delivered by the event bus, so the brackets are kept up to date
+without replaying the games. Rounds are advanced by `advance_due`, to be
+called by the scheduler of the tournaments (e.g. after each command, or
+periodically by a worker).
+"""
+import math
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from uuid import UUID, uuid4
+
+from . import app
+from .game import events as evt
+from .game.events import _EventBus
+from .game.score import Category, Scorecard
+
+DEFAULT_TABLE_SIZE = 4
+DEFAULT_QUALIFIED = 1
+
+CreateGames = Callable[[Iterable[Sequence[str]]], list[UUID]]
+
+
+@dataclass
+class Table:
+    tournament: UUID
+    game: UUID
+    scorecards: dict[str, Scorecard]
+    over: bool = False
+
+    @property
+    def standings(self) -> list[tuple[str, int]]:
+        """Players and their scores, best first, seat order breaking ties"""
+        scores = [(player, card.score) for player, card in self.scorecards.items()]
+        return sorted(scores, key=lambda standing: standing[1], reverse=True)
+
+    def asdict(self) -> dict:
+        return {
+            "game": self.game,
+            "over": self.over,
+            "standings": [
+                {"player": player, "score": score} for player, score in self.standings
+            ],
+        }
+
+
+@dataclass
+class Tournament:
+    uuid: UUID
+    table_size: int
+    qualified: int
+    rounds: list[list[Table]] = field(default_factory=list)
+    playing: int = 0
+    champion: str | None = None
+
+    @property
+    def is_over(self) -> bool:
+        return self.champion is not None
+
+    def qualifiers(self) -> list[str]:
+        return [
+            player
+            for table in self.rounds[-1]
+            for player, _ in table.standings[: self._qualified(len(table.scorecards))]
+        ]
+
+    def _qualified(self, seated: int) -> int:
+        """Qualifiers of a table: all but one at least, the player of a table of one"""
+        return min(self.qualified, max(seated - 1, 1))
+
+    def bracket(self) -> list[list[dict]]:
+        return [[table.asdict() for table in tables] for tables in self.rounds]
+
+
+def seat(players: Sequence[str], table_size: int) -> list[list[str]]:
+    """Spread the players over as few tables as possible, evenly"""
+    tables_count = math.ceil(len(players) / table_size)
+    return [list(players[i::tables_count]) for i in range(tables_count)]
+
+
+class Tournaments:
+    def __init__(self, create_games: CreateGames = app.create_games) -> None:
+        self._create_games = create_games
+        self._tournaments: dict[UUID, Tournament] = {}
+        self._tables: dict[UUID, Table] = {}
+        self._due: set[UUID] = set()
+
+    def __getitem__(self, uuid: UUID) -> Tournament:
+        return self._tournaments[uuid]
+
+    def attach(self, bus: _EventBus) -> None:
+        """Follow the games as their events are pushed on the bus"""
+        bus.subscribe_batch(evt.PointsScored, self._points_scored)
+        bus.subscribe_batch(evt.GameEnded, self._games_ended)
+
+    def detach(self, bus: _EventBus) -> None:
+        bus.unsubscribe_batch(evt.PointsScored, self._points_scored)
+        bus.unsubscribe_batch(evt.GameEnded, self._games_ended)
+
+    def create(
+        self,
+        players: Sequence[str],
+        table_size: int = DEFAULT_TABLE_SIZE,
+        qualified: int = DEFAULT_QUALIFIED,
+    ) -> UUID:
+        """Create a tournament and start the games of its first round"""
+        if not players:
+            raise ValueError("A tournament needs players")
+        if len(set(players)) != len(players):
+            raise ValueError("Players of a tournament must have distinct names")
+        if not 0 < qualified < table_size:
+            raise ValueError("Less players than seated must qualify at each table")
+        tournament = Tournament(uuid4(), table_size, qualified)
+        self._tournaments[tournament.uuid] = tournament
+        self._start_round(tournament, players)
+        return tournament.uuid
+
+    def advance_due(self) -> list[UUID]:
+        """Start the next round of the tournaments whose round is over.
+        Return the advanced tournaments.
+        """
+        due, self._due = self._due, set()
+        for uuid in due:
+            tournament = self._tournaments[uuid]
+            qualifiers = tournament.qualifiers()
+            if len(tournament.rounds[-1]) == 1:
+                tournament.champion = qualifiers[0]
+            else:
+                self._start_round(tournament, qualifiers)
+        return list(due)
+
+    def _start_round(self, tournament: Tournament, players: Sequence[str]) -> None:
+        tables = seat(players, tournament.table_size)
+        games = self._create_games(tables)
+        round = [
+            Table(tournament.uuid, game, {player: Scorecard() for player in players})
+            for game, players in zip(games, tables)
+        ]
+        self._tables.update((table.game, table) for table in round)
+        tournament.rounds.append(round)
+        tournament.playing = len(round)
+
+    def _points_scored(self, events: list[evt.PointsScored]) -> None:
+        for event in events:
+            if (table := self._tables.get(event.game)) is not None:
+                table.scorecards[event.player][Category(event.category)] = event.points
+
+    def _games_ended(self, events: list[evt.GameEnded]) -> None:
+        for event in events:
+            if (table := self._tables.get(event.game)) is None or table.over:
+                continue
+            table.over = True
+            tournament = self._tournaments[table.tournament]
+            tournament.playing -= 1
+            if not tournament.playing:
+                self._due.add(tournament.uuid)
@@ -0,0 +1,206 @@
+"""Fast rejection of invalid commands.
+
+A small per game state, maintained from the committed events, answers the
+most common rejections ("not your turn", "already rolled 3 times", ...)
+without rehydrating the game. Anything it does not know about is left to the
+command handlers.
+
+The states of the `max_games` games last played are kept, and dropped once
+a game is over. A state remembers the length of the stream it was built
+from: a game written to the store by another path than the app is not
+judged on a stale state, its state is built again from its events.
+"""
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import singledispatch, singledispatchmethod
+from uuid import UUID
+
+from . import commands as cmd
+from .game import events as evt
+from .game.board import GameStatus
+from .game.dices import DicePosition
+from .game.score import Category
+from .result import Err
+
+_CATEGORY_BITS = {category.value: 1 << bit for bit, category in enumerate(Category)}
+# the bonus lines are not combinations, the handler rejects them
+_COMBINATION_BITS = {
+    category.value: _CATEGORY_BITS[category.value]
+    for category in Category
+    if not category.is_bonus
+}
+_ALL_DICES_IN_THE_CUP = 0b11111
+
+DEFAULT_MAX_GAMES = 10_000
+
+
+@dataclass(slots=True)
+class GameState:
+    status: GameStatus = GameStatus.NEW
+    seats: dict[str, int] = field(default_factory=dict)
+    scored: list[int] = field(default_factory=list)
+    current_seat: int | None = None
+    attempts: int = 0
+    dices_in_the_cup: int = _ALL_DICES_IN_THE_CUP
+    # events applied
+    length: int = 0
+
+    @classmethod
+    def from_events(cls, events: Iterable[evt.Event]) -> "GameState":
+        state = cls()
+        state.apply_all(events)
+        return state
+
+    def apply_all(self, events: Iterable[evt.Event]) -> None:
+        for event in events:
+            self.apply(event)
+            self.length += 1
+
+    @singledispatchmethod
+    def apply(self, _: evt.Event, /) -> None:
+        pass
+
+    @apply.register
+    def game_created(self, _: evt.GameCreated, /) -> None:
+        self.status = GameStatus.PENDING
+
+    @apply.register
+    def player_added(self, event: evt.PlayerAdded, /) -> None:
+        self.seats[event.player] = len(self.scored)
+        self.scored.append(0)
+
+    @apply.register
+    def game_started(self, _: evt.GameStarted, /) -> None:
+        self.status = GameStatus.STARTED
+        self.current_seat = 0 if self.scored else None
+
+    @apply.register
+    def points_scored(self, event: evt.PointsScored, /) -> None:
+        self.scored[self.seats[event.player]] |= _CATEGORY_BITS[event.category]
+
+    @apply.register
+    def dice_changed(self, event: evt.DicePositionChanged, /) -> None:
+        bit = 1 << (event.number - 1)
+        if event.position == DicePosition.IN_THE_CUP.value:
+            self.dices_in_the_cup |= bit
+        else:
+            self.dices_in_the_cup &= ~bit
+
+    @apply.register
+    def turn_changed(self, event: evt.TurnChanged, /) -> None:
+        self.current_seat = self.seats[event.new_player]
+        self.attempts = 0
+
+    @apply.register
+    def roll_performed(self, event: evt.RollPerformed, /) -> None:
+        self.attempts = event.attempt_nb
+
+    @apply.register
+    def game_ended(self, _: evt.GameEnded, /) -> None:
+        self.status = GameStatus.OVER
+
+
+@singledispatch
+def _reject(_: cmd.Command, __: GameState, /) -> Err | None:
+    return None
+
+
+def _not_playing(command: cmd.PlayerCommand, state: GameState) -> Err | None:
+    if state.status is not GameStatus.STARTED:
+        return None
+    seat = state.seats.get(command.player)
+    if seat is None:
+        return Err(f"{command.player}, you are not in the game")
+    if seat != state.current_seat:
+        return Err(f"{command.player}, it's not your turn to play")
+    return None
+
+
+@_reject.register
+def _roll_dices(command: cmd.RollDices, state: GameState, /) -> Err | None:
+    if rejection := _not_playing(command, state):
+        return rejection
+    if state.status is GameStatus.STARTED and state.attempts >= 3:
+        return Err("You already rolled the dices 3 times")
+    return None
+
+
+@_reject.register
+def _keep_dice(command: cmd.KeepDice, state: GameState, /) -> Err | None:
+    return _not_playing(command, state)
+
+
+@_reject.register
+def _score(command: cmd.Score, state: GameState, /) -> Err | None:
+    if rejection := _not_playing(command, state):
+        return rejection
+    seat = state.seats.get(command.player)
+    if state.status is not GameStatus.STARTED or seat is None:
+        return None
+    if state.dices_in_the_cup:
+        return Err("You must roll the dices first")
+    if state.scored[seat] & _COMBINATION_BITS.get(command.combination, 0):
+        return Err(f"{command.player}, you already scored {command.combination}")
+    return None
+
+
+class Validations:
+    """Validation states of the games, by game uuid"""
+
+    def __init__(self, max_games: int = DEFAULT_MAX_GAMES) -> None:
+        self._max_games = max_games
+        self._states: OrderedDict[UUID, GameState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, uuid: UUID) -> bool:
+        return uuid in self._states
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+    def track(self, uuid: UUID, events: Iterable[evt.Event]) -> None:
+        """Start tracking a game from its whole history"""
+        state = GameState.from_events(events)
+        with self._lock:
+            self._keep(uuid, state)
+
+    def apply(self, uuid: UUID, events: Iterable[evt.Event]) -> None:
+        """Update a tracked game with newly committed events"""
+        with self._lock:
+            state = self._states.get(uuid)
+            if state is None:
+                return
+            state.apply_all(events)
+            self._keep(uuid, state)
+
+    def _keep(self, uuid: UUID, state: GameState) -> None:
+        """Keep the state of a game last played, the lock being held"""
+        if state.status is GameStatus.OVER:
+            # no more commands to validate
+            self._states.pop(uuid, None)
+            return
+        self._states[uuid] = state
+        self._states.move_to_end(uuid)
+        while len(self._states) > self._max_games:
+            self._states.popitem(last=False)
+
+    def reject(self, command: cmd.GameCommand, length: int) -> Err | None:
+        """Return the error of a command known to be invalid, if any.
+        `length` is the length of the stream of the game in the store.
+        """
+        with self._lock:
+            state = self._states.get(command.game)
+            if state is None:
+                return None
+            if state.length != length:
+                # written by another path: built again when the game is read
+                del self._states[command.game]
+                return None
+            self._states.move_to_end(command.game)
+            return _reject(command, state)
@@ -0,0 +1,121 @@
+"""Serialized views of the games, by board version.
+
+The views of a game only change with its board version, so the JSON of each
+view is rendered once per version and served as bytes until the next event.
+A client polling a view sends the version of its last response: while the
+game is at that version the view is not even looked up.
+
+    version, payload = cache.get(uuid, "players")
+    version, payload = cache.get(uuid, "players", since=version)  # None: unchanged
+
+Only the latest version of each game is kept, for the `max_games` games
+last served.
+"""
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+if TYPE_CHECKING:
+    from .views import GameViews
+
+DEFAULT_MAX_GAMES = 10_000
+
+
+def to_json(value: Any) -> bytes:
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"{value!r} is not JSON serializable")
+
+
+class _Versioned:
+    """Views of a game at a board version, and their rendered JSON"""
+
+    def __init__(self, views: "GameViews") -> None:
+        self.views = views
+        self.version = views.version
+        self.payloads: dict[tuple, bytes] = {}
+
+    def render(self, key: tuple) -> bytes:
+        name, *arguments = key
+        view = getattr(self.views, name)
+        payload = self.payloads[key] = to_json(view(*arguments) if arguments else view)
+        return payload
+
+
+class ViewCache:
+    def __init__(
+        self,
+        load: Callable[[UUID], "GameViews"],
+        version: Callable[[UUID], int | None],
+        max_games: int = DEFAULT_MAX_GAMES,
+    ) -> None:
+        """`load` builds the views of a game, `version` gives its current board
+        version cheaply, None for an unknown game
+        """
+        self._load = load
+        self._version = version
+        self._max_games = max_games
+        self._games: OrderedDict[UUID, _Versioned] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._games.clear()
+            self.hits = self.misses = 0
+
+    def get(
+        self,
+        uuid: UUID,
+        name: str,
+        arguments: Sequence[Any] = (),
+        since: int | None = None,
+    ) -> tuple[int, bytes | None]:
+        """The board version and the JSON of a view, None if the game is still
+        at the `since` version
+        """
+        key = (name, *arguments)
+        version = self._version(uuid)
+        if version is None:
+            # not kept: the game may be created at any time
+            return 0, _Versioned(self._load(uuid)).render(key)
+        if version == since:
+            self.hits += 1
+            return version, None
+        with self._lock:
+            versioned = self._games.get(uuid)
+            if versioned is not None and versioned.version == version:
+                self._games.move_to_end(uuid)
+            else:
+                versioned = None
+        if versioned is None:
+            # built from the store again, maybe at a newer version
+            versioned = self._keep(uuid, _Versioned(self._load(uuid)))
+            if versioned.version == since:
+                return versioned.version, None
+        payload = versioned.payloads.get(key)
+        if payload is None:
+            self.misses += 1
+            payload = versioned.render(key)
+        else:
+            self.hits += 1
+        return versioned.version, payload
+
+    def _keep(self, uuid: UUID, versioned: _Versioned) -> _Versioned:
+        with self._lock:
+            self._games[uuid] = versioned
+            self._games.move_to_end(uuid)
+            while len(self._games) > self._max_games:
+                self._games.popitem(last=False)
+        return versioned
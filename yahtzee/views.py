@@ -1,15 +1,25 @@
+from collections.abc import Sequence
 from typing import Literal
 from uuid import UUID
 
+from .events import SystemEvent
 from .game import Game
+from .game.board import GameStatus
 from .game.dices import DiceNumber
-from .repository import EventsStore
+from .game.hints import hint
+from .repository import Event, EventsStore, SystemEventsLog
 
 
 class GameViews:
-    def __init__(self, game_uuid: UUID, repository: EventsStore):
+    def __init__(
+        self,
+        game_uuid: UUID,
+        repository: EventsStore,
+        system_events: SystemEventsLog | None = None,
+    ):
         self._game = Game.from_events(game_uuid, repository.get_game_events(game_uuid))
-        self.logs = repository.get_events(game_uuid)
+        system_log = system_events.get(game_uuid) if system_events else ()
+        self.logs = _interleave(self._game.events, system_log)
 
     def player(self, player_name: str) -> dict:
         for player in self._game.board.players:
@@ -36,6 +46,37 @@ class GameViews:
     def dice(self, dice_number: Literal[1, 2, 3, 4, 5]) -> dict:
         return self._game.board.dices.get(DiceNumber(dice_number)).asdict()
 
+    @property
+    def hint(self) -> dict:
+        """Expected score of each open category for the current player's roll"""
+        board = self._game.board
+        if board.status is not GameStatus.STARTED:
+            return {}
+        turn = board.round.player_turn
+        return hint(board.dices, turn.player.scorecard, turn.rolls_left).asdict()
+
+    @property
+    def rules(self) -> str:
+        return self._game.board.rules
+
+    @property
+    def version(self) -> int:
+        return self._game.board.version
+
     @property
     def state(self) -> Literal["new", "pending", "started", "over"]:
         return self._game.board.status.value
+
+
+def _interleave(
+    game_events: Sequence[Event], system_events: Sequence[tuple[int, SystemEvent]]
+) -> list[Event]:
+    """Insert the system events where they were raised in the game stream"""
+    logs: list[Event] = []
+    start = 0
+    for offset, event in system_events:
+        logs.extend(game_events[start:offset])
+        logs.append(event)
+        start = max(start, offset)
+    logs.extend(game_events[start:])
+    return logs
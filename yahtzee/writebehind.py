@@ -0,0 +1,381 @@
+"""Write-behind events store, committing to a slower store in groups.
+
+`WriteBehindEventsStore` acknowledges `add_events` as soon as the events are
+buffered in memory and appended to a local journal. A background thread
+writes the buffered events to the wrapped store in group commits, when
+`max_batch` events are waiting or `max_delay` seconds after the oldest one.
+Reads see the buffered events (read-your-writes); the change feed only shows
+the events already written to the wrapped store.
+
+Crash safety: the journal is a sequence of append-only segment files. Each
+record is a chunk of changes in the columnar format: the written events of a
+game at their positions in its stream, so nothing is unpickled on start. A
+segment is deleted once all its records are in the wrapped store. On start,
+the records left by a crash are replayed, skipping the events the wrapped
+store already has, so a crash in the middle of a group commit does not
+duplicate events. A failed group commit is reconciled the same way against
+the stream lengths of the wrapped store. The journal is flushed to the OS on
+every write, which survives a crash of the process; pass `fsync=True` to
+survive a power loss.
+"""
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+from uuid import UUID
+
+from .columnar import decode_changes, encode_changes
+from .game.events import Event as GameEvent
+from .lazy import getLogger
+from .repository import Change, EventsStore
+from .statistics import RunningStats
+
+logger = getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 1000
+DEFAULT_MAX_DELAY = 0.05
+# writers wait for a group commit when that many events are buffered
+DEFAULT_MAX_PENDING = 100_000
+
+# payload size
+_RECORD_HEADER = struct.Struct(">I")
+
+
+@dataclass
+class WriteBehindMetrics:
+    flushes: int = 0
+    flushed_events: int = 0
+    failed_flushes: int = 0
+    batch_size: RunningStats = field(default_factory=RunningStats)
+    max_batch_size: int = 0
+    flush_latency: RunningStats = field(default_factory=RunningStats)
+    max_flush_latency: float = 0.0
+
+    def add_flush(self, events: int, latency: float) -> None:
+        self.flushes += 1
+        self.flushed_events += events
+        self.batch_size.add(events)
+        self.max_batch_size = max(self.max_batch_size, events)
+        self.flush_latency.add(latency)
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+
+    def asdict(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "flushed_events": self.flushed_events,
+            "failed_flushes": self.failed_flushes,
+            "batch_size": {
+                "mean": self.batch_size.mean,
+                "max": self.max_batch_size,
+            },
+            "flush_latency": {
+                "mean": self.flush_latency.mean,
+                "max": self.max_flush_latency,
+            },
+        }
+
+
+class Journal:
+    """Append-only segments of the writes not yet in the wrapped store"""
+
+    def __init__(self, directory: Path, fsync: bool = False) -> None:
+        self._directory = directory
+        self._fsync = fsync
+        directory.mkdir(parents=True, exist_ok=True)
+        segments = journal_segments(directory)
+        self._segment = _segment_number(segments[-1]) + 1 if segments else 1
+        self._file = self._open()
+
+    def _open(self) -> BinaryIO:
+        return (self._directory / f"journal-{self._segment:06d}.log").open("ab")
+
+    def append(self, uuid: UUID, offset: int, events: Sequence[GameEvent]) -> None:
+        payload = encode_changes(
+            [Change(offset + i, uuid, event) for i, event in enumerate(events)]
+        )
+        self._file.write(_RECORD_HEADER.pack(len(payload)) + payload)
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> int:
+        """Start a new segment, return it"""
+        self._file.close()
+        self._segment += 1
+        self._file = self._open()
+        return self._segment
+
+    def truncate(self, until: int) -> None:
+        """Delete the segments before the `until` segment"""
+        for segment in journal_segments(self._directory):
+            if _segment_number(segment) < until:
+                segment.unlink()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @staticmethod
+    def records(segment: Path) -> Iterator[tuple[UUID, int, list[GameEvent]]]:
+        """Game, stream offset and events of each record, `FormatError` if corrupted"""
+        with segment.open("rb") as f:
+            while header := f.read(_RECORD_HEADER.size):
+                if len(header) < _RECORD_HEADER.size:
+                    return  # truncated by a crash while writing
+                (size,) = _RECORD_HEADER.unpack(header)
+                payload = f.read(size)
+                if len(payload) < size:
+                    return
+                changes = decode_changes(payload)
+                if changes:
+                    game, offset = changes[0].game, changes[0].position
+                    yield game, offset, [change.event for change in changes]
+
+
+def journal_segments(directory: Path) -> list[Path]:
+    return sorted(directory.glob("journal-*.log"))
+
+
+def _segment_number(segment: Path) -> int:
+    return int(segment.stem.split("-")[1])
+
+
+class WriteBehindEventsStore:
+    def __init__(
+        self,
+        store: EventsStore,
+        journal: Path | None = None,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        fsync: bool = False,
+    ) -> None:
+        self._store = store
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._max_pending = max_pending
+        self.metrics = WriteBehindMetrics()
+
+        self._lock = threading.Condition()
+        # writes waiting for the next group commit, in order
+        self._pending: list[tuple[UUID, Sequence[GameEvent]]] = []
+        self._pending_count = 0
+        self._oldest_pending = 0.0
+        # events not yet in the wrapped store (pending or being written), by game
+        self._buffered: dict[UUID, list[GameEvent]] = {}
+        # stream lengths of the games written since the start
+        self._lengths: dict[UUID, int] = {}
+        # games of the group commit being written
+        self._in_flight: set[UUID] = set()
+        # group commits done or failed, to tell the reads a write happened
+        self._generation = 0
+        # games of a failed group commit not yet reconciled with the store
+        self._unreconciled: set[UUID] = set()
+        self._closed = False
+        self._flush_lock = threading.Lock()
+
+        self._journal = None
+        if journal is not None:
+            self._recover(journal)
+            self._journal = Journal(journal, fsync)
+        self._flusher = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._flusher.start()
+
+    def _recover(self, directory: Path) -> None:
+        """Write the journaled events missing from the wrapped store"""
+        segments = journal_segments(directory)
+        missing: dict[UUID, list[GameEvent]] = defaultdict(list)
+        for segment in segments:
+            for uuid, offset, events in Journal.records(segment):
+                if uuid not in self._lengths:
+                    self._lengths[uuid] = self._store.length(uuid)
+                if offset > self._lengths[uuid]:
+                    raise RuntimeError(f"Journal of {uuid} has a gap at {offset}")
+                # the events before the stream length were already written
+                missing_events = events[self._lengths[uuid] - offset :]
+                missing[uuid].extend(missing_events)
+                self._lengths[uuid] += len(missing_events)
+        if missing:
+            self._store.add_many(missing)
+            logger.warning("Recovered %s games from the journal", len(missing))
+        for segment in segments:
+            segment.unlink()
+
+    # reads
+
+    def get_game_events(self, uuid: UUID) -> list[GameEvent]:
+        while True:
+            with self._lock:
+                length = self._lengths.get(uuid)
+                buffered = list(self._buffered.get(uuid, ()))
+                generation = self._generation
+            stored = self._store.get_game_events(uuid)
+            if length is None or len(stored) + len(buffered) == length:
+                return [*stored, *buffered]
+            with self._lock:
+                if uuid not in self._in_flight and generation == self._generation:
+                    raise RuntimeError(
+                        f"Game {uuid} has {len(stored)} events stored and "
+                        f"{len(buffered)} buffered, {length} were written"
+                    )
+                # some buffered events were written meanwhile: read again once written
+                while uuid in self._in_flight:
+                    self._lock.wait()
+
+    def length(self, uuid: UUID) -> int:
+        with self._lock:
+            length = self._lengths.get(uuid)
+        return self._store.length(uuid) if length is None else length
+
+    def games(self) -> Iterable[UUID]:
+        with self._lock:
+            buffered = set(self._buffered)
+        return buffered.union(self._store.games())
+
+    def changes(self, since: int = 0, limit: int | None = None) -> Sequence[Change]:
+        return self._store.changes(since, limit)
+
+    def head(self) -> int:
+        return self._store.head()
+
+    # writes
+
+    def add_events(self, uuid: UUID, events: Sequence[GameEvent]) -> None:
+        self.add_many({uuid: events})
+
+    def add_many(self, events_by_game: Mapping[UUID, Sequence[GameEvent]]) -> None:
+        for uuid in events_by_game:
+            if uuid not in self._lengths:
+                length = self._store.length(uuid)
+                with self._lock:
+                    self._lengths.setdefault(uuid, length)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The write-behind store is closed")
+            while self._pending_count >= self._max_pending:
+                self._lock.wait()
+            if not self._pending:
+                self._oldest_pending = time.monotonic()
+            for uuid, events in events_by_game.items():
+                if self._journal is not None:
+                    self._journal.append(uuid, self._lengths[uuid], events)
+                self._lengths[uuid] += len(events)
+                self._pending.append((uuid, events))
+                self._pending_count += len(events)
+                self._buffered.setdefault(uuid, []).extend(events)
+            if self._pending_count >= self._max_batch:
+                self._lock.notify_all()
+
+    def flush(self) -> None:
+        """Write all the buffered events to the wrapped store"""
+        with self._flush_lock:
+            if self._unreconciled:
+                self._reconcile(set(self._unreconciled))
+            with self._lock:
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, []
+                count, self._pending_count = self._pending_count, 0
+                grouped: dict[UUID, list[GameEvent]] = defaultdict(list)
+                for uuid, events in batch:
+                    grouped[uuid].extend(events)
+                self._in_flight = set(grouped)
+                segment = self._journal.rotate() if self._journal else 0
+            start = time.perf_counter()
+            try:
+                self._store.add_many(grouped)
+            except BaseException:
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._pending_count += count
+                    self._unreconciled.update(grouped)
+                    self._in_flight = set()
+                    self._generation += 1
+                    self.metrics.failed_flushes += 1
+                    self._lock.notify_all()
+                try:
+                    # a part of the group commit may have been written
+                    self._reconcile(grouped)
+                except Exception:
+                    logger.exception("Failed to reconcile a failed group commit")
+                raise
+            latency = time.perf_counter() - start
+            with self._lock:
+                for uuid, events in grouped.items():
+                    buffered = self._buffered[uuid]
+                    del buffered[: len(events)]
+                    if not buffered:
+                        del self._buffered[uuid]
+                self._in_flight = set()
+                self._generation += 1
+                self.metrics.add_flush(count, latency)
+                self._lock.notify_all()
+            if self._journal is not None:
+                self._journal.truncate(segment)
+
+    def _reconcile(self, games: Iterable[UUID]) -> None:
+        """Drop the buffered events already in the wrapped store, written by a
+        failed group commit. The flush lock is held.
+        """
+        stored = {uuid: self._store.length(uuid) for uuid in games}
+        with self._lock:
+            written: dict[UUID, int] = {}
+            for uuid, length in stored.items():
+                buffered = self._buffered.get(uuid, [])
+                count = length - (self._lengths[uuid] - len(buffered))
+                if count > 0:
+                    del buffered[:count]
+                    if not buffered:
+                        self._buffered.pop(uuid, None)
+                    written[uuid] = count
+            pending = []
+            for uuid, events in self._pending:
+                if count := written.get(uuid, 0):
+                    written[uuid] = max(count - len(events), 0)
+                    self._pending_count -= min(count, len(events))
+                    events = events[count:]
+                if events:
+                    pending.append((uuid, events))
+            self._pending = pending
+            self._unreconciled.difference_update(stored)
+
+    def close(self) -> None:
+        """Write the buffered events and stop the background thread"""
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._flusher.join()
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed and not self._due():
+                    timeout = None
+                    if self._pending:
+                        timeout = self._oldest_pending + self._max_delay
+                        timeout -= time.monotonic()
+                    self._lock.wait(timeout)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Group commit failed, retrying")
+                time.sleep(self._max_delay)
+
+    def _due(self) -> bool:
+        """Is a group commit due, the lock being held"""
+        if not self._pending:
+            return False
+        if self._pending_count >= self._max_batch:
+            return True
+        return time.monotonic() - self._oldest_pending >= self._max_delay